@@ -0,0 +1,168 @@
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Responses that mean "slow down" rather than "this page is broken"
+BACKOFF_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostState:
+    def __init__(self, concurrency, delay, window):
+        self.limit = float(concurrency)
+        self.delay = delay
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.blocked_until = 0.0
+        self.last_backoff = 0.0
+        self.latencies = deque(maxlen=window)
+        self.failures = deque(maxlen=window)
+
+
+class AdaptiveThrottle:
+    """
+    Per-host AIMD control of request concurrency and spacing
+
+    Every request takes a slot for its host with acquire() and reports back with
+    release(). Successes raise the host's concurrency limit additively (about +1
+    per limit's worth of responses) and shorten the delay between request
+    starts; a 429/5xx, a connection error, a rising error rate or a latency
+    slowdown halves the limit and doubles the delay, at most once per round
+    trip. Retry-After blocks the host for the given time. Limits stay within the
+    configured floor and ceiling and are exported as gauges to RunMetrics.
+    """
+
+    def __init__(self, min_concurrency=1, max_concurrency=4, initial_concurrency=1,
+                 min_delay=0.25, max_delay=30.0, initial_delay=1.0, delay_step=0.05,
+                 window=50, max_latency=5.0, slowdown_factor=2.0, max_error_rate=0.1,
+                 metrics=None):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.initial_concurrency = max(min_concurrency, min(initial_concurrency, max_concurrency))
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = max(min_delay, min(initial_delay, max_delay))
+        self.delay_step = delay_step
+        self.window = window
+        self.max_latency = max_latency
+        self.slowdown_factor = slowdown_factor
+        self.max_error_rate = max_error_rate
+        self.metrics = metrics
+        self._cond = threading.Condition()
+        self._hosts = {}
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.initial_concurrency, self.initial_delay, self.window)
+        return state
+
+    def acquire(self, host):
+        """Block until the host has a free slot and its request spacing has elapsed"""
+        with self._cond:
+            state = self._state(host)
+            while True:
+                now = time.monotonic()
+                ready_at = max(state.next_start, state.blocked_until)
+                if state.in_flight < int(state.limit) and now >= ready_at:
+                    state.in_flight += 1
+                    # Jitter the spacing so requests do not arrive in lockstep
+                    state.next_start = now + state.delay * random.uniform(0.8, 1.2)
+                    return
+                self._cond.wait(ready_at - now if now < ready_at else None)
+
+    def release(self, host, elapsed, response=None):
+        """
+        Return a slot and adapt the host's limits to the outcome
+
+        Args:
+            host (str): Host the request went to
+            elapsed (float): Response time in seconds
+            response (requests.Response, optional): None for a connection error or timeout
+        """
+        with self._cond:
+            state = self._state(host)
+            state.in_flight -= 1
+            now = time.monotonic()
+            failed = response is None or response.status_code in BACKOFF_STATUSES
+            state.failures.append(failed)
+
+            if failed:
+                retry_after = None if response is None else parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after:
+                    state.blocked_until = max(state.blocked_until, now + min(retry_after, self.max_delay * 10))
+                self._backoff(host, state, now, 'error')
+            else:
+                state.latencies.append(elapsed)
+                reason = self._overload_reason(state)
+                if reason:
+                    self._backoff(host, state, now, reason)
+                else:
+                    state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+                    state.delay = max(self.min_delay, state.delay - self.delay_step)
+
+            self._cond.notify_all()
+            self._export(host, state)
+
+    def _overload_reason(self, state):
+        if len(state.failures) >= 10 and sum(state.failures) / len(state.failures) > self.max_error_rate:
+            return 'error_rate'
+        if len(state.latencies) < 10:
+            return None
+        if _percentile(state.latencies, 0.9) > self.max_latency:
+            return 'latency'
+        recent = list(state.latencies)[-5:]
+        if _percentile(recent, 0.5) > self.slowdown_factor * _percentile(state.latencies, 0.5):
+            return 'slowdown'
+        return None
+
+    def _backoff(self, host, state, now, reason):
+        # One decrease per round trip, so a burst of failures from requests already
+        # in flight does not collapse the limit to the floor
+        if now - state.last_backoff < max(_percentile(state.latencies, 0.5), state.delay):
+            return
+        state.last_backoff = now
+        state.limit = max(self.min_concurrency, state.limit / 2)
+        state.delay = min(self.max_delay, max(state.delay * 2, self.min_delay, self.delay_step))
+        if self.metrics:
+            self.metrics.inc('throttle_backoffs_total', host=host, reason=reason)
+
+    def _export(self, host, state):
+        if not self.metrics:
+            return
+        self.metrics.set_gauge('throttle_concurrency_limit', int(state.limit), host=host)
+        self.metrics.set_gauge('throttle_delay_seconds', round(state.delay, 3), host=host)
+        if state.latencies:
+            self.metrics.set_gauge('throttle_latency_p50_seconds',
+                                   round(_percentile(state.latencies, 0.5), 3), host=host)
+            self.metrics.set_gauge('throttle_latency_p90_seconds',
+                                   round(_percentile(state.latencies, 0.9), 3), host=host)
+
+    def limits(self, url_or_host):
+        """Current (concurrency limit, delay seconds) for a host"""
+        host = urlparse(url_or_host).netloc or url_or_host
+        with self._cond:
+            state = self._state(host)
+            return int(state.limit), state.delay
@@ -0,0 +1,69 @@
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # optional fast path
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional fast path
+    msgspec = None
+
+# Fastest available backend first. Set POKEMON_SV_JSON_BACKEND to force one.
+AVAILABLE_BACKENDS = [name for name, module in (('orjson', orjson), ('msgspec', msgspec)) if module] + ['json']
+
+
+def _select_backend():
+    requested = os.environ.get('POKEMON_SV_JSON_BACKEND')
+    if requested:
+        if requested not in AVAILABLE_BACKENDS:
+            raise RuntimeError(f"JSON backend {requested!r} is not installed "
+                               f"(available: {', '.join(AVAILABLE_BACKENDS)})")
+        return requested
+    return AVAILABLE_BACKENDS[0]
+
+
+BACKEND = _select_backend()
+
+# msgspec can parse and validate against a schema in a single pass
+TYPED_DECODING = msgspec is not None and BACKEND != 'json'
+
+
+def dumps(obj, backend=None):
+    """
+    Serialize to UTF-8 bytes in the trainer_data.json on-disk format
+
+    Every backend produces exactly json.dumps(obj, ensure_ascii=False, indent=2),
+    so files written by one backend are byte-identical to the others.
+    """
+    backend = backend or BACKEND
+    if backend == 'orjson':
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    if backend == 'msgspec':
+        return msgspec.json.format(msgspec.json.encode(obj), indent=2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def loads(data, backend=None):
+    """Parse JSON from bytes or str"""
+    backend = backend or BACKEND
+    if backend == 'orjson':
+        return orjson.loads(data)
+    if backend == 'msgspec':
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def write_file(path, data):
+    """Write bytes atomically so an interrupted checkpoint never leaves a truncated file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,244 @@
+import argparse
+import mmap
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import zstandard
+
+from parse_cache import body_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    body_hash TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    body_hash TEXT NOT NULL,
+    PRIMARY KEY (url, fetched_at)
+) WITHOUT ROWID;
+"""
+
+
+class PageArchive:
+    """
+    Append-only archive of fetched pages for long-term history
+
+    Each page body is compressed as its own zstd frame and appended to the
+    current segment file (segment-00001.zst, ...), rolling over at
+    max_segment_bytes. The sidecar SQLite index maps each body to (segment, offset, length) and each
+    URL to the bodies it had over time. Identical bodies are stored once, and
+    a URL only gets a new history entry when its body changes. Reads slice
+    memory-mapped segments, so fetching any single page costs one index
+    lookup and one frame decompression.
+    """
+
+    def __init__(self, archive_dir, max_segment_bytes=256 * 1024 * 1024, level=10, commit_every=50):
+        self.archive_dir = archive_dir
+        self.max_segment_bytes = max_segment_bytes
+        self.commit_every = commit_every
+        self.level = level
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._maps = {}  # segment -> (file, mmap)
+        self._writer = None
+        self._writer_segment = None
+
+        os.makedirs(archive_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(archive_dir, 'index.db'), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.archive_dir, f"segment-{segment:05d}.zst")
+
+    def segments(self):
+        """Segment numbers on disk, oldest first"""
+        numbers = []
+        for name in os.listdir(self.archive_dir):
+            if name.startswith('segment-') and name.endswith('.zst'):
+                numbers.append(int(name[len('segment-'):].split('.')[0]))
+        return sorted(numbers)
+
+    def _open_writer(self, extra):
+        """Segment file to append the next frame to (call with the lock held)"""
+        if self._writer and self._writer.tell() + extra <= self.max_segment_bytes:
+            return self._writer
+        if self._writer:
+            self._writer.close()
+        segments = self.segments()
+        segment = segments[-1] if segments else 1
+        path = self._segment_path(segment)
+        if segments and os.path.getsize(path) + extra > self.max_segment_bytes:
+            segment += 1
+            path = self._segment_path(segment)
+        self._writer = open(path, 'ab')
+        self._writer_segment = segment
+        return self._writer
+
+    def put(self, url, body, fetched_at=None):
+        """
+        Archive a fetched page body
+
+        Args:
+            url (str): Final URL, query string included
+            body (bytes): Raw response body
+            fetched_at (float, optional): Unix time of the fetch (default now)
+
+        Returns:
+            bool: True if the body was new (written to a segment)
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = body_hash(body)
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            stored = self.conn.execute("SELECT 1 FROM bodies WHERE body_hash = ?", (digest,)).fetchone()
+            if not stored:
+                frame = self._compressor.compress(body)
+                writer = self._open_writer(len(frame))
+                offset = writer.tell()
+                writer.write(frame)
+                # The frame must be on disk before the index points at it
+                writer.flush()
+                self.conn.execute("INSERT INTO bodies (body_hash, segment, offset, length, size) "
+                                  "VALUES (?, ?, ?, ?, ?)",
+                                  (digest, self._writer_segment, offset, len(frame), len(body)))
+            latest = self.conn.execute(
+                "SELECT body_hash FROM pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1", (url,)).fetchone()
+            if not latest or latest[0] != digest:
+                self.conn.execute("INSERT OR REPLACE INTO pages (url, fetched_at, body_hash) VALUES (?, ?, ?)",
+                                  (url, fetched_at, digest))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self.conn.commit()
+                self._pending = 0
+        return not stored
+
+    def _segment_map(self, segment, end):
+        """Memory map of a segment covering at least `end` bytes (call with the lock held)"""
+        entry = self._maps.get(segment)
+        if entry is None or end > len(entry[1]):
+            # Not mapped yet, or mapped before the frame was appended
+            if entry:
+                entry[1].close()
+                entry[0].close()
+            f = open(self._segment_path(segment), 'rb')
+            entry = self._maps[segment] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return entry
+
+    def _read(self, segment, offset, length):
+        with self._lock:
+            _, mapped = self._segment_map(segment, offset + length)
+            frame = memoryview(mapped)[offset:offset + length]
+            try:
+                return zstandard.ZstdDecompressor().decompress(frame)
+            finally:
+                frame.release()
+
+    def get(self, url, at=None):
+        """
+        Page body as archived (the latest version, or the latest at/before `at`)
+
+        Returns:
+            bytes: The body, or None if the URL was never archived
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT b.segment, b.offset, b.length FROM pages p JOIN bodies b ON b.body_hash = p.body_hash "
+                "WHERE p.url = ? AND p.fetched_at <= ? ORDER BY p.fetched_at DESC LIMIT 1",
+                (url, float('inf') if at is None else at)).fetchone()
+        return self._read(*row) if row else None
+
+    def history(self, url):
+        """(fetched_at, body hash) for every version of a URL, oldest first"""
+        with self._lock:
+            return self.conn.execute("SELECT fetched_at, body_hash FROM pages WHERE url = ? ORDER BY fetched_at",
+                                     (url,)).fetchall()
+
+    def scan(self, url_prefix='', since=None):
+        """
+        Stream archived pages in storage order
+
+        Yields:
+            tuple: (url, fetched_at, body)
+        """
+        with self._lock:
+            self.conn.commit()
+            rows = self.conn.execute(
+                "SELECT p.url, p.fetched_at, b.segment, b.offset, b.length FROM pages p "
+                "JOIN bodies b ON b.body_hash = p.body_hash "
+                "WHERE p.url >= ? AND p.url < ? AND p.fetched_at >= ? ORDER BY b.segment, b.offset",
+                (url_prefix, url_prefix + '\U0010ffff', since or 0)).fetchall()
+        for url, fetched_at, segment, offset, length in rows:
+            yield url, fetched_at, self._read(segment, offset, length)
+
+    def stats(self):
+        with self._lock:
+            pages, urls = self.conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM pages").fetchone()
+            bodies, raw, stored = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM bodies").fetchone()
+        return {'urls': urls, 'versions': pages, 'bodies': bodies, 'raw_bytes': raw,
+                'stored_bytes': stored, 'segments': len(self.segments())}
+
+    def close(self):
+        with self._lock:
+            if self._writer:
+                self._writer.close()
+                self._writer = None
+            for f, mapped in self._maps.values():
+                mapped.close()
+                f.close()
+            self._maps.clear()
+            self.conn.commit()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect a page archive")
+    parser.add_argument('archive_dir')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('stats', help='Pages, versions and compression ratio')
+    get = subcommands.add_parser('get', help='Write a page body to stdout')
+    get.add_argument('url')
+    get.add_argument('--at', type=float, help='Version at this Unix time')
+    history = subcommands.add_parser('history', help='Versions of a URL')
+    history.add_argument('url')
+    scan = subcommands.add_parser('scan', help='List archived pages in storage order')
+    scan.add_argument('--prefix', default='')
+    scan.add_argument('--since', type=float)
+    args = parser.parse_args()
+
+    with PageArchive(args.archive_dir) as archive:
+        if args.command == 'stats':
+            stats = archive.stats()
+            ratio = stats['raw_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+            print(f"{stats['urls']} URLs, {stats['versions']} versions, {stats['bodies']} distinct bodies "
+                  f"in {stats['segments']} segments: {stats['raw_bytes'] / 1e6:.1f} MB -> "
+                  f"{stats['stored_bytes'] / 1e6:.1f} MB ({ratio:.1f}x)")
+        elif args.command == 'get':
+            body = archive.get(args.url, args.at)
+            if body is None:
+                parser.error(f"{args.url} is not archived")
+            sys.stdout.buffer.write(body)
+        elif args.command == 'history':
+            for fetched_at, digest in archive.history(args.url):
+                print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(fetched_at))}  {digest[:16]}")
+        else:
+            for url, fetched_at, body in archive.scan(args.prefix, args.since):
+                print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(fetched_at))}  {len(body):>9}  {url}")
@@ -0,0 +1,101 @@
+import hashlib
+import sqlite3
+import threading
+
+import json_codec
+from trainer_records import PokemonSet
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parse_results (
+    body_hash TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    pokemon_id TEXT NOT NULL,
+    result BLOB NOT NULL,
+    PRIMARY KEY (body_hash, parser_version, pokemon_id)
+) WITHOUT ROWID;
+"""
+
+
+def rules_version(*rules):
+    """
+    Parser version derived from the extraction rules
+
+    Args:
+        rules: Anything whose repr() describes parser behaviour, e.g. lists of
+            compiled regexes, the name table and a manual revision number
+
+    Returns:
+        str: Short hash that changes whenever any rule changes
+    """
+    digest = hashlib.sha256()
+    for rule in rules:
+        if isinstance(rule, (list, tuple)):
+            rule = [getattr(item, 'pattern', item) for item in rule]
+        elif isinstance(rule, dict):
+            rule = sorted(rule.items())
+        digest.update(repr(rule).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def body_hash(body):
+    """SHA-256 of an article body (bytes, or str encoded as UTF-8)"""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.sha256(body).hexdigest()
+
+
+class ParseCache:
+    """
+    Persistent cache of parsed article results
+
+    Results are keyed by (article body hash, parser version, pokemon_id), so an
+    article whose body has not changed is never parsed twice, across trainers
+    and across runs. Entries from other parser versions are dropped on open.
+    """
+
+    def __init__(self, db_path, parser_version, commit_every=50):
+        self.db_path = db_path
+        self.parser_version = parser_version
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            self.conn.execute("DELETE FROM parse_results WHERE parser_version != ?", (parser_version,))
+
+    def get(self, body_digest, pokemon_id):
+        """Cached PokemonSet for this article body and Pokemon, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result FROM parse_results WHERE body_hash = ? AND parser_version = ? AND pokemon_id = ?",
+                (body_digest, self.parser_version, pokemon_id)).fetchone()
+        return PokemonSet.from_dict(json_codec.loads(row[0])) if row else None
+
+    def put(self, body_digest, pokemon_id, pokemon_set):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parse_results (body_hash, parser_version, pokemon_id, result) "
+                "VALUES (?, ?, ?, ?)",
+                (body_digest, self.parser_version, pokemon_id, json_codec.dumps(pokemon_set.to_dict())))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self.conn.commit()
+                self._pending = 0
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM parse_results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
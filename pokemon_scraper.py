@@ -1,20 +1,165 @@
+import argparse
 import requests
 from bs4 import BeautifulSoup
-import json
+import os
 import re
+import threading
 import time
-import random
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from adaptive_throttle import BACKOFF_STATUSES, AdaptiveThrottle
+from parse_cache import ParseCache, body_hash, rules_version
+from pokedex import POKEMON_NAMES
+from species_usage import SpeciesUsageCache
+from trainer_records import PokemonSet, Trainer, dump_trainers
+from run_metrics import RunMetrics
+
+# Extraction rules for construction articles
+ITEM_PATTERNS = [re.compile(p) for p in (r'持ち物[：:]\s*([^\s]+)', r'もちもの[：:]\s*([^\s]+)', r'アイテム[：:]\s*([^\s]+)')]
+ABILITY_PATTERNS = [re.compile(p) for p in (r'特性[：:]\s*([^\s]+)', r'とくせい[：:]\s*([^\s]+)')]
+NATURE_PATTERNS = [re.compile(p) for p in (r'性格[：:]\s*([^\s]+)', r'せいかく[：:]\s*([^\s]+)')]
+TERA_PATTERNS = [re.compile(p) for p in (r'テラスタイプ[：:]\s*([^\s]+)', r'テラス[：:]\s*([^\s]+)', r'テラ[：:]\s*([^\s]+)')]
+MOVE_PATTERNS = [re.compile(p) for p in (r'技[：:]\s*([^、]+)、([^、]+)、([^、]+)、([^、]+)',
+                                         r'わざ[：:]\s*([^、]+)、([^、]+)、([^、]+)、([^、]+)',
+                                         r'技構成[：:]\s*([^、]+)、([^、]+)、([^、]+)、([^、]+)')]
+EV_PATTERNS = [re.compile(p) for p in (
+    r'努力値[：:]\s*(?:H|HP)(\d+)\s*(?:A|攻撃)(\d+)\s*(?:B|防御)(\d+)\s*(?:C|特攻)(\d+)\s*(?:D|特防)(\d+)\s*(?:S|素早)(\d+)',
+    r'努力値[：:]\s*(?:HP|H)(\d+)\s*(?:攻撃|A)(\d+)\s*(?:防御|B)(\d+)\s*(?:特攻|C)(\d+)\s*(?:特防|D)(\d+)\s*(?:素早さ|S)(\d+)'
+)]
+SECTION_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'p']
+
+# Bump when parse_pokemon_details changes in a way the rules above do not show
+PARSER_REVISION = 1
+# Cached parse results are only reused while this is unchanged
+PARSER_VERSION = rules_version(PARSER_REVISION, SECTION_TAGS, ITEM_PATTERNS, ABILITY_PATTERNS,
+                               NATURE_PATTERNS, TERA_PATTERNS, MOVE_PATTERNS, EV_PATTERNS, POKEMON_NAMES)
+
+class ValidatorCache:
+    """
+    Pages kept for conditional GETs: (url, params) -> (ETag, Last-Modified, text)
+
+    Least recently used pages are evicted once the kept text exceeds
+    max_chars, so a long-running scraper does not keep every page it has
+    ever fetched.
+    """
+
+    def __init__(self, max_chars=64 * 1024 * 1024):
+        self.max_chars = max_chars
+        self.chars = 0
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None:
+                self._pages.move_to_end(key)
+            return entry
+
+    def __setitem__(self, key, entry):
+        with self._lock:
+            old = self._pages.pop(key, None)
+            if old is not None:
+                self.chars -= len(old[2])
+            self._pages[key] = entry
+            self.chars += len(entry[2])
+            while self.chars > self.max_chars and len(self._pages) > 1:
+                _, evicted = self._pages.popitem(last=False)
+                self.chars -= len(evicted[2])
+
+    def __len__(self):
+        return len(self._pages)
 
 class PokemonSVScraper:
-    def __init__(self):
+    def __init__(self, log=print, metrics=None, throttle=None, max_retries=3, timeout=30,
+                 parse_cache=None):
+        self.log = log
+        self.metrics = metrics or RunMetrics()
+        # Optional ParseCache: articles whose body is unchanged are not parsed again
+        self.parse_cache = parse_cache
+        # Season usage per species, shared by every team and scrape of this scraper
+        self.species_usage = SpeciesUsageCache(self.fetch_species_page, self.metrics)
+        # Per-host adaptive concurrency and request spacing (sv.pokedb.tokyo and each blog host)
+        self.throttle = throttle or AdaptiveThrottle(metrics=self.metrics)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        # Optional ValidatorCache (or dict) (url, params) -> (ETag, Last-Modified, text):
+        # pages are then revalidated with conditional GETs and a 304 reuses the kept text
+        self.validators = None
+        # Optional page_archive.PageArchive every fetched page body is kept in
+        self.archive = None
         self.base_url = "https://sv.pokedb.tokyo"
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
         })
 
+    def _get(self, url, stage, **kwargs):
+        """GET a page through the host's throttle, timing it under `stage` and counting bytes per host
+        
+        429/5xx responses, connection errors and timeouts are retried (up to
+        max_retries) once the throttle lets the host be contacted again,
+        honouring Retry-After.
+        """
+        host = urlparse(url).netloc
+        for attempt in range(self.max_retries + 1):
+            self.throttle.acquire(host)
+            start = time.perf_counter()
+            response = None
+            try:
+                with self.metrics.timer(stage):
+                    response = self.session.get(url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                self.metrics.inc('http_retries_total', host=host)
+                continue
+            finally:
+                # No response (connection error or timeout) counts as a failure for the throttle
+                self.throttle.release(host, time.perf_counter() - start, response)
+            self.metrics.observe_response(response)
+            if response.status_code in BACKOFF_STATUSES and attempt < self.max_retries:
+                self.metrics.inc('http_retries_total', host=host)
+                continue
+            response.raise_for_status()
+            if self.archive is not None and response.status_code == 200:
+                with self.metrics.timer('archive_write'):
+                    new = self.archive.put(response.url, response.content)
+                self.metrics.inc('archive_bodies_written_total' if new else 'archive_bodies_deduplicated_total')
+            return response
+
+    def _get_text(self, url, stage, params=None):
+        """GET a page's text, revalidating the copy kept in self.validators if there is one"""
+        if self.validators is None:
+            return self._get(url, stage, params=params).text
+        
+        key = (url, tuple(sorted((params or {}).items())))
+        cached = self.validators.get(key)
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        response = self._get(url, stage, params=params, headers=headers)
+        if cached and response.status_code == 304:
+            self.metrics.cache_lookup('http', True)
+            return cached[2]
+        self.metrics.cache_lookup('http', False)
+        
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.validators[key] = (etag, last_modified, response.text)
+        return response.text
+
     def get_trainers_with_articles(self, season=27, rule=0, party=1):
         """Get list of trainers who have published construction articles"""
+        with self.metrics.timer('trainer_list'):
+            return self._fetch_trainer_list(season, rule, party)
+
+    def _fetch_trainer_list(self, season, rule, party):
         trainers = []
         page = 1
         
@@ -28,16 +173,16 @@ class PokemonSVScraper:
             }
             
             try:
-                print(f"Fetching page {page} of trainer list...")
-                response = self.session.get(url, params=params)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
+                self.log(f"Fetching page {page} of trainer list...")
+                html = self._get_text(url, 'list_page_fetch', params=params)
+                parse_start = time.perf_counter()
+                soup = BeautifulSoup(html, 'html.parser')
                 
                 # Find all trainer rows in the table
                 trainer_rows = soup.select('tr')
                 
                 if not trainer_rows:
-                    print("No trainer rows found on this page")
+                    self.log("No trainer rows found on this page")
                     break
                 
                 found_article = False
@@ -86,306 +231,393 @@ class PokemonSVScraper:
                                 'article_url': article_url,
                                 'pokemon_ids': pokemon_ids
                             })
-                            print(f"Found trainer with article: {trainer_name} (Rank {rank})")
+                            self.log(f"Found trainer with article: {trainer_name} (Rank {rank})")
                 
                 # If no articles found on this page and we've gone through several pages, we might be at the end
                 if not found_article and page > 10:
-                    print("No more trainers with articles found")
+                    self.log("No more trainers with articles found")
                     break
                     
                 # Check if we've reached the end (less than expected entries or no next page link)
                 next_page = soup.select_one('a:-soup-contains("次へ")')
+                self.metrics.record_stage('list_page_parse', time.perf_counter() - parse_start)
                 if not next_page:
-                    print("No next page link found")
+                    self.log("No next page link found")
                     break
                     
                 page += 1
-                time.sleep(random.uniform(1, 2))  # Be nice to the server
                 
             except Exception as e:
-                print(f"Error fetching trainer list page {page}: {str(e)}")
+                self.log(f"Error fetching trainer list page {page}: {str(e)}")
                 break
         
-        print(f"Found {len(trainers)} trainers with construction articles")
+        self.log(f"Found {len(trainers)} trainers with construction articles")
         return trainers
 
-    def get_pokemon_details_from_article(self, article_url, pokemon_id):
-        """Get Pokemon details from the construction article"""
+    def fetch_article(self, article_url):
+        """Fetch a construction article's HTML
+        
+        Safe to call from worker threads: it does not log.
+        
+        Returns:
+            tuple: (html, None) on success, (None, error message) on failure
+        """
+        try:
+            return self._get_text(article_url, 'article_fetch'), None
+        except Exception as e:
+            return None, str(e)
+
+    def fetch_species_page(self, pokemon_id, season, rule):
+        """Fetch a species detail page (/pokemon/show/NNNN-FF) with its season usage data"""
+        url = f"{self.base_url}/pokemon/show/{pokemon_id}"
+        return self._get_text(url, 'species_fetch', params={'season': season, 'rule': rule})
+
+    def get_pokemon_details_from_article(self, article_url, pokemon_id, html=None):
+        """Get Pokemon details from the construction article as a PokemonSet
+        
+        Args:
+            html (str, optional): Article HTML if already fetched
+        """
         try:
-            # Extract Pokemon number from ID
-            pokemon_number = pokemon_id.split('-')[0]
+            if html is None:
+                html, error = self.fetch_article(article_url)
+                if error:
+                    raise RuntimeError(error)
             
-            # Get the article page
-            response = self.session.get(article_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            return self._parse_cached(html, pokemon_id)
+        except Exception as e:
+            self.log(f"Error fetching Pokemon details from article for {pokemon_id}: {str(e)}")
+            return None
+
+    def _parse_cached(self, html, pokemon_id):
+        """parse_pokemon_details through the parse cache, if one is configured"""
+        if self.parse_cache is None:
+            with self.metrics.timer('article_parse'):
+                return self.parse_pokemon_details(html, pokemon_id)
+        
+        digest = body_hash(html)
+        pokemon_set = self.parse_cache.get(digest, pokemon_id)
+        self.metrics.cache_lookup('parse', pokemon_set is not None)
+        if pokemon_set is None:
+            with self.metrics.timer('article_parse'):
+                pokemon_set = self.parse_pokemon_details(html, pokemon_id)
+            self.parse_cache.put(digest, pokemon_id, pokemon_set)
+        return pokemon_set
+
+    def parse_pokemon_details(self, html, pokemon_id):
+        """Extract one Pokemon's set from construction article HTML"""
+        # Extract Pokemon number from ID
+        pokemon_number = pokemon_id.split('-')[0]
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Find Pokemon data in the article
+        # This is a simplified approach - articles may have different formats
+        pokemon_data = {
+            'pokemon_id': pokemon_id,
+            'name': '',
+            'item': '',
+            'ability': '',
+            'nature': '',
+            'tera_type': '',
+            'moves': [],
+            'evs': {'H': 0, 'A': 0, 'B': 0, 'C': 0, 'D': 0, 'S': 0}
+        }
+        
+        # Try to find the Pokemon name based on its number
+        pokemon_sections = soup.find_all(SECTION_TAGS)
+        
+        # First, try to get the Pokemon name from the Pokedex
+        pokemon_names = POKEMON_NAMES
+        if pokemon_number in pokemon_names:
+            pokemon_data['name'] = pokemon_names[pokemon_number]
+        
+        # Look for Pokemon data in the article
+        for section in pokemon_sections:
+            text = section.get_text(strip=True)
             
-            # Find Pokemon data in the article
-            # This is a simplified approach - articles may have different formats
-            pokemon_data = {
-                'name': '',
-                'item': '',
-                'ability': '',
-                'nature': '',
-                'tera_type': '',
-                'moves': [],
-                'evs': {'H': 0, 'A': 0, 'B': 0, 'C': 0, 'D': 0, 'S': 0}
-            }
+            # Skip empty sections
+            if not text:
+                continue
             
-            # Try to find the Pokemon name based on its number
-            pokemon_sections = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'p'])
+            # Try to find the Pokemon name if not found yet
+            if not pokemon_data['name'] and any(name in text for name in pokemon_names.values()):
+                for name in pokemon_names.values():
+                    if name in text:
+                        pokemon_data['name'] = name
+                        break
             
-            # First, try to get the Pokemon name from the Pokedex
-            pokemon_names = {
-                # Gen 1
-                "0001": "フシギダネ", "0002": "フシギソウ", "0003": "フシギバナ",
-                "0004": "ヒトカゲ", "0005": "リザード", "0006": "リザードン",
-                "0007": "ゼニガメ", "0008": "カメール", "0009": "カメックス",
-                "0025": "ピカチュウ", "0026": "ライチュウ",
-                "0059": "ウインディ",
-                "0089": "ベトベトン", 
-                "0110": "マタドガス",
-                "0113": "ラッキー",
-                "0131": "ラプラス",
-                "0132": "メタモン",
-                "0143": "カビゴン",
-                "0149": "カイリュー",
-                "0150": "ミュウツー",
-                # Gen 2
-                "0196": "エーフィ",
-                "0211": "ハリーセン",
-                "0212": "ハッサム",
-                "0232": "ドンファン",
-                "0235": "ツボツボ",
-                "0242": "ハピナス",
-                "0248": "バンギラス",
-                "0249": "ルギア",
-                "0250": "ホウオウ",
-                # Gen 3
-                "0260": "ラグラージ",
-                "0282": "サーナイト",
-                "0286": "キノガッサ",
-                "0330": "フライゴン",
-                "0380": "ラティアス",
-                "0382": "カイオーガ",
-                "0383": "グラードン",
-                "0384": "レックウザ",
-                # Gen 4
-                "0426": "フワライド",
-                "0437": "ドータクン",
-                "0445": "ガブリアス",
-                "0450": "カバルドン",
-                "0472": "グライオン",
-                "0479": "ロトム",
-                "0485": "ヒードラン",
-                "0487": "ギラティナ",
-                "0488": "クレセリア",
-                # Gen 5
-                "0547": "フラージェス",
-                "0594": "ママンボウ",
-                # Gen 6
-                "0645": "ランドロス",
-                "0658": "ゲッコウガ",
-                # Gen 7
-                "0727": "オドリドリ",
-                "0730": "アシレーヌ",
-                "0745": "ルガルガン",
-                "0748": "ドヒドイデ",
-                "0778": "ミミッキュ",
-                "0792": "ルナアーラ",
-                # Gen 8
-                "0800": "ネクロズマ",
-                "0812": "ゴリランダー",
-                "0823": "アーマーガア",
-                "0855": "ヤバチャ",
-                "0858": "ブリムオン",
-                "0861": "グリムスナール",
-                "0876": "イエッサン",
-                "0877": "モルペコ",
-                "0888": "ザシアン",
-                "0889": "ザマゼンタ",
-                "0890": "ムゲンダイナ",
-                "0892": "ウーラオス",
-                "0898": "バドレックス",
-                # Gen 9
-                "0901": "パオジアン",
-                "0903": "ドオー",
-                "0911": "ラウドボーン",
-                "0923": "ブロロローム",
-                "0925": "ラブトロス",
-                "0934": "キョジオーン",
-                "0970": "ハバタクカミ",
-                "0973": "イダイナキバ",
-                "0977": "ヘイラッシャ",
-                "0978": "キチキギス",
-                "0980": "テツノワダチ",
-                "0981": "テツノカイナ",
-                "0984": "デカヌチャン",
-                "0986": "セグレイブ",
-                "0987": "ディンルー",
-                "0990": "イーユイ",
-                "0991": "トドロクツキ",
-                "0992": "テツノブジン",
-                "1000": "ミライドン",
-                "1001": "コライドン",
-                "1002": "ウネルミナモ",
-                "1003": "テツノドクガ",
-                "1004": "サーフゴー",
-                "1005": "チオンジェン",
-                "1006": "パーモット",
-                "1007": "オーガポン",
-                "1008": "マシマシラ",
-                "1009": "キラフロル",
-                "1017": "オーロンゲ",
-                "1018": "ブリジュラス",
-                "1020": "ヒスイウォーグル",
-                "1021": "ドドゲザン",
-                "1024": "イイネイヌ",
-            }
+            # Look for item
+            for pattern in ITEM_PATTERNS:
+                item_match = pattern.search(text)
+                if item_match and not pokemon_data['item']:
+                    pokemon_data['item'] = item_match.group(1)
             
-            # Get Pokemon name from the dictionary
-            if pokemon_number in pokemon_names:
-                pokemon_data['name'] = pokemon_names[pokemon_number]
+            # Look for ability
+            for pattern in ABILITY_PATTERNS:
+                ability_match = pattern.search(text)
+                if ability_match and not pokemon_data['ability']:
+                    pokemon_data['ability'] = ability_match.group(1)
             
-            # Look for Pokemon data in the article
-            for section in pokemon_sections:
-                text = section.get_text(strip=True)
-                
-                # Skip empty sections
-                if not text:
-                    continue
-                
-                # Try to find the Pokemon name if not found yet
-                if not pokemon_data['name'] and any(name in text for name in pokemon_names.values()):
-                    for name in pokemon_names.values():
-                        if name in text:
-                            pokemon_data['name'] = name
-                            break
-                
-                # Look for item
-                item_patterns = [r'持ち物[：:]\s*([^\s]+)', r'もちもの[：:]\s*([^\s]+)', r'アイテム[：:]\s*([^\s]+)']
-                for pattern in item_patterns:
-                    item_match = re.search(pattern, text)
-                    if item_match and not pokemon_data['item']:
-                        pokemon_data['item'] = item_match.group(1)
-                
-                # Look for ability
-                ability_patterns = [r'特性[：:]\s*([^\s]+)', r'とくせい[：:]\s*([^\s]+)']
-                for pattern in ability_patterns:
-                    ability_match = re.search(pattern, text)
-                    if ability_match and not pokemon_data['ability']:
-                        pokemon_data['ability'] = ability_match.group(1)
-                
-                # Look for nature
-                nature_patterns = [r'性格[：:]\s*([^\s]+)', r'せいかく[：:]\s*([^\s]+)']
-                for pattern in nature_patterns:
-                    nature_match = re.search(pattern, text)
-                    if nature_match and not pokemon_data['nature']:
-                        pokemon_data['nature'] = nature_match.group(1)
-                
-                # Look for Tera type
-                tera_patterns = [r'テラスタイプ[：:]\s*([^\s]+)', r'テラス[：:]\s*([^\s]+)', r'テラ[：:]\s*([^\s]+)']
-                for pattern in tera_patterns:
-                    tera_match = re.search(pattern, text)
-                    if tera_match and not pokemon_data['tera_type']:
-                        pokemon_data['tera_type'] = tera_match.group(1)
-                
-                # Look for moves
-                move_patterns = [r'技[：:]\s*([^、]+)、([^、]+)、([^、]+)、([^、]+)', 
-                                r'わざ[：:]\s*([^、]+)、([^、]+)、([^、]+)、([^、]+)',
-                                r'技構成[：:]\s*([^、]+)、([^、]+)、([^、]+)、([^、]+)']
-                for pattern in move_patterns:
-                    move_match = re.search(pattern, text)
-                    if move_match and not pokemon_data['moves']:
-                        pokemon_data['moves'] = [move_match.group(1), move_match.group(2), 
-                                                move_match.group(3), move_match.group(4)]
-                
-                # Look for EVs
-                ev_patterns = [
-                    r'努力値[：:]\s*(?:H|HP)(\d+)\s*(?:A|攻撃)(\d+)\s*(?:B|防御)(\d+)\s*(?:C|特攻)(\d+)\s*(?:D|特防)(\d+)\s*(?:S|素早)(\d+)',
-                    r'努力値[：:]\s*(?:HP|H)(\d+)\s*(?:攻撃|A)(\d+)\s*(?:防御|B)(\d+)\s*(?:特攻|C)(\d+)\s*(?:特防|D)(\d+)\s*(?:素早さ|S)(\d+)'
-                ]
-                for pattern in ev_patterns:
-                    ev_match = re.search(pattern, text)
-                    if ev_match and all(v == 0 for v in pokemon_data['evs'].values()):
-                        pokemon_data['evs'] = {
-                            'H': int(ev_match.group(1)),
-                            'A': int(ev_match.group(2)),
-                            'B': int(ev_match.group(3)),
-                            'C': int(ev_match.group(4)),
-                            'D': int(ev_match.group(5)),
-                            'S': int(ev_match.group(6))
-                        }
+            # Look for nature
+            for pattern in NATURE_PATTERNS:
+                nature_match = pattern.search(text)
+                if nature_match and not pokemon_data['nature']:
+                    pokemon_data['nature'] = nature_match.group(1)
             
-            # If we found at least the name, return the data
-            if pokemon_data['name']:
-                return pokemon_data
+            # Look for Tera type
+            for pattern in TERA_PATTERNS:
+                tera_match = pattern.search(text)
+                if tera_match and not pokemon_data['tera_type']:
+                    pokemon_data['tera_type'] = tera_match.group(1)
             
-            # If we couldn't find the data in the article, use default values
-            return {
-                'name': pokemon_names.get(pokemon_number, f"ポケモン{pokemon_number}"),
-                'item': '不明',
-                'ability': '不明',
-                'nature': '不明',
-                'tera_type': '不明',
-                'moves': ['不明'] * 4,
-                'evs': {'H': 0, 'A': 0, 'B': 0, 'C': 0, 'D': 0, 'S': 0}
-            }
+            # Look for moves
+            for pattern in MOVE_PATTERNS:
+                move_match = pattern.search(text)
+                if move_match and not pokemon_data['moves']:
+                    pokemon_data['moves'] = [move_match.group(1), move_match.group(2), 
+                                            move_match.group(3), move_match.group(4)]
             
-        except Exception as e:
-            print(f"Error fetching Pokemon details from article for {pokemon_id}: {str(e)}")
-            return None
-
-    def scrape_article_trainers(self, season=27, rule=0, party=1, max_trainers=None):
-        """Scrape trainer and Pokemon data for trainers with construction articles"""
-        print(f"Fetching trainers with construction articles for Season {season}...")
-        trainers = self.get_trainers_with_articles(season, rule, party)
+            # Look for EVs
+            for pattern in EV_PATTERNS:
+                ev_match = pattern.search(text)
+                if ev_match and all(v == 0 for v in pokemon_data['evs'].values()):
+                    pokemon_data['evs'] = {
+                        'H': int(ev_match.group(1)),
+                        'A': int(ev_match.group(2)),
+                        'B': int(ev_match.group(3)),
+                        'C': int(ev_match.group(4)),
+                        'D': int(ev_match.group(5)),
+                        'S': int(ev_match.group(6))
+                    }
         
-        if max_trainers:
-            trainers = trainers[:max_trainers]
+        # If we found at least the name, return the data
+        if pokemon_data['name']:
+            return PokemonSet.from_dict(pokemon_data)
         
-        trainer_data = []
-        total = len(trainers)
+        # If we couldn't find the data in the article, use default values
+        return PokemonSet.unknown(pokemon_names.get(pokemon_number, f"ポケモン{pokemon_number}"),
+                                  pokemon_id)
+
+    def _scrape_trainers(self, trainers, trainer_data, articles, remaining_uses, prefetch,
+                         lookahead, sinks, output_file, progress, infer_from):
+        """Build each trainer's team from its prefetched article, in listing order
         
+        Args:
+            infer_from (tuple): (season, rule) whose usage data fills unknown
+                fields, or None to leave them unknown
+        """
+        total = len(trainers)
         for i, trainer in enumerate(trainers, 1):
-            print(f"Processing trainer {i}/{total}: {trainer['trainer_name']} (Rank {trainer['rank']})")
+            self.log(f"Processing trainer {i}/{total}: {trainer['trainer_name']} (Rank {trainer['rank']})")
+            if progress:
+                progress(i - 1, total)
+            prefetch(i - 1 + lookahead)
+            
+            article_url = trainer['article_url']
+            html, error = articles[article_url].result()
+            remaining_uses[article_url] -= 1
+            if not remaining_uses[article_url]:
+                del articles[article_url]
+            if error:
+                self.log(f"  Error fetching article {article_url}: {error}")
             
             pokemon_list = []
             for pokemon_id in trainer['pokemon_ids']:
-                print(f"  Fetching details for Pokemon ID: {pokemon_id}")
-                # Try to get Pokemon details from the article
-                pokemon_data = self.get_pokemon_details_from_article(trainer['article_url'], pokemon_id)
+                self.log(f"  Fetching details for Pokemon ID: {pokemon_id}")
+                pokemon_data = None
+                if html is not None:
+                    pokemon_data = self.get_pokemon_details_from_article(article_url, pokemon_id, html)
+                elif infer_from:
+                    pokemon_number = pokemon_id.split('-')[0]
+                    pokemon_data = PokemonSet.unknown(
+                        POKEMON_NAMES.get(pokemon_number, f"ポケモン{pokemon_number}"), pokemon_id)
+                if pokemon_data and infer_from:
+                    pokemon_data = self.species_usage.fill(pokemon_data, *infer_from)
+                    if pokemon_data.inferred:
+                        self.log(f"  Filled {', '.join(pokemon_data.inferred)} from season usage data")
                 
                 if pokemon_data:
                     pokemon_list.append(pokemon_data)
-                    print(f"  Added {pokemon_data['name']}")
+                    self.log(f"  Added {pokemon_data.name}")
                 else:
-                    print(f"  Failed to get data for Pokemon ID: {pokemon_id}")
-                
-                time.sleep(random.uniform(0.5, 1))  # Be nice to the server
+                    self.log(f"  Failed to get data for Pokemon ID: {pokemon_id}")
             
-            trainer_data.append({
-                'rank': trainer['rank'],
-                'rating': trainer['rating'],
-                'trainer_name': trainer['trainer_name'],
-                'article_url': trainer.get('article_url', ''),
-                'pokemon': pokemon_list
-            })
+            finished = Trainer(
+                trainer['rank'],
+                trainer['rating'],
+                trainer['trainer_name'],
+                trainer.get('article_url', ''),
+                pokemon_list
+            )
+            trainer_data.append(finished)
+            with self.metrics.timer('sink_write'):
+                for sink in sinks:
+                    sink.add_trainer(finished)
             
             # Save progress periodically
             if i % 5 == 0 or i == total:
-                print(f"Saving progress after processing {i}/{total} trainers...")
-                with open('trainer_data.json', 'w', encoding='utf-8') as f:
-                    json.dump(trainer_data, f, ensure_ascii=False, indent=2)
+                self.log(f"Saving progress after processing {i}/{total} trainers...")
+                with self.metrics.timer('checkpoint_write'):
+                    dump_trainers(trainer_data, output_file)
+
+    def scrape_article_trainers(self, season=27, rule=0, party=1, max_trainers=None,
+                                output_file='trainer_data.json', exporter=None, store=None,
+                                sinks=None, progress=None, infer_unknown=False):
+        """Scrape trainer and Pokemon data for trainers with construction articles
         
-        # Save final results
-        with open('trainer_data.json', 'w', encoding='utf-8') as f:
-            json.dump(trainer_data, f, ensure_ascii=False, indent=2)
+        Args:
+            output_file (str): JSON file the results are checkpointed to
+            exporter (TrainerExporter, optional): Receives each finished trainer
+                for incremental columnar export
+            store (TrainerStore, optional): SQLite store finished trainers are
+                upserted into in batches
+            sinks (list, optional): Further objects with add_trainer()/close(),
+                e.g. a pokemon_stats.UsageStats updated as trainers stream in.
+                Every sink is finished even if the scrape fails: close() after
+                a complete run, abort() (when the sink has one) otherwise
+            progress (callable, optional): Called as progress(done, total)
+            infer_unknown (bool): Fill fields the article lacks with the most
+                used values from the species' season usage page, marked as
+                inferred (one request per species per season and rule)
         
-        print(f"Completed scraping {len(trainer_data)} trainers with construction articles")
+        Returns:
+            list: Trainer records
+        """
+        # Sinks that receive each finished trainer as soon as it is scraped
+        sinks = list(sinks or [])
+        if exporter:
+            sinks.append(exporter)
+        if store:
+            sinks.append(store.writer(season, rule, party))
+        
+        complete = False
+        try:
+            trainer_data = self._scrape_to_sinks(season, rule, party, max_trainers, sinks, output_file,
+                                                 progress, infer_unknown)
+            complete = True
+        finally:
+            self._finish_sinks(sinks, complete)
+        if progress:
+            progress(len(trainer_data), len(trainer_data))
+        
+        self.log(f"Completed scraping {len(trainer_data)} trainers with construction articles")
+        
+        # Machine-readable run report next to the output file
+        self.metrics.set_gauge('trainers_scraped', len(trainer_data), season=season, rule=rule, party=party)
+        json_report, _ = self.metrics.write_report(os.path.splitext(output_file)[0] + '_run_report')
+        self.log(f"Run report written to {json_report}: {self.metrics.summary()}")
+        return trainer_data
+
+    def _finish_sinks(self, sinks, complete):
+        """close() every sink after a complete run, abort() (or close()) them after a failure
+        
+        Every sink is finished even if another one fails to (files get their
+        footers, pending batches are written, writer threads stop). After a
+        failed scrape errors are only logged, so the scrape's own exception is
+        the one raised; after a complete run the first error is raised.
+        """
+        errors = []
+        with self.metrics.timer('sink_write'):
+            for sink in sinks:
+                try:
+                    if complete:
+                        sink.close()
+                    else:
+                        getattr(sink, 'abort', sink.close)()
+                except Exception as e:
+                    self.log(f"Error finishing {type(sink).__name__}: {str(e)}")
+                    errors.append(e)
+        if complete and errors:
+            raise errors[0]
+
+    def _scrape_to_sinks(self, season, rule, party, max_trainers, sinks, output_file, progress, infer_unknown):
+        """Fetch the ranking and scrape every trainer into the sinks and the output file"""
+        self.log(f"Fetching trainers with construction articles for Season {season}...")
+        trainers = self.get_trainers_with_articles(season, rule, party)
+        
+        if max_trainers and len(trainers) > max_trainers:
+            trainers = trainers[:max_trainers]
+            self.log(f"Limited to {max_trainers} trainers")
+        
+        trainer_data = []
+        total = len(trainers)
+        
+        # Articles are fetched once per run (several listing entries can share one)
+        # and prefetched a few trainers ahead; the throttle decides how many
+        # requests per host actually run at the same time.
+        remaining_uses = Counter(trainer['article_url'] for trainer in trainers)
+        articles = {}
+        lookahead = self.throttle.max_concurrency * 2
+        pool = ThreadPoolExecutor(max_workers=self.throttle.max_concurrency)
+        
+        def prefetch(index):
+            if index < total:
+                article_url = trainers[index]['article_url']
+                if article_url not in articles:
+                    articles[article_url] = pool.submit(self.fetch_article, article_url)
+        
+        try:
+            for index in range(lookahead):
+                prefetch(index)
+            self._scrape_trainers(trainers, trainer_data, articles, remaining_uses, prefetch,
+                                  lookahead, sinks, output_file, progress,
+                                  (season, rule) if infer_unknown else None)
+        finally:
+            for future in articles.values():
+                future.cancel()
+            pool.shutdown(wait=True)
+        
+        # Save final results
+        with self.metrics.timer('checkpoint_write'):
+            dump_trainers(trainer_data, output_file)
         return trainer_data
 
 if __name__ == "__main__":
-    scraper = PokemonSVScraper()
-    # Scrape trainers with construction articles from Season 27
-    scraper.scrape_article_trainers(season=27, rule=0, party=1)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape trainers with construction articles")
+    parser.add_argument('--season', type=int, default=27)
+    parser.add_argument('--rule', type=int, default=0)
+    parser.add_argument('--party', type=int, default=1)
+    parser.add_argument('--max-trainers', type=int, default=None)
+    parser.add_argument('--output', default='trainer_data.json')
+    parser.add_argument('--infer-unknown', action='store_true',
+                        help='Fill fields missing from articles with season usage data')
+    parser.add_argument('--parse-cache', default='parse_cache.db',
+                        help='Cache of parsed article results reused across runs ("" to disable)')
+    parser.add_argument('--archive', metavar='DIR',
+                        help='Keep every fetched page in a compressed page archive in DIR')
+    parser.add_argument('--top-usage', type=int, default=10,
+                        help='Print the N most used Pokemon of the scraped teams (0 to disable)')
+    parser.add_argument('--profile', metavar='DIR',
+                        help='Profile every stage (cProfile + tracemalloc) and write reports to DIR; '
+                             'compare two runs with: python stage_profiler.py DIR_A DIR_B')
+    args = parser.parse_args()
+
+    parse_cache = ParseCache(args.parse_cache, PARSER_VERSION) if args.parse_cache else None
+    scraper = PokemonSVScraper(parse_cache=parse_cache)
+    if args.archive:
+        from page_archive import PageArchive
+        scraper.archive = PageArchive(args.archive)
+    if args.profile:
+        from stage_profiler import StageProfiler
+        scraper.metrics.profiler = StageProfiler(args.profile)
+    sinks = []
+    if args.top_usage:
+        from pokemon_stats import UsageStats
+        usage_stats = UsageStats()
+        sinks.append(usage_stats)
+    try:
+        scraper.scrape_article_trainers(season=args.season, rule=args.rule, party=args.party,
+                                        max_trainers=args.max_trainers, output_file=args.output,
+                                        sinks=sinks, infer_unknown=args.infer_unknown)
+        if args.top_usage:
+            print(f"Usage over {usage_stats.teams} teams:")
+            for row in usage_stats.to_rows(args.top_usage)[1:]:
+                print(f"{row[0]:>3}. {row[1]} {row[3]} | {row[4]} | {row[9]}")
+    finally:
+        if parse_cache:
+            parse_cache.close()
+        if scraper.archive:
+            scraper.archive.close()
+        if args.profile:
+            print(f"Profile written to {scraper.metrics.profiler.write_reports()}")
@@ -0,0 +1,238 @@
+import argparse
+
+import numpy as np
+
+from pokedex import DEX_BY_NAME, POKEMON_NAMES, dex_number
+from trainer_records import UNKNOWN, load_trainers
+
+# Per-Pokemon categorical fields whose distributions are tracked
+DISTRIBUTION_FIELDS = ('item', 'ability', 'nature', 'tera_type', 'move')
+
+# Pokemon without a resolvable Pokedex number get slots from here on
+SYNTHETIC_BASE = 1100
+
+
+class UsageStats:
+    """
+    Usage and teammate co-occurrence statistics over scraped teams
+
+    Counts live in NumPy arrays indexed by Pokedex number, so adding a batch of
+    teams is a handful of vectorized scatter-adds and merging seasons is plain
+    array addition. Implements add_trainer()/close(), so it can be passed to the
+    scraper as a sink and updated while trainers stream in.
+    """
+
+    def __init__(self, capacity=1100):
+        self.teams = 0
+        self.usage = np.zeros(capacity, dtype=np.int64)
+        self.cooccurrence = np.zeros((capacity, capacity), dtype=np.int32)
+        # field -> value -> column, and field -> (pokemon x value) count matrix
+        self.vocab = {field: {} for field in DISTRIBUTION_FIELDS}
+        self.counts = {field: np.zeros((capacity, 16), dtype=np.int32) for field in DISTRIBUTION_FIELDS}
+        self.names = {}
+        self._synthetic = {}
+
+    @property
+    def capacity(self):
+        return self.usage.shape[0]
+
+    def _grow(self, rows=0, field=None, columns=0):
+        """Grow the count arrays to hold at least `rows` Pokemon / `columns` values"""
+        if rows > self.capacity:
+            # Grow in small steps: the co-occurrence matrix is quadratic in capacity
+            extra = max(rows - self.capacity, 64)
+            self.usage = np.pad(self.usage, (0, extra))
+            self.cooccurrence = np.pad(self.cooccurrence, ((0, extra), (0, extra)))
+            for name, matrix in self.counts.items():
+                self.counts[name] = np.pad(matrix, ((0, extra), (0, 0)))
+        if field is not None and columns > self.counts[field].shape[1]:
+            matrix = self.counts[field]
+            extra = max(columns, matrix.shape[1] * 2) - matrix.shape[1]
+            self.counts[field] = np.pad(matrix, ((0, 0), (0, extra)))
+
+    def _index_of(self, pokemon):
+        """Resolve a Pokemon record to its row in the count arrays"""
+        name = pokemon.name
+        if pokemon.pokemon_id:
+            index = dex_number(pokemon.pokemon_id)
+        elif name in DEX_BY_NAME:
+            index = DEX_BY_NAME[name]
+        else:
+            index = self._synthetic.setdefault(name, SYNTHETIC_BASE + len(self._synthetic))
+        if name:
+            self.names.setdefault(index, name)
+        return index
+
+    def _column_of(self, field, value):
+        vocab = self.vocab[field]
+        column = vocab.get(value)
+        if column is None:
+            column = vocab[value] = len(vocab)
+        return column
+
+    def add_trainers(self, trainers):
+        """Add a batch of Trainer records with one scatter-add per count array"""
+        team_rows, team_cols = [], []
+        member_indices = []
+        field_rows = {field: [] for field in DISTRIBUTION_FIELDS}
+        field_cols = {field: [] for field in DISTRIBUTION_FIELDS}
+        added = 0
+
+        for trainer in trainers:
+            indices = []
+            for pokemon in trainer.pokemon:
+                index = self._index_of(pokemon)
+                if index in indices:
+                    continue
+                indices.append(index)
+
+                for field in DISTRIBUTION_FIELDS:
+                    values = pokemon.moves if field == 'move' else (getattr(pokemon, field),)
+                    for value in values:
+                        if value and value != UNKNOWN:
+                            field_rows[field].append(index)
+                            field_cols[field].append(self._column_of(field, value))
+
+            if not indices:
+                continue
+            added += 1
+            member_indices.extend(indices)
+            # Every ordered pair of teammates, including (p, p) so the diagonal equals usage
+            team_rows.extend(i for i in indices for _ in indices)
+            team_cols.extend(indices * len(indices))
+
+        if not added:
+            return
+
+        rows_needed = max(member_indices) + 1
+        self._grow(rows=rows_needed)
+        for field in DISTRIBUTION_FIELDS:
+            self._grow(field=field, columns=len(self.vocab[field]))
+
+        self.teams += added
+        np.add.at(self.usage, np.asarray(member_indices), 1)
+        np.add.at(self.cooccurrence, (np.asarray(team_rows), np.asarray(team_cols)), 1)
+        for field in DISTRIBUTION_FIELDS:
+            if field_rows[field]:
+                np.add.at(self.counts[field],
+                          (np.asarray(field_rows[field]), np.asarray(field_cols[field])), 1)
+
+    def add_trainer(self, trainer):
+        self.add_trainers([trainer])
+
+    def close(self):
+        pass
+
+    def merge(self, other):
+        """Add another UsageStats (e.g. a different season) into this one"""
+        # Map the other's rows onto ours; only synthetic slots can differ
+        rows = np.arange(other.capacity)
+        for name, index in other._synthetic.items():
+            rows[index] = self._synthetic.setdefault(name, SYNTHETIC_BASE + len(self._synthetic))
+        for index, name in other.names.items():
+            self.names.setdefault(int(rows[index]), name)
+        self._grow(rows=int(rows.max()) + 1)
+
+        self.teams += other.teams
+        np.add.at(self.usage, rows, other.usage)
+        np.add.at(self.cooccurrence, (rows[:, None], rows[None, :]), other.cooccurrence)
+
+        for field in DISTRIBUTION_FIELDS:
+            # Remap the other vocabulary's columns onto ours
+            columns = np.array([self._column_of(field, value) for value in other.vocab[field]],
+                               dtype=np.int64)
+            if not len(columns):
+                continue
+            self._grow(field=field, columns=len(self.vocab[field]))
+            np.add.at(self.counts[field], (rows[:, None], columns[None, :]),
+                      other.counts[field][:, :len(columns)])
+        return self
+
+    def name_of(self, index):
+        return self.names.get(index) or POKEMON_NAMES.get(f"{index:04d}", f"ポケモン{index:04d}")
+
+    def usage_rates(self):
+        """Fraction of teams using each Pokemon, indexed by Pokedex number"""
+        if not self.teams:
+            return np.zeros(self.capacity)
+        return self.usage / self.teams
+
+    def top_pokemon(self, k=50):
+        """Pokedex numbers of the k most used Pokemon"""
+        used = np.flatnonzero(self.usage)
+        order = np.argsort(-self.usage[used], kind='stable')
+        return used[order[:k]].tolist()
+
+    def top_teammates(self, index, k=5):
+        """
+        Most frequent teammates of a Pokemon
+
+        Returns:
+            list: (pokemon index, co-occurrence count, share of its teams)
+        """
+        row = self.cooccurrence[index].copy()
+        row[index] = 0
+        candidates = np.flatnonzero(row)
+        order = candidates[np.argsort(-row[candidates], kind='stable')][:k]
+        total = max(int(self.usage[index]), 1)
+        return [(int(i), int(row[i]), row[i] / total) for i in order]
+
+    def distribution(self, index, field, k=5):
+        """
+        Most common values of a field (item, ability, nature, tera_type, move) for a Pokemon
+
+        Returns:
+            list: (value, count, share of its teams)
+        """
+        row = self.counts[field][index]
+        candidates = np.flatnonzero(row)
+        order = candidates[np.argsort(-row[candidates], kind='stable')][:k]
+        values = list(self.vocab[field])
+        total = max(int(self.usage[index]), 1)
+        return [(values[i], int(row[i]), row[i] / total) for i in order]
+
+    def to_rows(self, top=50):
+        """Build a header + rows table of the top Pokemon for a spreadsheet tab"""
+        def fmt(entries):
+            return ", ".join(f"{value} {share:.0%}" for value, _, share in entries)
+
+        rows = [["rank", "pokemon", "teams", "usage_rate", "items", "abilities",
+                 "natures", "tera_types", "moves", "teammates"]]
+        rates = self.usage_rates()
+        for rank, index in enumerate(self.top_pokemon(top), 1):
+            teammates = [(self.name_of(i), count, share)
+                         for i, count, share in self.top_teammates(index)]
+            rows.append([
+                rank,
+                self.name_of(index),
+                int(self.usage[index]),
+                f"{rates[index]:.1%}",
+                fmt(self.distribution(index, 'item')),
+                fmt(self.distribution(index, 'ability')),
+                fmt(self.distribution(index, 'nature')),
+                fmt(self.distribution(index, 'tera_type')),
+                fmt(self.distribution(index, 'move', k=6)),
+                fmt(teammates),
+            ])
+        return rows
+
+
+def stats_from_trainers(trainers):
+    stats = UsageStats()
+    stats.add_trainers(trainers)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print Pokemon usage statistics")
+    parser.add_argument('json_files', nargs='+', help='One trainer_data.json per season')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    stats = UsageStats()
+    for path in args.json_files:
+        stats.merge(stats_from_trainers(load_trainers(path)))
+
+    print(f"{stats.teams} teams")
+    for row in stats.to_rows(args.top)[1:]:
+        print(f"{row[0]:>3}. {row[1]} {row[3]} | {row[4]} | {row[9]}")
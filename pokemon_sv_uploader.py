@@ -1,10 +1,15 @@
+import time
+STARTUP_T0 = time.perf_counter()  # script import time (before any other import) for the start-up report
+
 import os
 import sys
-import json
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from sheets_uploader import upload_to_sheets, get_resource_path
-from pokemon_scraper import PokemonSVScraper
+from resources import get_resource_path
+
+# The scraper (requests, bs4), uploader (Google API client) and analysis
+# (numpy, pyarrow) stacks are imported inside the handlers that need them, so
+# the window appears before any of them are loaded.
 
 class PokemonSVUploaderApp:
     def __init__(self, root):
@@ -44,6 +49,10 @@ class PokemonSVUploaderApp:
         self.status_var.set("Ready")
         status_bar = ttk.Label(root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        # Hidden profiling mode (Ctrl+Shift+P): runs are profiled per stage into profiles/
+        self.profile_dir = None
+        self.root.bind("<Control-Shift-P>", self.toggle_profiling)
     
     def _setup_scraper_tab(self):
         # Create frame with padding
@@ -86,15 +95,48 @@ class PokemonSVUploaderApp:
         output_entry = ttk.Entry(frame, textvariable=self.output_file_var, width=30)
         output_entry.grid(row=5, column=1, sticky=tk.W, pady=5)
         
+        # Columnar export directory (optional)
+        ttk.Label(frame, text="Export Dir:").grid(row=6, column=0, sticky=tk.W, pady=5)
+        self.export_dir_var = tk.StringVar(value="")
+        export_entry = ttk.Entry(frame, textvariable=self.export_dir_var, width=30)
+        export_entry.grid(row=6, column=1, sticky=tk.W, pady=5)
+        
+        # SQLite store (optional)
+        ttk.Label(frame, text="SQLite DB:").grid(row=7, column=0, sticky=tk.W, pady=5)
+        self.store_path_var = tk.StringVar(value="")
+        store_entry = ttk.Entry(frame, textvariable=self.store_path_var, width=30)
+        store_entry.grid(row=7, column=1, sticky=tk.W, pady=5)
+        
+        # Scrape options
+        options_frame = ttk.Frame(frame)
+        options_frame.grid(row=8, column=1, sticky=tk.W, pady=5)
+        # Fill fields missing from articles with season usage data
+        self.infer_unknown_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Fill unknown fields from season usage data",
+                        variable=self.infer_unknown_var).pack(anchor=tk.W)
+        # Append finished trainers to the sheet while scraping (Uploader tab settings)
+        self.live_sync_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Live sync to Google Sheets (uses Uploader tab settings)",
+                        variable=self.live_sync_var).pack(anchor=tk.W)
+        
         # Progress
-        ttk.Label(frame, text="Progress:").grid(row=6, column=0, sticky=tk.W, pady=5)
+        ttk.Label(frame, text="Progress:").grid(row=9, column=0, sticky=tk.W, pady=5)
         self.progress_var = tk.DoubleVar()
         self.progress_bar = ttk.Progressbar(frame, variable=self.progress_var, maximum=100)
-        self.progress_bar.grid(row=6, column=1, sticky=(tk.W, tk.E), pady=5)
+        self.progress_bar.grid(row=9, column=1, sticky=(tk.W, tk.E), pady=5)
+        
+        # Live run metrics (time per stage, requests, bytes, cache hit rates)
+        ttk.Label(frame, text="Metrics:").grid(row=10, column=0, sticky=tk.W, pady=5)
+        self.metrics_var = tk.StringVar(value="")
+        metrics_label = ttk.Label(frame, textvariable=self.metrics_var, wraplength=450)
+        metrics_label.grid(row=10, column=1, sticky=tk.W, pady=5)
+        self.metrics = None
+        # (output file, its mtime, UsageStats) of the last completed scrape
+        self.scraped_stats = None
         
         # Log frame
         log_frame = ttk.LabelFrame(frame, text="Log")
-        log_frame.grid(row=7, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+        log_frame.grid(row=11, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
         
         # Log text
         self.log_text = tk.Text(log_frame, height=10, width=60, wrap=tk.WORD)
@@ -107,7 +149,7 @@ class PokemonSVUploaderApp:
         
         # Buttons frame
         button_frame = ttk.Frame(frame)
-        button_frame.grid(row=8, column=0, columnspan=2, pady=10)
+        button_frame.grid(row=12, column=0, columnspan=2, pady=10)
         
         # Start button
         self.start_button = ttk.Button(button_frame, text="Start Scraping", command=self.start_scraping)
@@ -115,7 +157,7 @@ class PokemonSVUploaderApp:
         
         # Configure grid weights
         frame.columnconfigure(1, weight=1)
-        frame.rowconfigure(7, weight=1)
+        frame.rowconfigure(11, weight=1)
     
     def _setup_uploader_tab(self):
         # Create frame with padding
@@ -128,7 +170,7 @@ class PokemonSVUploaderApp:
         
         # JSON file selection
         ttk.Label(frame, text="JSON Data File:").grid(row=1, column=0, sticky=tk.W, pady=5)
-        self.json_file_var = tk.StringVar(value="trainer_data.json")
+        self.json_file_var = tk.StringVar(value="trainer_data.json")  # JSON file or SQLite store
         json_entry = ttk.Entry(frame, textvariable=self.json_file_var, width=40)
         json_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=5)
         browse_json_btn = ttk.Button(frame, text="Browse", command=self.browse_json)
@@ -154,46 +196,104 @@ class PokemonSVUploaderApp:
         id_entry = ttk.Entry(frame, textvariable=self.spreadsheet_id_var, width=40)
         id_entry.grid(row=4, column=1, sticky=(tk.W, tk.E), pady=5)
         
+        # Usage statistics tab (optional)
+        ttk.Label(frame, text="Stats Tab:").grid(row=5, column=0, sticky=tk.W, pady=5)
+        self.stats_sheet_var = tk.StringVar(value="")
+        stats_entry = ttk.Entry(frame, textvariable=self.stats_sheet_var, width=40)
+        stats_entry.grid(row=5, column=1, sticky=(tk.W, tk.E), pady=5)
+        
         # Data preview frame
         preview_frame = ttk.LabelFrame(frame, text="Data Preview")
-        preview_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
-        
-        # Data preview text
-        self.preview_text = tk.Text(preview_frame, height=10, width=60, wrap=tk.WORD)
-        self.preview_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        preview_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+        
+        # Filters (available once the background load has finished)
+        filter_frame = ttk.Frame(preview_frame)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+        ttk.Label(filter_frame, text="Pokemon:").pack(side=tk.LEFT)
+        self.filter_pokemon_var = tk.StringVar(value="")
+        pokemon_filter = ttk.Entry(filter_frame, textvariable=self.filter_pokemon_var, width=12)
+        pokemon_filter.pack(side=tk.LEFT, padx=(2, 8))
+        ttk.Label(filter_frame, text="Item:").pack(side=tk.LEFT)
+        self.filter_item_var = tk.StringVar(value="")
+        item_filter = ttk.Entry(filter_frame, textvariable=self.filter_item_var, width=12)
+        item_filter.pack(side=tk.LEFT, padx=(2, 8))
+        ttk.Button(filter_frame, text="Filter", command=self.apply_preview_filter).pack(side=tk.LEFT)
+        pokemon_filter.bind("<Return>", self.apply_preview_filter)
+        item_filter.bind("<Return>", self.apply_preview_filter)
+        
+        # Data preview table; only the current page of rows is ever materialized
+        columns = ("rank", "rating", "trainer_name", "pokemon", "items")
+        self.preview_tree = ttk.Treeview(preview_frame, columns=columns, show="headings", height=8)
+        for column, heading, width in zip(columns, ("Rank", "Rating", "Trainer", "Pokemon", "Items"),
+                                          (50, 60, 120, 220, 220)):
+            self.preview_tree.heading(column, text=heading, command=lambda c=column: self.sort_preview(c))
+            self.preview_tree.column(column, width=width, stretch=column in ("pokemon", "items"))
+        self.preview_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Scrollbar for preview
-        scrollbar = ttk.Scrollbar(preview_frame, command=self.preview_text.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.preview_text.config(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(preview_frame, command=self.preview_tree.yview)
+        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        self.preview_tree.config(yscrollcommand=scrollbar.set)
+        
+        # Pager
+        pager_frame = ttk.Frame(preview_frame)
+        pager_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Button(pager_frame, text="< Prev", command=lambda: self.show_preview_page(self.preview_page - 1)).pack(side=tk.LEFT)
+        ttk.Button(pager_frame, text="Next >", command=lambda: self.show_preview_page(self.preview_page + 1)).pack(side=tk.LEFT, padx=5)
+        self.preview_info_var = tk.StringVar(value="")
+        ttk.Label(pager_frame, textvariable=self.preview_info_var).pack(side=tk.LEFT, padx=5)
+        preview_frame.columnconfigure(0, weight=1)
+        preview_frame.rowconfigure(1, weight=1)
+        
+        self.preview_index = None
+        self.preview_summary = None
+        self.preview_rows = []
+        self.preview_page = 0
+        self.preview_sort = (None, False)
+        self.preview_note = ""
+        self._preview_load_id = 0
         
         # Buttons frame
         button_frame = ttk.Frame(frame)
-        button_frame.grid(row=6, column=0, columnspan=3, pady=10)
+        button_frame.grid(row=7, column=0, columnspan=3, pady=10)
         
         # Preview button
         preview_button = ttk.Button(button_frame, text="Preview Data", command=self.preview_data)
         preview_button.pack(side=tk.LEFT, padx=5)
         
         # Upload button
-        upload_button = ttk.Button(button_frame, text="Upload to Sheets", command=self.upload_data)
-        upload_button.pack(side=tk.LEFT, padx=5)
+        self.upload_button = ttk.Button(button_frame, text="Upload to Sheets", command=self.upload_data)
+        self.upload_button.pack(side=tk.LEFT, padx=5)
+        
+        # Cancel button (enabled while an upload is running)
+        self.cancel_upload_button = ttk.Button(button_frame, text="Cancel Upload", command=self.cancel_upload,
+                                               state=tk.DISABLED)
+        self.cancel_upload_button.pack(side=tk.LEFT, padx=5)
+        
+        # Upload progress
+        self.upload_progress_var = tk.DoubleVar(value=0)
+        upload_progress = ttk.Progressbar(frame, variable=self.upload_progress_var, maximum=100)
+        upload_progress.grid(row=8, column=0, columnspan=3, sticky=(tk.W, tk.E))
+        self.upload_cancel = None
         
         # Configure grid weights
         frame.columnconfigure(1, weight=1)
-        frame.rowconfigure(5, weight=1)
+        frame.rowconfigure(6, weight=1)
     
     def log(self, message):
         """Add message to log text widget"""
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)
+        if self.metrics:
+            self.metrics_var.set(self.metrics.summary())
         self.root.update_idletasks()
     
     def browse_json(self):
         """Browse for JSON data file"""
         filename = filedialog.askopenfilename(
             title="Select JSON Data File",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON files", "*.json"), ("SQLite stores", "*.db *.sqlite *.sqlite3"),
+                       ("All files", "*.*")]
         )
         if filename:
             self.json_file_var.set(filename)
@@ -207,56 +307,152 @@ class PokemonSVUploaderApp:
         if filename:
             self.credentials_file_var.set(filename)
     
+    PREVIEW_PAGE_SIZE = 100
+    
     def preview_data(self):
-        """Preview the JSON data"""
+        """Index the data file in the background and show it page by page"""
         json_file = self.json_file_var.get()
         
         if not os.path.exists(json_file):
             messagebox.showerror("Error", f"File not found: {json_file}")
             return
         
+        import queue
+        import threading
+        
+        self._close_preview()
+        messages = queue.Queue()
+        loader = threading.Thread(target=self._load_preview, daemon=True,
+                                  args=(json_file, self._preview_load_id, messages))
+        self.preview_info_var.set("Loading...")
+        loader.start()
+        self.root.after(100, self._poll_preview, loader, messages)
+    
+    def _load_preview(self, json_file, load_id, messages):
+        """Background thread: build the index, then the sort/filter summary (never touches Tk)"""
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            from preview_index import open_index
+            from trainer_store import TrainerStore, is_store_path
             
-            self.preview_text.delete(1.0, tk.END)
-            
-            if not data:
-                self.preview_text.insert(tk.END, "No data found in the file.")
+            note = ""
+            if is_store_path(json_file):
+                with TrainerStore(json_file) as store:
+                    keys = store.season_keys()
+                if keys:
+                    note = "Season {}, Rule {}, Party {} (latest in store)".format(*keys[0])
+            index = open_index(json_file)
+            if load_id != self._preview_load_id:
+                index.close()
                 return
-            
-            self.preview_text.insert(tk.END, f"Found {len(data)} trainers\n\n")
-            
-            # Show first 2 trainers as preview
-            for i, trainer in enumerate(data[:2]):
-                self.preview_text.insert(tk.END, f"Trainer {i+1}: {trainer.get('trainer_name', 'Unknown')}\n")
-                self.preview_text.insert(tk.END, f"Rank: {trainer.get('rank', 'Unknown')}\n")
-                self.preview_text.insert(tk.END, f"Rating: {trainer.get('rating', 'Unknown')}\n")
-                
-                pokemon_list = trainer.get('pokemon', [])
-                self.preview_text.insert(tk.END, f"Pokemon: {len(pokemon_list)}\n")
-                
-                for j, pokemon in enumerate(pokemon_list[:2]):  # Show first 2 Pokemon
-                    self.preview_text.insert(tk.END, f"  {j+1}. {pokemon.get('name', 'Unknown')}\n")
-                
-                if len(pokemon_list) > 2:
-                    self.preview_text.insert(tk.END, f"  ... and {len(pokemon_list) - 2} more\n")
-                
-                self.preview_text.insert(tk.END, "\n")
-            
-            if len(data) > 2:
-                self.preview_text.insert(tk.END, f"... and {len(data) - 2} more trainers")
-            
+            messages.put((load_id, 'index', (index, note)))
+            summary = index.summary(progress=lambda done, total: messages.put((load_id, 'progress', (done, total))))
+            messages.put((load_id, 'summary', summary))
         except Exception as e:
-            self.preview_text.delete(1.0, tk.END)
-            self.preview_text.insert(tk.END, f"Error loading data: {str(e)}")
+            messages.put((load_id, 'error', str(e)))
+    
+    def _poll_preview(self, loader, messages):
+        """Apply messages from the preview loader on the Tk thread"""
+        import queue
+        
+        while True:
+            try:
+                load_id, kind, payload = messages.get_nowait()
+            except queue.Empty:
+                break
+            if load_id != self._preview_load_id:
+                # A newer preview replaced this one
+                if kind == 'index':
+                    payload[0].close()
+                continue
+            if kind == 'index':
+                self.preview_index, self.preview_note = payload
+                self.preview_rows = range(len(self.preview_index))
+                self.show_preview_page(0)
+            elif kind == 'progress':
+                done, total = payload
+                self._set_preview_info(f"indexing {done * 100 // max(total, 1)}%")
+            elif kind == 'summary':
+                self.preview_summary = payload
+                self._set_preview_info()
+            elif kind == 'error':
+                self.preview_tree.delete(*self.preview_tree.get_children())
+                self.preview_info_var.set(f"Error loading data: {payload}")
+        # Keep polling until the loader has finished and everything it sent is handled
+        if loader.is_alive() or not messages.empty():
+            self.root.after(100, self._poll_preview, loader, messages)
+    
+    def _close_preview(self):
+        """Release the preview's memory map (so the file can be rewritten)"""
+        self._preview_load_id += 1
+        if self.preview_index:
+            self.preview_index.close()
+        self.preview_index = None
+        self.preview_summary = None
+        self.preview_rows = []
+        self.preview_tree.delete(*self.preview_tree.get_children())
+        self.preview_info_var.set("")
+    
+    def _set_preview_info(self, extra=""):
+        if self.preview_index is None:
+            return
+        total = len(self.preview_rows)
+        first = self.preview_page * self.PREVIEW_PAGE_SIZE
+        parts = [f"{first + 1 if total else 0}-{min(first + self.PREVIEW_PAGE_SIZE, total)} of {total} trainers"]
+        if total != len(self.preview_index):
+            parts.append(f"filtered from {len(self.preview_index)}")
+        parts.extend(part for part in (self.preview_note, extra) if part)
+        self.preview_info_var.set(" | ".join(parts))
+    
+    def show_preview_page(self, page):
+        """Decode and show one page of the current (filtered, sorted) rows"""
+        if self.preview_index is None:
+            return
+        last_page = max(0, (len(self.preview_rows) - 1) // self.PREVIEW_PAGE_SIZE)
+        self.preview_page = min(max(page, 0), last_page)
+        first = self.preview_page * self.PREVIEW_PAGE_SIZE
+        
+        self.preview_tree.delete(*self.preview_tree.get_children())
+        for row in self.preview_rows[first:first + self.PREVIEW_PAGE_SIZE]:
+            try:
+                trainer = self.preview_index.get(row)
+                values = (trainer.rank, trainer.rating, trainer.trainer_name,
+                          " / ".join(pokemon.name for pokemon in trainer.pokemon),
+                          " / ".join(pokemon.item for pokemon in trainer.pokemon))
+            except Exception as e:
+                values = ("", "", f"(unreadable entry {row + 1}: {e})", "", "")
+            self.preview_tree.insert("", tk.END, values=values)
+        self._set_preview_info("" if self.preview_summary else "loading sort/filter data...")
+    
+    def _refresh_preview_rows(self):
+        column, descending = self.preview_sort
+        self.preview_rows = self.preview_summary.select(
+            pokemon=self.filter_pokemon_var.get().strip(),
+            item=self.filter_item_var.get().strip(),
+            sort_column=column,
+            descending=descending
+        )
+        self.show_preview_page(0)
+    
+    def sort_preview(self, column):
+        """Sort the preview by a column; clicking the same heading again reverses the order"""
+        if self.preview_summary is None:
+            return
+        current, descending = self.preview_sort
+        self.preview_sort = (column, not descending if column == current else False)
+        self._refresh_preview_rows()
+    
+    def apply_preview_filter(self, event=None):
+        if self.preview_summary is None:
+            return
+        self._refresh_preview_rows()
     
     def upload_data(self):
-        """Upload data to Google Sheets"""
+        """Upload data to Google Sheets on a background thread"""
         json_file = self.json_file_var.get()
         credentials_file = self.credentials_file_var.get()
         spreadsheet_name = self.spreadsheet_name_var.get()
         spreadsheet_id = self.spreadsheet_id_var.get()
+        stats_sheet_name = self.stats_sheet_var.get().strip() or None
         
         if not os.path.exists(json_file):
             messagebox.showerror("Error", f"JSON file not found: {json_file}")
@@ -270,30 +466,133 @@ class PokemonSVUploaderApp:
             messagebox.showerror("Error", "Spreadsheet ID is required")
             return
         
+        # Reuse the statistics streamed while scraping this file, unless it changed since
+        usage_stats = None
+        if stats_sheet_name and self.scraped_stats:
+            scraped_file, scraped_mtime, stats = self.scraped_stats
+            if (os.path.abspath(json_file) == os.path.abspath(scraped_file)
+                    and os.path.getmtime(json_file) == scraped_mtime):
+                usage_stats = stats
+        
+        import queue
+        import threading
+        
+        # The upload runs on a worker thread; it reports through the queue and
+        # _poll_upload applies its messages on the Tk thread
+        messages = queue.Queue()
+        self.upload_cancel = threading.Event()
+        worker = threading.Thread(target=self._run_upload, daemon=True,
+                                  args=(json_file, spreadsheet_name, credentials_file, spreadsheet_id,
+                                        stats_sheet_name, usage_stats, messages, self.upload_cancel))
+        self.upload_button.config(state=tk.DISABLED)
+        self.cancel_upload_button.config(state=tk.NORMAL)
+        self.upload_progress_var.set(0)
         self.status_var.set("Uploading data to Google Sheets...")
-        
+        worker.start()
+        self.root.after(100, self._poll_upload, worker, messages)
+    
+    def _run_upload(self, json_file, spreadsheet_name, credentials_file, spreadsheet_id,
+                    stats_sheet_name, usage_stats, messages, cancel):
+        """Worker thread: upload the file (never touches Tk)"""
+        metrics = None
+        profiler = None
+        result = None
         try:
-            # Disable the button during upload
-            self.root.config(cursor="wait")
-            self.root.update()
+            from sheets_uploader import upload_to_sheets
+            from run_metrics import RunMetrics
             
+            metrics = RunMetrics()
+            profiler = self._attach_profiler(metrics, "upload")
             result = upload_to_sheets(
                 json_file,
                 spreadsheet_name,
                 credentials_file,
-                spreadsheet_id
+                spreadsheet_id,
+                stats_sheet_name=stats_sheet_name,
+                metrics=metrics,
+                notify=lambda message, is_error=False: messages.put(('notify', (message, is_error))),
+                progress=lambda done, total: messages.put(('progress', (done, total))),
+                cancel=cancel,
+                usage_stats=usage_stats
             )
-            
-            self.root.config(cursor="")
-            
-            if result:
-                self.status_var.set("Upload completed successfully")
-            else:
-                self.status_var.set("Upload failed")
+            metrics.write_report(os.path.splitext(json_file)[0] + '_upload_report')
         except Exception as e:
-            messagebox.showerror("Error", f"Upload failed: {str(e)}")
-            self.status_var.set("Upload failed")
-            self.root.config(cursor="")
+            messages.put(('notify', (f"Upload failed: {str(e)}", True)))
+        messages.put(('done', (result, metrics, profiler)))
+    
+    def _poll_upload(self, worker, messages):
+        """Apply progress, result dialogs and completion from the upload worker"""
+        import queue
+        
+        while True:
+            try:
+                kind, payload = messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                done, total = payload
+                self.upload_progress_var.set(done / total * 100 if total else 100)
+                if not self.upload_cancel.is_set():
+                    self.status_var.set(f"Uploading data to Google Sheets... {done}/{total} entries")
+            elif kind == 'notify':
+                message, is_error = payload
+                if is_error:
+                    messagebox.showerror("Error", message, parent=self.root)
+                else:
+                    messagebox.showinfo("Information", message, parent=self.root)
+            elif kind == 'done':
+                result, metrics, profiler = payload
+                if result:
+                    self.status_var.set(f"Upload completed successfully ({metrics.summary()})")
+                elif self.upload_cancel.is_set():
+                    self.status_var.set("Upload cancelled")
+                else:
+                    self.status_var.set("Upload failed")
+                self.upload_button.config(state=tk.NORMAL)
+                self.cancel_upload_button.config(state=tk.DISABLED)
+                self._write_profile(profiler)
+        if worker.is_alive() or not messages.empty():
+            self.root.after(100, self._poll_upload, worker, messages)
+    
+    def cancel_upload(self):
+        """Stop the running upload before its next chunk"""
+        if self.upload_cancel:
+            self.upload_cancel.set()
+            self.cancel_upload_button.config(state=tk.DISABLED)
+            self.status_var.set("Cancelling upload...")
+    
+    def toggle_profiling(self, event=None):
+        """Toggle per-stage cProfile/tracemalloc profiling of scrape and upload runs"""
+        if self.profile_dir:
+            self.profile_dir = None
+            self.status_var.set("Profiling disabled")
+        else:
+            self.profile_dir = os.path.abspath("profiles")
+            self.status_var.set(f"Profiling enabled, reports go to {self.profile_dir}")
+    
+    def _attach_profiler(self, metrics, run_name):
+        """Profile the run recorded by metrics when profiling mode is on
+        
+        Returns:
+            StageProfiler: The run's profiler, or None when profiling is off
+        """
+        if not self.profile_dir:
+            return None
+        from stage_profiler import StageProfiler
+        metrics.profiler = StageProfiler(os.path.join(self.profile_dir, f"{run_name}_{time.strftime('%Y%m%d_%H%M%S')}"))
+        return metrics.profiler
+    
+    def _write_profile(self, profiler):
+        """Write the reports of a profiler attached to the run that just finished"""
+        if profiler is None:
+            return
+        summary_path = profiler.write_reports()
+        self.status_var.set(f"Profile written to {os.path.dirname(summary_path)}")
+    
+    def _update_progress(self, done, total):
+        """Progress callback for the scraper"""
+        self.progress_var.set(done / total * 100 if total else 100)
+        self.root.update_idletasks()
     
     def start_scraping(self):
         """Start the scraping process"""
@@ -302,84 +601,101 @@ class PokemonSVUploaderApp:
         party = self.party_var.get()
         max_trainers = self.max_trainers_var.get()
         output_file = self.output_file_var.get()
+        export_dir = self.export_dir_var.get().strip()
+        store_path = self.store_path_var.get().strip()
+        infer_unknown = self.infer_unknown_var.get()
+        live_sync = self.live_sync_var.get()
+        
+        if live_sync:
+            if not os.path.exists(self.credentials_file_var.get()):
+                messagebox.showerror("Error", f"Credentials file not found: {self.credentials_file_var.get()}")
+                return
+            if not self.spreadsheet_id_var.get():
+                messagebox.showerror("Error", "Spreadsheet ID is required for live sync")
+                return
         
         # Clear log
         self.log_text.delete(1.0, tk.END)
+        # The preview maps the output file, which the scraper is about to rewrite
+        self._close_preview()
         
         # Disable start button
         self.start_button.config(state=tk.DISABLED)
         self.progress_var.set(0)
         self.status_var.set("Scraping in progress...")
         
+        exporter = None
+        store = None
+        parse_cache = None
+        sync = None
+        profiler = None
         try:
-            # Create scraper
-            scraper = PokemonSVScraper()
+            from parse_cache import ParseCache
+            from pokemon_scraper import PARSER_VERSION, PokemonSVScraper
+            from pokemon_stats import UsageStats
+            from run_metrics import RunMetrics
+            from trainer_store import TrainerStore
+            
+            # Create scraper; parsed articles are cached next to the output file
+            self.metrics = RunMetrics()
+            profiler = self._attach_profiler(self.metrics, "scrape")
+            parse_cache = ParseCache(os.path.join(os.path.dirname(os.path.abspath(output_file)), "parse_cache.db"),
+                                     PARSER_VERSION)
+            scraper = PokemonSVScraper(log=self.log, metrics=self.metrics, parse_cache=parse_cache)
             
             # Log start
             self.log(f"Starting scraper for Season {season}, Rule {rule}, Party {party}")
             self.log(f"Max trainers: {max_trainers}")
             
-            # Get trainers with articles
-            self.log("Fetching trainers with construction articles...")
-            trainers = scraper.get_trainers_with_articles(season, rule, party)
+            if export_dir:
+                from trainer_export import TrainerExporter
+                exporter = TrainerExporter(export_dir, season, rule, party)
+                self.log(f"Exporting {exporter.fmt} tables to {export_dir}")
+            if store_path:
+                store = TrainerStore(store_path)
+                self.log(f"Writing trainers to SQLite store {store_path}")
+            if live_sync:
+                from sheets_live_sync import SheetsLiveSync
+                from sheets_uploader import build_sheets_service
+                
+                with self.metrics.timer('sheets_auth'):
+                    sheets_service = build_sheets_service(self.credentials_file_var.get())
+                # The writer thread must not touch Tk, so it logs to the console
+                sync = SheetsLiveSync(sheets_service, self.spreadsheet_id_var.get(), metrics=self.metrics).start()
+                self.log(f"Live syncing trainers to sheet {sync.sheet_name}")
+            
+            # Usage statistics are collected as trainers stream in, for the log and the stats tab
+            usage_stats = UsageStats()
+            self.scraped_stats = None
+            trainer_data = scraper.scrape_article_trainers(
+                season, rule, party,
+                max_trainers=max_trainers,
+                output_file=output_file,
+                exporter=exporter,
+                store=store,
+                sinks=[usage_stats, sync] if sync else [usage_stats],
+                progress=self._update_progress,
+                infer_unknown=infer_unknown
+            )
             
-            if not trainers:
+            if not trainer_data:
                 self.log("No trainers with articles found")
                 messagebox.showinfo("Scraping Complete", "No trainers with articles found")
-                self.start_button.config(state=tk.NORMAL)
-                self.status_var.set("Ready")
                 return
             
-            self.log(f"Found {len(trainers)} trainers with construction articles")
-            
-            # Limit to max_trainers
-            if max_trainers and len(trainers) > max_trainers:
-                trainers = trainers[:max_trainers]
-                self.log(f"Limited to {max_trainers} trainers")
-            
-            # Process trainers
-            trainer_data = []
-            total = len(trainers)
-            
-            for i, trainer in enumerate(trainers, 1):
-                self.log(f"Processing trainer {i}/{total}: {trainer['trainer_name']} (Rank {trainer['rank']})")
-                self.progress_var.set((i - 1) / total * 100)
-                
-                pokemon_list = []
-                for pokemon_id in trainer['pokemon_ids']:
-                    self.log(f"  Fetching details for Pokemon ID: {pokemon_id}")
-                    # Try to get Pokemon details from the article
-                    pokemon_data = scraper.get_pokemon_details_from_article(trainer['article_url'], pokemon_id)
-                    
-                    if pokemon_data:
-                        pokemon_list.append(pokemon_data)
-                        self.log(f"  Added {pokemon_data['name']}")
-                    else:
-                        self.log(f"  Failed to get data for Pokemon ID: {pokemon_id}")
-                
-                trainer_data.append({
-                    'rank': trainer['rank'],
-                    'rating': trainer['rating'],
-                    'trainer_name': trainer['trainer_name'],
-                    'article_url': trainer.get('article_url', ''),
-                    'pokemon': pokemon_list
-                })
-                
-                # Save progress periodically
-                if i % 5 == 0 or i == total:
-                    self.log(f"Saving progress after processing {i}/{total} trainers...")
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        json.dump(trainer_data, f, ensure_ascii=False, indent=2)
-            
-            # Save final results
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(trainer_data, f, ensure_ascii=False, indent=2)
-            
             self.progress_var.set(100)
             self.log(f"Completed scraping {len(trainer_data)} trainers with construction articles")
             self.log(f"Data saved to {output_file}")
+            self.scraped_stats = (output_file, os.path.getmtime(output_file), usage_stats)
+            for row in usage_stats.to_rows(top=5)[1:]:
+                self.log(f"  {row[0]}. {row[1]} {row[3]}")
             
-            messagebox.showinfo("Scraping Complete", f"Successfully scraped {len(trainer_data)} trainers.\nData saved to {output_file}")
+            message = f"Successfully scraped {len(trainer_data)} trainers.\nData saved to {output_file}"
+            if sync:
+                message += f"\n{sync.rows_written} rows synced to Google Sheets"
+                if sync.failed_rows:
+                    message += f" ({len(sync.failed_rows)} failed, upload the file to complete the sheet)"
+            messagebox.showinfo("Scraping Complete", message)
             
             # Update JSON file in uploader tab
             self.json_file_var.set(output_file)
@@ -391,14 +707,47 @@ class PokemonSVUploaderApp:
             self.log(f"Error during scraping: {str(e)}")
             messagebox.showerror("Error", f"Scraping failed: {str(e)}")
         finally:
+            if exporter:
+                exporter.close()
+            if store:
+                store.close()
+            if parse_cache:
+                parse_cache.close()
+            if sync:
+                # No-op once the scraper finished it; covers failures before the scrape started
+                sync.abort()
+            if self.metrics:
+                self.metrics_var.set(self.metrics.summary())
             # Re-enable start button
             self.start_button.config(state=tk.NORMAL)
             self.status_var.set("Ready")
+            # Only this run's profile: nothing if it failed before profiling started
+            self._write_profile(profiler)
+
+def _startup_finished(root, report_only):
+    """Called once the main window is idle: check the cold start against the budget"""
+    from startup_report import build_startup_report
+    
+    report = build_startup_report(STARTUP_T0)
+    if not report['within_budget']:
+        print(f"Warning: start-up took {report['startup_ms']} ms from script import "
+              f"(budget {report['budget_ms']} ms), "
+              f"eagerly imported: {report['eager_heavy_modules'] or 'none'}")
+    if report_only:
+        import json
+        print(json.dumps(report))
+        if report['frozen']:
+            # --noconsole builds have no stdout, keep the report next to the executable
+            with open(os.path.join(os.path.dirname(sys.executable), "startup_report.json"), 'w') as f:
+                json.dump(report, f)
+        root.destroy()
 
 def main():
+    report_only = '--startup-report' in sys.argv[1:]
     root = tk.Tk()
     app = PokemonSVUploaderApp(root)
+    root.after_idle(_startup_finished, root, report_only)
     root.mainloop()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
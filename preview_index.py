@@ -0,0 +1,208 @@
+import mmap
+import re
+
+import json_codec
+from trainer_records import Trainer, validate_trainer_data
+
+# Strings (skipped whole, escapes included) and the structural characters
+# that matter for finding top-level array elements
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.S)
+
+# trainer_data.json is written with indent=2: every top-level element, and
+# only those, starts with a newline and two spaces (strings cannot contain a
+# raw newline)
+_INDENT2_ELEMENT = b'\n  {'
+
+
+class TrainerIndex:
+    """
+    Byte-offset index over a trainer_data.json array (or JSON Lines file)
+
+    The file is memory-mapped and only the element boundaries are located up
+    front; get() decodes a single trainer on demand. summary() decodes
+    everything once to collect the columns needed for sorting and filtering,
+    and is meant to run in a background thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._map = b''
+        self.spans = self._find_spans()
+
+    def _find_spans(self):
+        data = self._map
+        if self.path.lower().endswith('.jsonl'):
+            return self._line_spans()
+        # An element right after two spaces, not a deeper indent
+        if data[:5] == b'[\n  {' or data[:6] == b'[\r\n  {':
+            return self._indent2_spans()
+        return self._scan_spans()
+
+    def _line_spans(self):
+        spans, start, size = [], 0, len(self._map)
+        while start < size:
+            end = self._map.find(b'\n', start)
+            end = size if end < 0 else end
+            if self._map[start:end].strip():
+                spans.append((start, end))
+            start = end + 1
+        return spans
+
+    def _indent2_spans(self):
+        starts = []
+        position = self._map.find(_INDENT2_ELEMENT)
+        while position >= 0:
+            starts.append(position + 1)
+            position = self._map.find(_INDENT2_ELEMENT, position + 1)
+        close = self._map.rfind(b']')
+        return list(zip(starts, starts[1:] + [close]))
+
+    def _scan_spans(self):
+        """Tokenizing fallback for files in any other layout (e.g. minified)"""
+        spans, depth, start = [], 0, None
+        for match in _TOKEN.finditer(self._map):
+            token = match.group()
+            if token[0] == 0x22:  # a string
+                continue
+            if token in (b'{', b'['):
+                if depth == 1:
+                    start = match.start()
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 1 and start is not None:
+                    spans.append((start, match.end()))
+                    start = None
+        return spans
+
+    def __len__(self):
+        return len(self.spans)
+
+    def raw(self, i):
+        start, end = self.spans[i]
+        # Indent-2 spans run up to the next element and include the separator
+        return self._map[start:end].rstrip().rstrip(b',')
+
+    def get(self, i):
+        """Decode the i-th trainer"""
+        data = json_codec.loads(self.raw(i))
+        validate_trainer_data([data])
+        return Trainer.from_dict(data)
+
+    def summary(self, progress=None, chunk=2000):
+        """
+        Columns for sorting and filtering, one entry per trainer
+
+        Args:
+            progress (callable, optional): Called as progress(done, total)
+
+        Returns:
+            TrainerSummary
+        """
+        summary = TrainerSummary()
+        total = len(self)
+        for start in range(0, total, chunk):
+            rows = range(start, min(start + chunk, total))
+            # Plain dicts, no records: only five fields are needed
+            for data in json_codec.loads(b'[' + b','.join(self.raw(i) for i in rows) + b']'):
+                summary.add_dict(data)
+            if progress:
+                progress(rows.stop, total)
+        return summary
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+class RecordIndex:
+    """TrainerIndex interface over already loaded Trainer records (e.g. from a SQLite store)"""
+
+    def __init__(self, trainers):
+        self.trainers = trainers
+
+    def __len__(self):
+        return len(self.trainers)
+
+    def get(self, i):
+        return self.trainers[i]
+
+    def summary(self, progress=None, chunk=2000):
+        summary = TrainerSummary()
+        for trainer in self.trainers:
+            summary.add(trainer)
+        return summary
+
+    def close(self):
+        pass
+
+
+class TrainerSummary:
+    """Per-trainer sort keys and filter text, in file order"""
+
+    COLUMNS = ('rank', 'rating', 'trainer_name', 'pokemon', 'items')
+
+    def __init__(self):
+        self.rank = []
+        self.rating = []
+        self.trainer_name = []
+        # Pokemon names / items joined with NUL, so a substring never spans two values
+        self.pokemon = []
+        self.items = []
+
+    def _append(self, rank, rating, trainer_name, names, items):
+        # Missing numbers sort first instead of breaking the comparison
+        self.rank.append(rank if isinstance(rank, int) else -1)
+        self.rating.append(rating if isinstance(rating, int) else -1)
+        self.trainer_name.append(trainer_name if isinstance(trainer_name, str) else '')
+        self.pokemon.append('\0'.join(names))
+        self.items.append('\0'.join(items))
+
+    def add(self, trainer):
+        self._append(trainer.rank, trainer.rating, trainer.trainer_name,
+                     [pokemon.name for pokemon in trainer.pokemon],
+                     [pokemon.item for pokemon in trainer.pokemon])
+
+    def add_dict(self, data):
+        """Add a trainer in parsed trainer_data.json form (not validated)"""
+        pokemon = [p for p in data.get('pokemon') or () if isinstance(p, dict)]
+        self._append(data.get('rank'), data.get('rating'), data.get('trainer_name'),
+                     [str(p.get('name', '')) for p in pokemon],
+                     [str(p.get('item', '')) for p in pokemon])
+
+    def __len__(self):
+        return len(self.rank)
+
+    def select(self, pokemon='', item='', sort_column=None, descending=False):
+        """
+        Row numbers matching the filters (substring match), optionally sorted
+
+        Args:
+            pokemon (str): Keep teams with a Pokemon whose name contains this
+            item (str): Keep teams with a held item containing this
+            sort_column (str, optional): One of COLUMNS
+        """
+        rows = range(len(self))
+        if pokemon:
+            rows = [i for i in rows if pokemon in self.pokemon[i]]
+        if item:
+            rows = [i for i in rows if item in self.items[i]]
+        rows = list(rows)
+        if sort_column:
+            keys = getattr(self, sort_column)
+            rows.sort(key=keys.__getitem__, reverse=descending)
+        return rows
+
+
+def open_index(path):
+    """Index a trainer JSON / JSON Lines file, or load a SQLite trainer store"""
+    from trainer_store import is_store_path, load_trainer_data
+
+    if is_store_path(path):
+        return RecordIndex(load_trainer_data(path))
+    return TrainerIndex(path)
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlparse
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in key) + '}'
+
+
+class RunMetrics:
+    """
+    Stage timers, counters and gauges for one scrape or upload run
+
+    Thread-safe. A run report can be written as JSON plus Prometheus text
+    exposition format, and summary() gives a one-line view for the GUI.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        # Optional stage_profiler.StageProfiler; when set every timed stage is profiled
+        self.profiler = None
+
+    @contextmanager
+    def timer(self, stage):
+        """Time a block of work under the given stage name"""
+        profile = self.profiler.stage(stage) if self.profiler is not None else nullcontext()
+        start = time.perf_counter()
+        try:
+            with profile:
+                yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - start)
+
+    def record_stage(self, stage, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            entry['count'] += 1
+            entry['total_seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def counter(self, name, **labels):
+        """Current value of a counter; without labels, the sum over all label sets"""
+        with self._lock:
+            if labels:
+                return self.counters.get((name, _label_key(labels)), 0)
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def observe_response(self, response):
+        """Count an HTTP response by host and status, plus bytes downloaded"""
+        host = urlparse(response.url).netloc
+        self.inc('http_requests_total', host=host, status=response.status_code)
+        self.inc('http_bytes_total', len(response.content), host=host)
+
+    def cache_lookup(self, cache, hit):
+        self.inc('cache_hits_total' if hit else 'cache_misses_total', cache=cache)
+
+    def snapshot(self):
+        """Plain-dict view of all metrics"""
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'elapsed_seconds': round(time.time() - self.started_at, 3),
+                'stages': {name: dict(entry) for name, entry in self.stages.items()},
+                'counters': [{'name': name, 'labels': dict(key), 'value': value}
+                             for (name, key), value in sorted(self.counters.items(), key=str)],
+                'gauges': [{'name': name, 'labels': dict(key), 'value': value}
+                           for (name, key), value in sorted(self.gauges.items(), key=str)],
+            }
+
+    def cache_hit_rates(self):
+        rates = {}
+        with self._lock:
+            caches = {dict(key)['cache'] for (name, key) in self.counters
+                      if name in ('cache_hits_total', 'cache_misses_total')}
+        for cache in caches:
+            hits = self.counter('cache_hits_total', cache=cache)
+            total = hits + self.counter('cache_misses_total', cache=cache)
+            rates[cache] = hits / total if total else 0.0
+        return rates
+
+    def summary(self):
+        """One-line summary: time per stage, requests, MB downloaded and cache hit rates"""
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: -item[1]['total_seconds'])
+        parts = [f"{name} {entry['total_seconds']:.1f}s" for name, entry in stages[:4]]
+        parts.append(f"{self.counter('http_requests_total')} req")
+        parts.append(f"{self.counter('http_bytes_total') / 1e6:.1f} MB")
+        parts.extend(f"{cache} hit {rate:.0%}" for cache, rate in sorted(self.cache_hit_rates().items()))
+        return " | ".join(parts)
+
+    def to_prometheus(self, prefix='pokemon_sv'):
+        """Render all metrics in Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}_stage_seconds_total counter",
+            *(f'{prefix}_stage_seconds_total{{stage="{name}"}} {entry["total_seconds"]:.6f}'
+              for name, entry in snapshot['stages'].items()),
+            f"# TYPE {prefix}_stage_calls_total counter",
+            *(f'{prefix}_stage_calls_total{{stage="{name}"}} {entry["count"]}'
+              for name, entry in snapshot['stages'].items()),
+            f"# TYPE {prefix}_stage_max_seconds gauge",
+            *(f'{prefix}_stage_max_seconds{{stage="{name}"}} {entry["max_seconds"]:.6f}'
+              for name, entry in snapshot['stages'].items()),
+        ]
+
+        for kind, entries in (('counter', snapshot['counters']), ('gauge', snapshot['gauges'])):
+            declared = set()
+            for entry in entries:
+                name = f"{prefix}_{entry['name']}"
+                if name not in declared:
+                    lines.append(f"# TYPE {name} {kind}")
+                    declared.add(name)
+                lines.append(f"{name}{_format_labels(_label_key(entry['labels']))} {entry['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path_prefix):
+        """
+        Write <path_prefix>.json and <path_prefix>.prom
+
+        Returns:
+            tuple: Paths of the JSON and Prometheus reports
+        """
+        json_path, prom_path = f"{path_prefix}.json", f"{path_prefix}.prom"
+        snapshot = self.snapshot()
+        snapshot['cache_hit_rates'] = self.cache_hit_rates()
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        with open(prom_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        return json_path, prom_path
@@ -0,0 +1,386 @@
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from parse_cache import ParseCache
+from pokemon_scraper import PARSER_VERSION, PokemonSVScraper, ValidatorCache
+from team_index import TeamIndex
+
+
+class RefreshJob:
+    """A (season, rule, party) ranking scraped every `interval` seconds"""
+
+    def __init__(self, season, rule, party, interval, max_trainers=None, sync=False):
+        self.season = season
+        self.rule = rule
+        self.party = party
+        self.interval = interval
+        self.max_trainers = max_trainers
+        # Stream trainers to the spreadsheet while this job runs
+        self.sync = sync
+        self.next_run = time.time()
+        self.running = False
+        # Set when the job is triggered while running: one more run afterwards
+        self.pending = False
+        self.runs = 0
+        self.last_started = None
+        self.last_duration = None
+        self.last_trainers = None
+        self.last_error = None
+
+    @property
+    def key(self):
+        return (self.season, self.rule, self.party)
+
+    @property
+    def sheet_name(self):
+        """Spreadsheet tab this job syncs to; one per job so jobs never overwrite each other's rows"""
+        return f"trainer_data_s{self.season}_r{self.rule}_p{self.party}"
+
+    def status(self):
+        return {
+            'season': self.season,
+            'rule': self.rule,
+            'party': self.party,
+            'interval_seconds': self.interval,
+            'running': self.running,
+            'pending': self.pending,
+            'runs': self.runs,
+            'last_started': self.last_started,
+            'last_duration_seconds': self.last_duration,
+            'last_trainers': self.last_trainers,
+            'last_error': self.last_error,
+            'next_run': None if self.running else self.next_run,
+        }
+
+
+class ScraperDaemon:
+    """
+    Long-running scraper that refreshes rankings on a schedule
+
+    One PokemonSVScraper is kept for the daemon's lifetime, so its HTTP
+    session (connection pool, TLS), throttle state, species usage cache
+    (entries expire after the job interval), parse cache and conditional-GET
+    validators stay warm between runs and a refresh mostly costs the pages
+    that changed. Jobs run one at a time; a
+    job that comes due or is triggered while it is running or waiting is
+    run once, not once per trigger. Each job's teams are indexed for
+    similar-team queries as they are scraped; the index of the last complete
+    run answers queries while the next one is being built.
+    """
+
+    def __init__(self, jobs, output_dir='.', store_path=None, credentials_file=None,
+                 spreadsheet_id=None, infer_unknown=False, archive_dir=None, log=print):
+        self.jobs = list(jobs)
+        self.output_dir = output_dir
+        self.spreadsheet_id = spreadsheet_id
+        self.infer_unknown = infer_unknown
+        self.log = log
+        self.started_at = time.time()
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.parse_cache = ParseCache(os.path.join(output_dir, 'parse_cache.db'), PARSER_VERSION)
+        self.scraper = PokemonSVScraper(log=log, parse_cache=self.parse_cache)
+        self.scraper.validators = ValidatorCache()
+        self.metrics = self.scraper.metrics
+        if archive_dir:
+            from page_archive import PageArchive
+            self.scraper.archive = PageArchive(archive_dir)
+
+        self.store = None
+        if store_path:
+            from trainer_store import TrainerStore
+            self.store = TrainerStore(store_path)
+
+        # Authorized once; only needed by jobs with sync enabled
+        self.sheets_service = None
+        # Tabs known to exist in the spreadsheet
+        self._sheet_tabs = set()
+        if credentials_file and any(job.sync for job in self.jobs):
+            from sheets_uploader import build_sheets_service
+            self.sheets_service = build_sheets_service(credentials_file)
+
+        # (season, rule, party) -> TeamIndex of the last complete run
+        self.team_indexes = {}
+
+        self._condition = threading.Condition()
+        self._stopping = False
+
+    def trigger(self, season=None, rule=None, party=None):
+        """
+        Run matching jobs as soon as possible (None matches any value)
+
+        Returns:
+            int: Number of jobs matched
+        """
+        matched = 0
+        with self._condition:
+            for job in self.jobs:
+                if any(wanted is not None and wanted != value
+                       for wanted, value in zip((season, rule, party), job.key)):
+                    continue
+                matched += 1
+                if job.running:
+                    job.pending = True
+                else:
+                    job.next_run = min(job.next_run, time.time())
+            self._condition.notify_all()
+        return matched
+
+    def stop(self):
+        """Stop after the running job (if any) finishes"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+    def status(self):
+        with self._condition:
+            jobs = [job.status() for job in self.jobs]
+        return {
+            'started_at': self.started_at,
+            'jobs': jobs,
+            'revalidated_pages': len(self.scraper.validators),
+            'revalidated_chars': self.scraper.validators.chars,
+            'summary': self.metrics.summary(),
+        }
+
+    def similar(self, season, rule, party, team, k=10, min_shared=1):
+        """
+        Teams of a job's last complete run most similar to a query team
+
+        Args:
+            team (list): Pokemon names, pokemon ids ("0445-00") or Pokedex numbers
+
+        Returns:
+            list: {'jaccard', 'shared', 'rank', 'trainer_name', 'article_url', 'pokemon'},
+                best first, or None if the job has not completed a run
+        """
+        with self._condition:
+            index = self.team_indexes.get((season, rule, party))
+        if index is None:
+            return None
+        results = []
+        for jaccard, shared, match in index.similar(team, k, min_shared):
+            trainer = index.trainers[match]
+            results.append({'jaccard': round(jaccard, 3), 'shared': shared, 'rank': trainer.rank,
+                            'trainer_name': trainer.trainer_name, 'article_url': trainer.article_url,
+                            'pokemon': [pokemon.name for pokemon in trainer.pokemon]})
+        return results
+
+    def _next_job(self):
+        """Wait for the job that is due first (None once stopped); call with the condition held"""
+        while not self._stopping:
+            now = time.time()
+            due = [job for job in self.jobs if job.next_run <= now]
+            if due:
+                job = min(due, key=lambda job: job.next_run)
+                job.running = True
+                return job
+            self._condition.wait(min(job.next_run for job in self.jobs) - now)
+        return None
+
+    def run(self):
+        """Run jobs as they come due until stop() is called"""
+        while True:
+            with self._condition:
+                job = self._next_job()
+            if job is None:
+                return
+            self._run_job(job)
+            with self._condition:
+                job.running = False
+                # Runs missed while this one was busy collapse into (at most) one
+                job.next_run = time.time() if job.pending else max(job.last_started + job.interval,
+                                                                    time.time())
+                job.pending = False
+
+    def _ensure_sheet_tab(self, job):
+        """Create the job's tab in the spreadsheet on its first sync"""
+        if job.sheet_name in self._sheet_tabs:
+            return
+        from sheets_uploader import ensure_sheet_tab, safe_api_call
+
+        with self.metrics.timer('sheets_get'):
+            spreadsheet_info = safe_api_call(
+                lambda: self.sheets_service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute(),
+                "Error accessing spreadsheet",
+                metrics=self.metrics
+            )
+        if spreadsheet_info is None or not ensure_sheet_tab(self.sheets_service, self.spreadsheet_id,
+                                                            job.sheet_name, spreadsheet_info,
+                                                            metrics=self.metrics):
+            raise RuntimeError(f"Could not create sheet tab {job.sheet_name}")
+        self._sheet_tabs.add(job.sheet_name)
+
+    def _run_job(self, job):
+        season, rule, party = job.key
+        output_file = os.path.join(self.output_dir, f"trainer_data_s{season}_r{rule}_p{party}.json")
+        self.log(f"Refreshing season {season} rule {rule} party {party}...")
+        job.last_started = time.time()
+        # Usage data is refreshed as often as the ranking itself
+        self.scraper.species_usage.expire(job.interval, season, rule)
+        sync = None
+        try:
+            team_index = TeamIndex()
+            sinks = [team_index]
+            if job.sync and self.sheets_service:
+                from sheets_live_sync import SheetsLiveSync
+                self._ensure_sheet_tab(job)
+                sync = SheetsLiveSync(self.sheets_service, self.spreadsheet_id, sheet_name=job.sheet_name,
+                                      metrics=self.metrics, log=self.log).start()
+                sinks.append(sync)
+            trainers = self.scraper.scrape_article_trainers(
+                season=season, rule=rule, party=party, max_trainers=job.max_trainers,
+                output_file=output_file, store=self.store, sinks=sinks,
+                infer_unknown=self.infer_unknown
+            )
+            with self._condition:
+                self.team_indexes[job.key] = team_index
+            job.last_trainers = len(trainers)
+            job.last_error = None
+        except Exception as e:
+            job.last_error = f"{type(e).__name__}: {str(e)}"
+            self.metrics.inc('daemon_job_errors_total', season=season, rule=rule, party=party)
+            self.log(f"Refresh of season {season} rule {rule} party {party} failed: {job.last_error}")
+        finally:
+            if sync:
+                # No-op once the scraper finished it; covers failures before the scrape started
+                sync.abort()
+            job.runs += 1
+            job.last_duration = time.time() - job.last_started
+            self.metrics.inc('daemon_job_runs_total', season=season, rule=rule, party=party)
+            self.metrics.set_gauge('daemon_job_last_duration_seconds', round(job.last_duration, 3),
+                                   season=season, rule=rule, party=party)
+
+    def close(self):
+        self.parse_cache.close()
+        if self.scraper.archive:
+            self.scraper.archive.close()
+        if self.store:
+            self.store.close()
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    """
+    GET /status (JSON), GET /metrics (Prometheus text),
+    GET /similar?season=&rule=&party=&team=NAME,NAME...[&k=&min_shared=] (JSON),
+    POST /refresh?season=&rule=&party=
+    """
+
+    def _send(self, status, body, content_type='application/json; charset=utf-8'):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data, ensure_ascii=False, indent=2))
+
+    def do_GET(self):
+        daemon = self.server.scraper_daemon
+        path = urlparse(self.path).path
+        if path in ('/', '/status'):
+            self._send_json(200, daemon.status())
+        elif path == '/metrics':
+            self._send(200, daemon.metrics.to_prometheus(), 'text/plain; version=0.0.4')
+        elif path == '/similar':
+            self._similar(daemon, parse_qs(urlparse(self.path).query))
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def _similar(self, daemon, query):
+        try:
+            season, rule, party = (int(query[name][0]) for name in ('season', 'rule', 'party'))
+            k = int(query.get('k', ['10'])[0])
+            min_shared = int(query.get('min_shared', ['1'])[0])
+            team = [member.strip() for member in query['team'][0].split(',') if member.strip()]
+        except (KeyError, ValueError):
+            self._send_json(400, {'error': 'season, rule, party (integers) and team are required'})
+            return
+        results = daemon.similar(season, rule, party, team, k, min_shared)
+        if results is None:
+            self._send_json(404, {'error': 'no completed run for this season, rule and party'})
+        else:
+            self._send_json(200, {'results': results})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/refresh':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            query = {name: int(values[0]) for name, values in parse_qs(url.query).items()
+                     if name in ('season', 'rule', 'party')}
+        except ValueError:
+            self._send_json(400, {'error': 'season, rule and party must be integers'})
+            return
+        matched = self.server.scraper_daemon.trigger(**query)
+        self._send_json(202 if matched else 404, {'triggered': matched})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_status(daemon, port=8787, host='127.0.0.1'):
+    """Serve the daemon's status endpoint from a background thread; returns the server"""
+    server = ThreadingHTTPServer((host, port), _StatusHandler)
+    server.scraper_daemon = daemon
+    threading.Thread(target=server.serve_forever, name="daemon-status", daemon=True).start()
+    return server
+
+
+def parse_job(spec):
+    """SEASON,RULE,PARTY,MINUTES[,sync] -> RefreshJob"""
+    parts = spec.split(',')
+    if len(parts) not in (4, 5) or (len(parts) == 5 and parts[4] != 'sync'):
+        raise argparse.ArgumentTypeError(f"expected SEASON,RULE,PARTY,MINUTES[,sync], got {spec!r}")
+    try:
+        season, rule, party = (int(part) for part in parts[:3])
+        minutes = float(parts[3])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected numbers in {spec!r}")
+    return RefreshJob(season, rule, party, minutes * 60, sync=len(parts) == 5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh rankings on a schedule with warm caches")
+    parser.add_argument('--job', type=parse_job, action='append', required=True,
+                        metavar='SEASON,RULE,PARTY,MINUTES[,sync]',
+                        help='Ranking to refresh every MINUTES; ",sync" streams it to the spreadsheet. '
+                             'Repeat for several rankings')
+    parser.add_argument('--output-dir', default='daemon_data')
+    parser.add_argument('--store', help='SQLite trainer store every refresh is upserted into')
+    parser.add_argument('--max-trainers', type=int, default=None)
+    parser.add_argument('--infer-unknown', action='store_true',
+                        help='Fill fields missing from articles with season usage data')
+    parser.add_argument('--archive', metavar='DIR', help='Keep every fetched page in a compressed page archive')
+    parser.add_argument('--credentials', default='credentials.json')
+    parser.add_argument('--spreadsheet-id')
+    parser.add_argument('--port', type=int, default=8787, help='Local status endpoint port (0 to disable)')
+    args = parser.parse_args()
+
+    if any(job.sync for job in args.job) and not args.spreadsheet_id:
+        parser.error("--spreadsheet-id is required for jobs with sync")
+    for job in args.job:
+        job.max_trainers = args.max_trainers
+
+    daemon = ScraperDaemon(args.job, output_dir=args.output_dir, store_path=args.store,
+                           credentials_file=args.credentials, spreadsheet_id=args.spreadsheet_id,
+                           infer_unknown=args.infer_unknown, archive_dir=args.archive)
+    server = serve_status(daemon, args.port) if args.port else None
+    if server:
+        print(f"Status: http://127.0.0.1:{server.server_port}/status")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        if server:
+            server.shutdown()
+        daemon.close()
@@ -0,0 +1,155 @@
+import queue
+import threading
+import time
+
+from run_metrics import RunMetrics
+from sheets_uploader import HEADERS, SHEET_NAME, safe_api_call, trainer_to_row
+
+_CLOSE = object()
+
+
+class SheetsLiveSync:
+    """
+    Stream finished trainers into Google Sheets while a scrape is running
+
+    A scraper sink: add_trainer() puts the trainer's row on a bounded queue,
+    and a writer thread writes queued rows over the sheet in batches, from
+    row 2 down. A batch is sent when it reaches batch_size rows or
+    flush_interval seconds after its first row. When the queue is full,
+    add_trainer() blocks until the writer catches up.
+
+    The sheet is never cleared up front: rows of the previous upload stay
+    below the rows written so far. close() (called by the scraper once the
+    run is complete) clears them; abort() leaves them, so a failed or
+    interrupted scrape never leaves the sheet empty. Rows whose write failed
+    are kept in failed_rows so they can be uploaded afterwards.
+    """
+
+    def __init__(self, sheets_service, spreadsheet_id, sheet_name=SHEET_NAME, batch_size=10,
+                 flush_interval=2.0, max_queue=200, metrics=None, log=print):
+        self.sheets_service = sheets_service
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.metrics = metrics or RunMetrics()
+        self.log = log
+        self.rows_written = 0
+        # Rows handed to the sheet so far (written or failed): the next batch starts below them
+        self.rows_sent = 0
+        self.failed_rows = []
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+
+    def start(self):
+        """Write the header row and start the writer thread"""
+        with self.metrics.timer('sheets_sync_start'):
+            prepared = safe_api_call(
+                lambda: self.sheets_service.spreadsheets().values().update(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f"'{self.sheet_name}'!A1",
+                    valueInputOption="RAW",
+                    body={"values": [HEADERS]}
+                ).execute(),
+                "Error writing header row",
+                metrics=self.metrics
+            ) is not None
+        if not prepared:
+            raise RuntimeError(f"Could not prepare sheet {self.sheet_name} for live sync")
+
+        self._thread = threading.Thread(target=self._run, name="sheets-live-sync", daemon=True)
+        self._thread.start()
+        return self
+
+    def add_trainer(self, trainer):
+        self._queue.put(trainer_to_row(trainer))
+
+    def close(self):
+        """The run is complete: send the remaining rows, then clear the previous upload's leftover rows"""
+        if not self._stop():
+            return
+        if not self.rows_sent:
+            # Nothing scraped (e.g. the trainer list could not be fetched): keep the previous upload
+            self.log(f"Live sync: no rows, {self.sheet_name} left unchanged")
+            return
+        # Everything below the last row sent is from an earlier, longer upload
+        with self.metrics.timer('sheets_sync_trim'):
+            trimmed = safe_api_call(
+                lambda: self.sheets_service.spreadsheets().values().clear(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f"'{self.sheet_name}'!A{self.rows_sent + 2}:ZZ",
+                    body={}
+                ).execute(),
+                "Error clearing leftover rows",
+                metrics=self.metrics
+            )
+        if trimmed is None:
+            self.log(f"Live sync: rows below row {self.rows_sent + 1} are from the previous upload, "
+                     f"upload the file to fix the sheet")
+        if self.failed_rows:
+            self.log(f"Live sync: {len(self.failed_rows)} rows could not be written, upload the file to fix the sheet")
+        else:
+            self.log(f"Live sync: {self.rows_written} rows written to {self.sheet_name}")
+
+    def abort(self):
+        """The run failed: send the remaining rows but keep the previous upload's rows below them"""
+        if self._stop():
+            self.log(f"Live sync: scrape did not complete, {self.rows_written} rows written over the "
+                     f"previous upload of {self.sheet_name}")
+
+    def _stop(self):
+        """Flush the queue and stop the writer thread; False if it was not running"""
+        if self._thread is None:
+            return False
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        self._thread = None
+        return True
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _run(self):
+        closing = False
+        while not closing:
+            item = self._queue.get()
+            if item is _CLOSE:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, rows):
+        first_row = self.rows_sent + 2  # below the header
+        self.rows_sent += len(rows)
+        with self.metrics.timer('sheets_sync_write'):
+            result = safe_api_call(
+                lambda: self.sheets_service.spreadsheets().values().update(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f"'{self.sheet_name}'!A{first_row}",
+                    valueInputOption="RAW",
+                    body={"values": rows}
+                ).execute(),
+                "Error writing rows",
+                metrics=self.metrics
+            )
+        if result is None:
+            self.failed_rows.extend(rows)
+            return
+        self.rows_written += len(rows)
+        self.metrics.inc('sheets_rows_uploaded_total', len(rows))
@@ -1,13 +1,69 @@
-import json
 import os
 import socket
-import sys
 import time
 import tkinter as tk
 from tkinter import messagebox
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from trainer_store import load_trainer_data
+from trainer_records import EV_KEYS
+from resources import get_resource_path
+from run_metrics import RunMetrics
+
+# Tab the trainer rows are written to
+SHEET_NAME = "BaBa_kohsi様_入力シート"
+
+# Rows per values().update request; progress and cancellation work per chunk
+UPLOAD_CHUNK_ROWS = 500
+
+# Header row: trainer columns, then 7 columns for each of the 6 Pokemon
+HEADERS = ["rank", "rating", "name", "article_url"]
+for _slot in range(1, 7):
+    HEADERS.extend(f"pokemon{_slot}_{field}"
+                   for field in ("name", "item", "nature", "ability", "Ttype", "moves", "effort"))
+
+def trainer_to_row(trainer):
+    """Build one sheet row (in HEADERS order) from a Trainer record"""
+    row = [
+        trainer.rank,
+        trainer.rating,
+        trainer.trainer_name,
+        trainer.article_url
+    ]
+    
+    # Add Pokemon data
+    pokemon_list = trainer.pokemon
+    for i in range(6):  # Always process 6 slots
+        if i < len(pokemon_list):
+            pokemon = pokemon_list[i]
+            moves_str = ", ".join(pokemon.moves)
+            effort_str = ", ".join(f"{key}{value}" for key, value in zip(EV_KEYS, pokemon.evs))
+            
+            row.extend([
+                pokemon.name,
+                pokemon.item,
+                pokemon.nature,
+                pokemon.ability,
+                pokemon.tera_type,
+                moves_str,
+                effort_str
+            ])
+        else:
+            # Fill empty slots
+            row.extend([""] * 7)  # 7 fields per Pokemon
+    return row
+
+def build_sheets_service(credentials_file):
+    """Create an authorized Sheets API client from a service account file"""
+    credentials = service_account.Credentials.from_service_account_file(
+        credentials_file,
+        scopes=['https://www.googleapis.com/auth/spreadsheets', 
+               'https://www.googleapis.com/auth/drive']
+    )
+    
+    # Build the services with cache_discovery=False to avoid connection issues
+    return build('sheets', 'v4', credentials=credentials, cache_discovery=False)
 
 def show_message(message, is_error=False):
     """Show a message box instead of using input() for GUI applications"""
@@ -30,17 +86,7 @@ def show_message(message, is_error=False):
         except:
             pass
 
-def get_resource_path(relative_path):
-    """Get absolute path to resource, works for dev and for PyInstaller"""
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    
-    return os.path.join(base_path, relative_path)
-
-def safe_api_call(func, error_message="API call failed", max_retries=2):
+def safe_api_call(func, error_message="API call failed", max_retries=2, metrics=None):
     """
     Safely execute an API call with retry logic
     
@@ -48,6 +94,7 @@ def safe_api_call(func, error_message="API call failed", max_retries=2):
         func: Function to call
         error_message: Message to display on error
         max_retries: Maximum number of retry attempts
+        metrics (RunMetrics, optional): Records retries, retry wait time and errors
         
     Returns:
         The result of the function call, or None if it fails
@@ -59,27 +106,74 @@ def safe_api_call(func, error_message="API call failed", max_retries=2):
             if attempt < max_retries:
                 wait_time = 2 ** attempt
                 print(f"Connection error: {str(e)}. Retrying in {wait_time} seconds...")
+                if metrics:
+                    metrics.inc('sheets_retries_total')
+                    metrics.inc('sheets_retry_wait_seconds_total', wait_time)
                 time.sleep(wait_time)
             else:
                 print(f"{error_message}: {str(e)}")
+                if metrics:
+                    metrics.inc('sheets_errors_total')
                 return None
         except Exception as e:
             print(f"{error_message}: {type(e).__name__}: {str(e)}")
+            if metrics:
+                metrics.inc('sheets_errors_total')
             return None
 
-def upload_to_sheets(json_file_path, spreadsheet_name, credentials_file, spreadsheet_id=None):
+def ensure_sheet_tab(sheets_service, spreadsheet_id, title, spreadsheet_info, metrics=None):
+    """
+    Make sure a tab with the given title exists in the spreadsheet
+    
+    Returns:
+        bool: True if the tab exists or was created
+    """
+    titles = [sheet['properties']['title'] for sheet in spreadsheet_info.get('sheets', [])]
+    if title in titles:
+        return True
+    
+    print(f"Creating sheet tab: {title}")
+    result = safe_api_call(
+        lambda: sheets_service.spreadsheets().batchUpdate(
+            spreadsheetId=spreadsheet_id,
+            body={"requests": [{"addSheet": {"properties": {"title": title}}}]}
+        ).execute(),
+        f"Error creating sheet tab {title}",
+        metrics=metrics
+    )
+    return result is not None
+
+def upload_to_sheets(json_file_path, spreadsheet_name, credentials_file, spreadsheet_id=None,
+                     stats_sheet_name=None, metrics=None, notify=None, progress=None, cancel=None,
+                     chunk_rows=UPLOAD_CHUNK_ROWS, usage_stats=None):
     """
     Upload JSON data to Google Sheets
     
     Args:
-        json_file_path (str): Path to the JSON data file to upload
+        json_file_path (str): Path to the JSON data file (or SQLite trainer store) to upload
         spreadsheet_name (str): Name of the Google Sheets document
         credentials_file (str): Path to the Google API credentials JSON file
         spreadsheet_id (str, optional): Specific Google Sheets ID to use
+        stats_sheet_name (str, optional): Tab to publish Pokemon usage statistics to
+        metrics (RunMetrics, optional): Collects stage timings and retry counters
+        notify (callable, optional): Called as notify(message, is_error) for the
+            result and errors; defaults to show_message. Pass a callback that hands
+            the message to the GUI thread when uploading from a worker thread
+        progress (callable, optional): Called as progress(rows_done, total_rows)
+            after each chunk
+        cancel (threading.Event, optional): Stops the upload before the next chunk
+        chunk_rows (int): Rows per upload request
+        usage_stats (UsageStats, optional): Statistics already collected for this
+            file (e.g. streamed from the scraper); computed from the file otherwise
     
     Returns:
         str: Spreadsheet ID if successful, None otherwise
     """
+    if metrics is None:
+        metrics = RunMetrics()
+    if notify is None:
+        notify = show_message
+    
     try:
         # Set a longer timeout for socket operations
         socket.setdefaulttimeout(60)
@@ -92,147 +186,142 @@ def upload_to_sheets(json_file_path, spreadsheet_name, credentials_file, spreads
         if not os.path.exists(credentials_file):
             error_msg = f"Error: credentials.json not found at {credentials_file}"
             print(error_msg)
-            show_message(error_msg, is_error=True)
+            notify(error_msg, is_error=True)
             return None
             
         if not os.path.exists(json_file_path):
             error_msg = f"Error: trainer_data.json not found at {json_file_path}"
             print(error_msg)
-            show_message(error_msg, is_error=True)
+            notify(error_msg, is_error=True)
             return None
         
-        # Load JSON data
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Load trainer data (JSON file or SQLite store)
+        with metrics.timer('trainer_load'):
+            data = load_trainer_data(json_file_path)
         
-        # Set up credentials
-        credentials = service_account.Credentials.from_service_account_file(
-            credentials_file,
-            scopes=['https://www.googleapis.com/auth/spreadsheets', 
-                   'https://www.googleapis.com/auth/drive']
-        )
-        
-        # Build the services with cache_discovery=False to avoid connection issues
-        sheets_service = build('sheets', 'v4', credentials=credentials, cache_discovery=False)
+        with metrics.timer('sheets_auth'):
+            sheets_service = build_sheets_service(credentials_file)
         
         # If spreadsheet_id is provided, use it directly
         if spreadsheet_id:
             print(f"Using provided spreadsheet ID: {spreadsheet_id}")
             try:
                 # Verify the spreadsheet exists and is accessible
-                spreadsheet_info = safe_api_call(
-                    lambda: sheets_service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute(),
-                    "Error accessing specified spreadsheet"
-                )
+                with metrics.timer('sheets_get'):
+                    spreadsheet_info = safe_api_call(
+                        lambda: sheets_service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute(),
+                        "Error accessing specified spreadsheet",
+                        metrics=metrics
+                    )
                 if spreadsheet_info is None:
                     error_msg = f"Error: Could not access spreadsheet with ID {spreadsheet_id}"
                     print(error_msg)
-                    show_message(error_msg, is_error=True)
+                    notify(error_msg, is_error=True)
                     return None
                 
                 # Use the specified sheet name
-                sheet_name = "BaBa_kohsi様_入力シート"
+                sheet_name = SHEET_NAME
                 print(f"Using sheet: {sheet_name}")
                 
             except Exception as e:
                 error_msg = f"Error accessing spreadsheet: {str(e)}"
                 print(error_msg)
-                show_message(error_msg, is_error=True)
+                notify(error_msg, is_error=True)
                 return None
         
         # Prepare data for upload
         if not data or not isinstance(data, list) or len(data) == 0:
             warning_msg = "Warning: No data to upload or invalid data format"
             print(warning_msg)
-            show_message(warning_msg, is_error=True)
+            notify(warning_msg, is_error=True)
             return spreadsheet_id
         
         # Prepare data rows
-        headers = ["rank", "rating", "name", "article_url"]
-        for i in range(1, 7):  # For 6 Pokemon
-            pokemon_prefix = f"pokemon{i}_"
-            headers.extend([
-                f"{pokemon_prefix}name",
-                f"{pokemon_prefix}item",
-                f"{pokemon_prefix}nature",
-                f"{pokemon_prefix}ability",
-                f"{pokemon_prefix}Ttype",
-                f"{pokemon_prefix}moves",
-                f"{pokemon_prefix}effort"
-            ])
-        
-        rows = [headers]
+        rows = [HEADERS] + [trainer_to_row(trainer) for trainer in data]
         
-        # Process each trainer
-        for trainer in data:
-            row = [
-                trainer.get("rank", ""),
-                trainer.get("rating", ""),
-                trainer.get("trainer_name", ""),
-                trainer.get("article_url", "")
-            ]
-            
-            # Add Pokemon data
-            pokemon_list = trainer.get("pokemon", [])
-            for i in range(6):  # Always process 6 slots
-                if i < len(pokemon_list):
-                    pokemon = pokemon_list[i]
-                    moves_str = ", ".join(pokemon.get("moves", []))
-                    evs = pokemon.get("evs", {})
-                    effort_str = f"H{evs.get('H', '0')}, A{evs.get('A', '0')}, B{evs.get('B', '0')}, C{evs.get('C', '0')}, D{evs.get('D', '0')}, S{evs.get('S', '0')}"
-                    
-                    row.extend([
-                        pokemon.get("name", ""),
-                        pokemon.get("item", ""),
-                        pokemon.get("nature", ""),
-                        pokemon.get("ability", ""),
-                        pokemon.get("tera_type", ""),
-                        moves_str,
-                        effort_str
-                    ])
-                else:
-                    # Fill empty slots
-                    row.extend([""] * 7)  # 7 fields per Pokemon
+        # Upload data in chunks (header row first)
+        total = len(rows) - 1
+        for start in range(0, len(rows), chunk_rows):
+            if cancel is not None and cancel.is_set():
+                cancel_msg = f"Upload cancelled after {max(start - 1, 0)} of {total} entries"
+                print(cancel_msg)
+                # A deliberate stop, not a failure
+                notify(cancel_msg, is_error=False)
+                return None
+            chunk = rows[start:start + chunk_rows]
+            with metrics.timer('sheets_upload'):
+                result = safe_api_call(
+                    lambda: sheets_service.spreadsheets().values().update(
+                        spreadsheetId=spreadsheet_id,
+                        range=f"'{sheet_name}'!A{start + 1}",
+                        valueInputOption="RAW",
+                        body={"values": chunk}
+                    ).execute(),
+                    "Error uploading data",
+                    metrics=metrics
+                )
             
-            rows.append(row)
-        
-        # Upload data
-        result = safe_api_call(
-            lambda: sheets_service.spreadsheets().values().update(
-                spreadsheetId=spreadsheet_id,
-                range=f"'{sheet_name}'!A1",
-                valueInputOption="RAW",
-                body={"values": rows}
-            ).execute(),
-            "Error uploading data"
-        )
+            if result is None:
+                notify(f"Error uploading data to Google Sheets (after {max(start - 1, 0)} of {total} entries)",
+                       is_error=True)
+                return None
+            done = min(start + chunk_rows, len(rows)) - 1
+            metrics.inc('sheets_rows_uploaded_total', len(chunk) - (start == 0))
+            if progress:
+                progress(done, total)
         
-        if result is None:
-            show_message("Error uploading data to Google Sheets", is_error=True)
-            return None
+        # Publish usage statistics to their own tab
+        if stats_sheet_name:
+            with metrics.timer('usage_stats'):
+                if usage_stats is None:
+                    # NumPy is only loaded for uploads that publish statistics
+                    from pokemon_stats import stats_from_trainers
+                    usage_stats = stats_from_trainers(data)
+                stats_rows = usage_stats.to_rows()
+            result = None
+            with metrics.timer('sheets_stats_upload'):
+                if ensure_sheet_tab(sheets_service, spreadsheet_id, stats_sheet_name, spreadsheet_info,
+                                    metrics=metrics):
+                    result = safe_api_call(
+                        lambda: sheets_service.spreadsheets().values().update(
+                            spreadsheetId=spreadsheet_id,
+                            range=f"'{stats_sheet_name}'!A1",
+                            valueInputOption="RAW",
+                            body={"values": stats_rows}
+                        ).execute(),
+                        "Error uploading usage statistics",
+                        metrics=metrics
+                    )
+            if result is None:
+                notify("Error uploading usage statistics to Google Sheets", is_error=True)
+                return None
+            print(f"Uploaded usage statistics for {len(stats_rows)-1} Pokemon to {stats_sheet_name}")
             
         success_msg = f"Successfully uploaded {len(rows)-1} entries to the spreadsheet\nSpreadsheet URL: https://docs.google.com/spreadsheets/d/{spreadsheet_id}"
         print(success_msg)
-        show_message(success_msg)
+        notify(success_msg)
         return spreadsheet_id
         
     except HttpError as error:
         error_msg = f"Error uploading to Google Sheets: {error.resp.status} {error.content.decode('utf-8')}"
         print(error_msg)
-        show_message(error_msg, is_error=True)
+        notify(error_msg, is_error=True)
         return None
     except Exception as e:
         error_msg = f"Error: {type(e).__name__}: {str(e)}"
         print(error_msg)
-        show_message(error_msg, is_error=True)
+        notify(error_msg, is_error=True)
         return None
 
 # Example usage
 if __name__ == "__main__":
     SPREADSHEET_ID = "1wiBHSCdacFaPJoYV17C1OzLe-MitprC8dtrb7hh4wZY"  # Your specific spreadsheet ID
+    metrics = RunMetrics()
     upload_to_sheets(
         "trainer_data.json",
         "Pokemon SV Trainer Data",
         "credentials.json",
-        spreadsheet_id=SPREADSHEET_ID
-    )
\ No newline at end of file
+        spreadsheet_id=SPREADSHEET_ID,
+        metrics=metrics
+    )
+    metrics.write_report("trainer_data_upload_report")
\ No newline at end of file
@@ -0,0 +1,144 @@
+import re
+import threading
+import time
+
+from bs4 import BeautifulSoup
+
+from trainer_records import UNKNOWN, PokemonSet
+
+# Section headings on /pokemon/show/NNNN-FF pages -> PokemonSet field,
+# optionally followed by e.g. "ランキング" or "採用率"
+SECTION_PATTERN = re.compile(r'(テラスタイプ|持ち物|特性|性格|技)(?:ランキング|採用率)?')
+SECTION_FIELDS = {'テラスタイプ': 'tera_type', '持ち物': 'item', '特性': 'ability',
+                  '性格': 'nature', '技': 'moves'}
+# "こだわりスカーフ 25.3%" in one string, or the name and "25.3%" in two
+ENTRY_PATTERN = re.compile(r'(\S+?)\s*(\d+(?:\.\d+)?)\s*[%％]')
+SHARE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*[%％]')
+
+SINGLE_FIELDS = ('item', 'ability', 'nature', 'tera_type')
+
+
+def parse_species_usage(html):
+    """
+    Extract usage rankings from a species detail page
+
+    Returns:
+        dict: Field (item, ability, nature, tera_type, moves) -> list of
+        (value, share percent), most used first
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    usage = {}
+    field = None
+    pending = None
+    for string in soup.stripped_strings:
+        heading = SECTION_PATTERN.fullmatch(string)
+        if heading:
+            field = SECTION_FIELDS[heading.group(1)]
+            pending = None
+            continue
+        if field is None:
+            continue
+
+        entry = ENTRY_PATTERN.fullmatch(string)
+        share = SHARE_PATTERN.fullmatch(string)
+        if entry:
+            usage.setdefault(field, []).append((entry.group(1), float(entry.group(2))))
+            pending = None
+        elif share and pending:
+            usage.setdefault(field, []).append((pending, float(share.group(1))))
+            pending = None
+        else:
+            pending = string
+
+    for entries in usage.values():
+        entries.sort(key=lambda entry: -entry[1])
+    return usage
+
+
+def _missing(value):
+    return not value or value == UNKNOWN
+
+
+def fill_from_usage(pokemon, usage):
+    """
+    Fill a set's unknown fields with the species' most used values
+
+    Returns:
+        PokemonSet: The same set if nothing could be filled, otherwise a copy
+        with the filled fields listed in `inferred`
+    """
+    values = {field: getattr(pokemon, field) for field in SINGLE_FIELDS}
+    moves = pokemon.moves
+    inferred = list(pokemon.inferred)
+
+    for field in SINGLE_FIELDS:
+        if _missing(values[field]) and usage.get(field):
+            values[field] = usage[field][0][0]
+            inferred.append(field)
+    if all(_missing(move) for move in moves) and usage.get('moves'):
+        moves = tuple(move for move, _ in usage['moves'][:4])
+        inferred.append('moves')
+
+    if len(inferred) == len(pokemon.inferred):
+        return pokemon
+    return PokemonSet(pokemon.name, values['item'], values['ability'], values['nature'],
+                      values['tera_type'], moves, pokemon.evs, pokemon.pokemon_id, inferred)
+
+
+class SpeciesUsageCache:
+    """
+    Season usage data per species, fetched at most once per (season, rule, species)
+
+    Failed fetches are not cached, so the next team with the species tries
+    again. Long-lived scrapers (the daemon) call expire() so current-season
+    usage is refreshed.
+
+    Args:
+        fetch (callable): fetch(pokemon_id, season, rule) -> species page HTML
+        metrics (RunMetrics, optional): Records 'species' cache hits and misses
+    """
+
+    def __init__(self, fetch, metrics=None):
+        self.fetch = fetch
+        self.metrics = metrics
+        self._usage = {}  # (season, rule, pokemon_id) -> (usage, fetched at)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def usage(self, pokemon_id, season, rule):
+        """Usage rankings of a species ({} if its page could not be fetched)"""
+        key = (season, rule, pokemon_id)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # One fetch per key even when several threads ask at once
+        with key_lock:
+            hit = key in self._usage
+            if self.metrics:
+                self.metrics.cache_lookup('species', hit)
+            if hit:
+                return self._usage[key][0]
+            try:
+                usage = parse_species_usage(self.fetch(pokemon_id, season, rule))
+            except Exception:
+                if self.metrics:
+                    self.metrics.inc('species_fetch_errors_total')
+                return {}
+            self._usage[key] = (usage, time.monotonic())
+            return usage
+
+    def expire(self, max_age, season=None, rule=None):
+        """Drop entries older than max_age seconds (only this season / rule when given)"""
+        cutoff = time.monotonic() - max_age
+        with self._lock:
+            for key, (_, fetched_at) in list(self._usage.items()):
+                if fetched_at < cutoff and season in (None, key[0]) and rule in (None, key[1]):
+                    del self._usage[key]
+
+    def fill(self, pokemon, season, rule):
+        """fill_from_usage() with this species' usage, if the set has unknown fields"""
+        if not pokemon.pokemon_id:
+            return pokemon
+        if not any(_missing(getattr(pokemon, field)) for field in SINGLE_FIELDS) and \
+                not all(_missing(move) for move in pokemon.moves):
+            return pokemon
+        return fill_from_usage(pokemon, self.usage(pokemon.pokemon_id, season, rule))
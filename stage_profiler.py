@@ -0,0 +1,335 @@
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def _func_label(func):
+    filename, lineno, name = func
+    return f"{os.path.basename(filename)}:{lineno}({name})"
+
+
+class StageProfiler:
+    """
+    cProfile + tracemalloc profiling of each pipeline stage
+
+    Attach to a RunMetrics (metrics.profiler = StageProfiler(...)) and every
+    metrics.timer() stage is profiled. Nested stages are attributed to the
+    innermost stage: the enclosing stage's profiler is paused meanwhile.
+
+    Memory is measured cheaply per stage call as the change in traced memory
+    (inclusive of nested stages). Allocation sites need tracemalloc snapshots,
+    whose cost grows with the traced heap, so they are taken at entry and exit
+    of every snapshot_every-th outermost call of each stage (the first call
+    included) and the differences summed per stage. Traced memory is
+    process-wide, so calls that overlap a stage running in another thread
+    (e.g. prefetch workers) are counted but not measured.
+
+    write_reports() produces per stage a <stage>.prof pstats dump and a
+    <stage>.txt table of hot functions and top allocation sites,
+    allocations.txt with every stage's sites, plus summary.json, which
+    diff_runs() compares between two runs.
+    """
+
+    def __init__(self, output_dir, top=25, trace_memory=True, memory_frames=1, snapshot_every=10):
+        self.output_dir = output_dir
+        self.top = top
+        self.trace_memory = trace_memory
+        self.memory_frames = memory_frames
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # stage -> list of cProfile.Profile (one per thread that ran it)
+        self._profiles = {}
+        # stage -> [net traced bytes, measured calls]
+        self._memory = {}
+        # stage -> calls not measured because another thread was in a stage
+        self._overlapped = {}
+        # Memory measurements in progress, by id
+        self._active = {}
+        # stage -> outermost calls so far, and stage -> site -> [net bytes, net blocks]
+        self._outermost_calls = {}
+        self._sites = {}
+        # stage -> outermost calls whose allocation sites were measured
+        self._sampled = {}
+        self._started_tracing = False
+        self._calls = {}
+        self._seconds = {}
+        self.skipped = 0
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+            self._local.profiles = {}
+        return self._local.stack
+
+    def _profile_for(self, stage):
+        profile = self._local.profiles.get(stage)
+        if profile is None:
+            profile = self._local.profiles[stage] = cProfile.Profile()
+            with self._lock:
+                self._profiles.setdefault(stage, []).append(profile)
+        return profile
+
+    @contextmanager
+    def stage(self, name):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if parent is not None:
+            parent.disable()
+
+        # Before profiling starts, so tracemalloc itself stays out of the profile
+        memory = self._enter_memory(name, outermost=not stack) if self.trace_memory else None
+
+        profile = self._profile_for(name)
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active (e.g. a concurrent thread on Python 3.12+)
+            profile = None
+            with self._lock:
+                self.skipped += 1
+
+        stack.append(profile or _NullProfile)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if profile is not None:
+                profile.disable()
+            if memory is not None:
+                self._exit_memory(name, memory)
+            with self._lock:
+                self._calls[name] = self._calls.get(name, 0) + 1
+                self._seconds[name] = self._seconds.get(name, 0.0) + elapsed
+            if parent is not None:
+                try:
+                    parent.enable()
+                except ValueError:
+                    pass
+
+    def _enter_memory(self, stage, outermost):
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.memory_frames)
+                self._started_tracing = True
+            sample = False
+            if outermost:
+                calls = self._outermost_calls.get(stage, 0)
+                self._outermost_calls[stage] = calls + 1
+                sample = calls % self.snapshot_every == 0
+            record = {'thread': threading.get_ident(), 'overlapped': False, 'snapshot': None,
+                      'before': tracemalloc.get_traced_memory()[0]}
+            for other in self._active.values():
+                if other['thread'] != record['thread']:
+                    other['overlapped'] = record['overlapped'] = True
+            self._active[id(record)] = record
+        if sample and not record['overlapped']:
+            record['snapshot'] = tracemalloc.take_snapshot()
+        return record
+
+    def _exit_memory(self, stage, record):
+        current = tracemalloc.get_traced_memory()[0]
+        after = None
+        if record['snapshot'] is not None and not record['overlapped']:
+            after = tracemalloc.take_snapshot()
+        with self._lock:
+            del self._active[id(record)]
+            if record['overlapped']:
+                self._overlapped[stage] = self._overlapped.get(stage, 0) + 1
+                return
+            entry = self._memory.setdefault(stage, [0, 0])
+            entry[0] += current - record['before']
+            entry[1] += 1
+        if after is not None:
+            self._add_sites(stage, record['snapshot'], after)
+
+    def _add_sites(self, stage, before, after):
+        """Add the net allocations between two snapshots to the stage's allocation sites"""
+        # Leave out the profiler's own bookkeeping
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, cProfile.__file__),
+                   tracemalloc.Filter(False, __file__)]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+        with self._lock:
+            sites = self._sites.setdefault(stage, {})
+            for stat in diff:
+                if not stat.size_diff:
+                    continue
+                frame = stat.traceback[0]
+                entry = sites.setdefault(f"{os.path.basename(frame.filename)}:{frame.lineno}", [0, 0])
+                entry[0] += stat.size_diff
+                entry[1] += stat.count_diff
+            self._sampled[stage] = self._sampled.get(stage, 0) + 1
+
+    def stage_allocations(self, stage):
+        """Top allocation sites (net new memory over the sampled calls) of one stage"""
+        sites = [(site, size, count) for site, (size, count) in self._sites.get(stage, {}).items() if size > 0]
+        sites.sort(key=lambda item: -item[1])
+        return [{'site': site, 'size_kb': round(size / 1024, 1), 'count': count}
+                for site, size, count in sites[:self.top]]
+
+    def _stats(self, stage):
+        profiles = [p for p in self._profiles.get(stage, []) if p.getstats()]
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def stage_summary(self, stage):
+        """Hot functions (by own time) and allocation sites of one stage"""
+        functions = []
+        stats = self._stats(stage)
+        if stats is not None:
+            rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])
+            for func, (cc, ncalls, tottime, cumtime, _) in rows[:self.top]:
+                functions.append({'function': _func_label(func), 'ncalls': ncalls,
+                                  'tottime': round(tottime, 6), 'cumtime': round(cumtime, 6)})
+
+        net_bytes, measured = self._memory.get(stage, (0, 0))
+        return {
+            'calls': self._calls.get(stage, 0),
+            'total_seconds': round(self._seconds.get(stage, 0.0), 6),
+            'top_functions': functions,
+            'memory_net_kb': round(net_bytes / 1024, 1),
+            'memory_measured_calls': measured,
+            'memory_overlapped_calls': self._overlapped.get(stage, 0),
+            'allocation_sampled_calls': self._sampled.get(stage, 0),
+            'top_allocations': self.stage_allocations(stage),
+        }
+
+    def write_reports(self):
+        """
+        Write per-stage reports, allocations.txt and summary.json to output_dir
+
+        Stops tracemalloc if this profiler started it.
+
+        Returns:
+            str: Path of summary.json
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        summary = {}
+        for stage in sorted(self._calls):
+            summary[stage] = self.stage_summary(stage)
+            stats = self._stats(stage)
+            if stats is not None:
+                stats.dump_stats(os.path.join(self.output_dir, f"{stage}.prof"))
+
+            out = io.StringIO()
+            out.write(f"Stage {stage}: {summary[stage]['calls']} calls, "
+                      f"{summary[stage]['total_seconds']:.3f}s\n\n")
+            if stats is not None:
+                for sort_key in ('tottime', 'cumulative'):
+                    out.write(f"Hot functions by {sort_key}:\n")
+                    stats.stream = out
+                    stats.sort_stats(sort_key).print_stats(self.top)
+            out.write(f"Net traced memory: {summary[stage]['memory_net_kb']:.1f} KiB over "
+                      f"{summary[stage]['memory_measured_calls']} calls "
+                      f"({summary[stage]['memory_overlapped_calls']} overlapping other threads, not measured)\n")
+            out.write(_allocation_table(summary[stage]))
+            with open(os.path.join(self.output_dir, f"{stage}.txt"), 'w', encoding='utf-8') as f:
+                f.write(out.getvalue())
+
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        with open(os.path.join(self.output_dir, 'allocations.txt'), 'w', encoding='utf-8') as f:
+            for stage in sorted(summary):
+                if summary[stage]['top_allocations']:
+                    f.write(f"Stage {stage}:\n{_allocation_table(summary[stage])}\n")
+
+        summary_path = os.path.join(self.output_dir, 'summary.json')
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump({'stages': summary, 'skipped_nested_profiles': self.skipped}, f, indent=2)
+        return summary_path
+
+
+def _allocation_table(stage_summary):
+    out = io.StringIO()
+    out.write(f"Top allocation sites (net new memory over {stage_summary['allocation_sampled_calls']} "
+              f"sampled calls):\n")
+    for entry in stage_summary['top_allocations']:
+        out.write(f"  {entry['size_kb']:>10.1f} KiB {entry['count']:>8} blocks  {entry['site']}\n")
+    return out.getvalue()
+
+
+class _NullProfile:
+    """Stand-in on the stage stack when a stage could not be profiled"""
+
+    @staticmethod
+    def enable():
+        pass
+
+    @staticmethod
+    def disable():
+        pass
+
+
+def _function_times(run_dir, stage):
+    path = os.path.join(run_dir, f"{stage}.prof")
+    if not os.path.exists(path):
+        return {}
+    stats = pstats.Stats(path)
+    return {_func_label(func): tottime for func, (_, _, tottime, _, _) in stats.stats.items()}
+
+
+def diff_runs(run_a, run_b, top=15):
+    """
+    Compare two profiled runs stage by stage
+
+    Returns:
+        str: Report of stage time changes, the functions whose own time changed
+        most, and allocation site changes per stage
+    """
+    with open(os.path.join(run_a, 'summary.json'), encoding='utf-8') as f:
+        summary_a = json.load(f)
+    with open(os.path.join(run_b, 'summary.json'), encoding='utf-8') as f:
+        summary_b = json.load(f)
+    stages_a, stages_b = summary_a['stages'], summary_b['stages']
+
+    out = io.StringIO()
+    for stage in sorted(set(stages_a) | set(stages_b)):
+        a, b = stages_a.get(stage), stages_b.get(stage)
+        seconds_a = a['total_seconds'] if a else 0.0
+        seconds_b = b['total_seconds'] if b else 0.0
+        out.write(f"== {stage}: {seconds_a:.3f}s -> {seconds_b:.3f}s ({seconds_b - seconds_a:+.3f}s)\n")
+
+        times_a, times_b = _function_times(run_a, stage), _function_times(run_b, stage)
+        deltas = sorted(((times_b.get(func, 0.0) - times_a.get(func, 0.0), func)
+                         for func in set(times_a) | set(times_b)), key=lambda item: -abs(item[0]))
+        for delta, func in deltas[:top]:
+            if delta:
+                out.write(f"  {delta:+10.4f}s  {func}\n")
+
+        memory_a = (a or {}).get('memory_net_kb', 0.0)
+        memory_b = (b or {}).get('memory_net_kb', 0.0)
+        if memory_a != memory_b:
+            out.write(f"  net memory {memory_a:.1f} -> {memory_b:.1f} KiB\n")
+
+        allocs_a = {e['site']: e['size_kb'] for e in (a or {}).get('top_allocations', [])}
+        allocs_b = {e['site']: e['size_kb'] for e in (b or {}).get('top_allocations', [])}
+        alloc_deltas = sorted(((allocs_b.get(site, 0.0) - allocs_a.get(site, 0.0), site)
+                               for site in set(allocs_a) | set(allocs_b)), key=lambda item: -abs(item[0]))
+        for delta, site in alloc_deltas[:top]:
+            if delta:
+                out.write(f"  {delta:+10.1f} KiB  {site}\n")
+    return out.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two profiled runs (see --profile)")
+    parser.add_argument('run_a', help='Profile directory of the baseline run')
+    parser.add_argument('run_b', help='Profile directory of the run to compare')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+    print(diff_runs(args.run_a, args.run_b, args.top))
@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+try:
+    import psutil
+except ImportError:  # optional, only adds the time since process start to the report
+    psutil = None
+
+# Time from importing the GUI script until the main window is idle and visible.
+# Interpreter start-up and PyInstaller onefile unpacking come before the script
+# and are reported separately (process_startup_ms) when psutil is installed.
+STARTUP_BUDGET_MS = 400
+
+# Stacks the GUI defers until the first button press; none of them may be
+# imported before the window appears.
+HEAVY_MODULES = ['requests', 'bs4', 'googleapiclient', 'google.oauth2', 'numpy', 'pyarrow']
+DEFERRED_MODULES = ['pokemon_scraper', 'sheets_uploader', 'trainer_export', 'trainer_store']
+
+GUI_SCRIPT = 'pokemon_sv_uploader.py'
+
+
+def process_start_time():
+    """
+    Unix time the application process started, or None without psutil
+
+    A PyInstaller onefile build runs as two processes: the bootloader unpacks
+    the bundle, then starts the interpreter as its child. The bootloader's
+    start is used there, so the unpacking is included.
+    """
+    if psutil is None:
+        return None
+    process = psutil.Process()
+    try:
+        parent = process.parent()
+        if getattr(sys, 'frozen', False) and parent is not None and parent.exe() == process.exe():
+            return parent.create_time()
+    except psutil.Error:
+        pass
+    return process.create_time()
+
+
+def build_startup_report(start_time, budget_ms=STARTUP_BUDGET_MS):
+    """
+    Summarize the current process start-up
+
+    Args:
+        start_time (float): time.perf_counter() taken when the GUI script was imported
+
+    Returns:
+        dict: Elapsed time since the script import (checked against the
+        budget) and since process start (None without psutil), budget and
+        any heavy modules that were imported eagerly
+    """
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    started = process_start_time()
+    eager = [name for name in HEAVY_MODULES if name in sys.modules]
+    return {
+        'startup_ms': round(elapsed_ms, 1),
+        'process_startup_ms': round((time.time() - started) * 1000, 1) if started else None,
+        'budget_ms': budget_ms,
+        'within_budget': elapsed_ms <= budget_ms and not eager,
+        'eager_heavy_modules': eager,
+        'frozen': bool(getattr(sys, 'frozen', False)),
+    }
+
+
+def import_time_table(module, top=15):
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Returns:
+        list: (cumulative_ms, self_ms, module name), slowest first
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def measure_deferred_imports(modules=DEFERRED_MODULES):
+    """
+    Time importing each deferred stack in-process (works in a frozen build too)
+
+    Modules are imported in order, so each figure only includes dependencies
+    not already loaded by the previous ones.
+    """
+    timings = []
+    for module in modules:
+        start = time.perf_counter()
+        try:
+            __import__(module)
+            error = None
+        except ImportError as e:
+            error = str(e)
+        timings.append((module, round((time.perf_counter() - start) * 1000, 1), error))
+    return timings
+
+
+def measure_cold_start(runs=5):
+    """Launch the GUI with --startup-report several times and collect the reports"""
+    reports = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, GUI_SCRIPT, '--startup-report'],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        lines = [line for line in result.stdout.splitlines() if line.startswith('{')]
+        if result.returncode != 0 or not lines:
+            raise RuntimeError(f"GUI start-up failed: {result.stderr.strip()}")
+        reports.append(json.loads(lines[-1]))
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure GUI cold start against the start-up budget")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    reports = measure_cold_start(args.runs)
+    median_ms = statistics.median(report['startup_ms'] for report in reports)
+    eager = sorted({name for report in reports for name in report['eager_heavy_modules']})
+    print(f"Start-up from script import: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(budget {STARTUP_BUDGET_MS} ms)")
+    if reports[0]['process_startup_ms'] is not None:
+        process_ms = statistics.median(report['process_startup_ms'] for report in reports)
+        print(f"Start-up from process start: median {process_ms:.1f} ms")
+    if eager:
+        print(f"Heavy modules imported before the window appeared: {', '.join(eager)}")
+
+    print(f"\nImport time of {GUI_SCRIPT} (cumulative ms / self ms):")
+    for cumulative_ms, self_ms, name in import_time_table('pokemon_sv_uploader', args.top):
+        print(f"  {cumulative_ms:8.1f} {self_ms:8.1f}  {name}")
+
+    print("\nDeferred stacks (loaded on first button press):")
+    for module, elapsed_ms, error in measure_deferred_imports():
+        print(f"  {elapsed_ms:8.1f} ms  {module}" + (f"  (not importable: {error})" if error else ""))
+
+    sys.exit(0 if median_ms <= STARTUP_BUDGET_MS and not eager else 1)
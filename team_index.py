@@ -0,0 +1,231 @@
+import argparse
+from collections import Counter
+
+import numpy as np
+
+from pokedex import DEX_BY_NAME, dex_number
+from trainer_records import load_trainers
+
+# Pokemon without a resolvable Pokedex number get bits from here on
+SYNTHETIC_BASE = 1100
+
+# MinHash: h(x) = (a * x + b) mod MERSENNE_PRIME, one (a, b) pair per permutation
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+class TeamIndex:
+    """
+    Similar-team search over scraped teams
+
+    Each team is a bitset (int) over Pokedex numbers. An inverted index from
+    species to teams counts shared members for every candidate at once, so
+    exact top-k Jaccard search only touches teams sharing at least one
+    member. For large archives MinHash signatures are bucketed with LSH
+    (bands x rows), and only teams colliding in some band are scored.
+    Implements add_trainer()/close(), so it can be passed to the scraper as a
+    sink and grows as trainers are scraped.
+    """
+
+    def __init__(self, num_perm=32, bands=8, lsh_threshold=20000, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        # Above this many teams, queries use the LSH buckets unless told otherwise
+        self.lsh_threshold = lsh_threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+
+        self.trainers = []
+        self.seasons = []
+        self.masks = []
+        self.postings = {}  # species index -> list of team numbers
+        self.buckets = [{} for _ in range(bands)]  # band -> signature slice -> team numbers
+        self._synthetic = {}
+
+    def __len__(self):
+        return len(self.masks)
+
+    def _species_index(self, pokemon):
+        if pokemon.pokemon_id:
+            return dex_number(pokemon.pokemon_id)
+        if pokemon.name in DEX_BY_NAME:
+            return DEX_BY_NAME[pokemon.name]
+        return self._synthetic.setdefault(pokemon.name, SYNTHETIC_BASE + len(self._synthetic))
+
+    def members(self, query):
+        """
+        Species indices of a query team
+
+        Args:
+            query: A Trainer, or an iterable of PokemonSet records, Pokemon
+                names, pokemon ids ("0445-00") or Pokedex numbers
+        """
+        pokemon = getattr(query, 'pokemon', query)
+        indices = set()
+        for member in pokemon:
+            if isinstance(member, int):
+                indices.add(member)
+            elif isinstance(member, str):
+                if member in DEX_BY_NAME:
+                    indices.add(DEX_BY_NAME[member])
+                elif member[:4].isdigit():
+                    indices.add(dex_number(member))
+                elif member in self._synthetic:
+                    indices.add(self._synthetic[member])
+            else:
+                indices.add(self._species_index(member))
+        return indices
+
+    def _signature(self, indices):
+        x = np.fromiter(indices, dtype=np.int64)
+        return ((self._a[:, None] * x[None, :] + self._b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        step = self.rows_per_band
+        return [signature[band * step:(band + 1) * step].tobytes() for band in range(self.bands)]
+
+    def add_trainer(self, trainer, season=None):
+        indices = {self._species_index(pokemon) for pokemon in trainer.pokemon}
+        team = len(self.masks)
+        mask = 0
+        for index in indices:
+            mask |= 1 << index
+            self.postings.setdefault(index, []).append(team)
+        self.trainers.append(trainer)
+        self.seasons.append(season if season is not None else trainer.season)
+        self.masks.append(mask)
+        if indices:
+            for band, key in enumerate(self._band_keys(self._signature(indices))):
+                self.buckets[band].setdefault(key, []).append(team)
+
+    def add_trainers(self, trainers, season=None):
+        for trainer in trainers:
+            self.add_trainer(trainer, season)
+
+    def close(self):
+        pass
+
+    def _candidates(self, indices, approximate):
+        """Teams worth scoring, with their number of shared members"""
+        if approximate:
+            teams = set()
+            for band, key in enumerate(self._band_keys(self._signature(indices))):
+                teams.update(self.buckets[band].get(key, ()))
+            mask = sum(1 << index for index in indices)
+            return {team: popcount(self.masks[team] & mask) for team in teams}
+        shared = Counter()
+        for index in indices:
+            shared.update(self.postings.get(index, ()))
+        return shared
+
+    def similar(self, query, k=10, min_shared=1, approximate=None, exclude=None):
+        """
+        Most similar teams by Jaccard similarity of their members
+
+        Args:
+            query: Team to compare against (see members())
+            k (int): Number of results
+            min_shared (int): Only teams sharing at least this many members
+            approximate (bool, optional): Use the LSH buckets; defaults to
+                True once the index holds lsh_threshold teams. Falls back to
+                the exact search when the buckets yield fewer than k results
+                (e.g. partial teams, whose Jaccard is low by construction)
+            exclude (int, optional): Team number to leave out (the query itself)
+
+        Returns:
+            list: (jaccard, shared members, team number), best first
+        """
+        indices = self.members(query)
+        if not indices:
+            return []
+        if approximate is None:
+            approximate = len(self) >= self.lsh_threshold
+
+        results = self._score(indices, self._candidates(indices, approximate), min_shared, exclude)
+        if approximate and len(results) < k:
+            results = self._score(indices, self._candidates(indices, False), min_shared, exclude)
+        return results[:k]
+
+    def _score(self, indices, candidates, min_shared, exclude):
+        size = len(indices)
+        results = []
+        for team, shared in candidates.items():
+            if team == exclude or shared < max(min_shared, 1):
+                continue
+            union = size + popcount(self.masks[team]) - shared
+            results.append((shared / union, shared, team))
+        results.sort(key=lambda result: (-result[0], -result[1], result[2]))
+        return results
+
+    def similar_to_team(self, team, **kwargs):
+        """similar() for a team already in the index, leaving the team itself out"""
+        return self.similar(self.trainers[team], exclude=team, **kwargs)
+
+    def find(self, rank=None, article_url=None, season=None):
+        """Team numbers matching a rank and/or article URL (and season)"""
+        return [team for team, trainer in enumerate(self.trainers)
+                if (rank is None or trainer.rank == rank)
+                and (article_url is None or trainer.article_url == article_url)
+                and (season is None or self.seasons[team] == season)]
+
+
+def index_from_files(paths):
+    """Build a TeamIndex from trainer_data.json files and/or SQLite stores (every season)"""
+    from trainer_store import TrainerStore, is_store_path
+
+    index = TeamIndex()
+    for path in paths:
+        if is_store_path(path):
+            with TrainerStore(path) as store:
+                for season, rule, party in store.season_keys():
+                    index.add_trainers(store.load_trainers(season, rule, party), season)
+        else:
+            index.add_trainers(load_trainers(path))
+    return index
+
+
+def _describe(index, team):
+    trainer = index.trainers[team]
+    season = index.seasons[team]
+    names = ", ".join(pokemon.name for pokemon in trainer.pokemon)
+    prefix = f"S{season} " if season is not None else ""
+    return f"{prefix}#{trainer.rank} {trainer.trainer_name}: {names}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Team similarity queries over scraped teams")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    similar = subcommands.add_parser('similar', help='Find teams sharing members with a team')
+    similar.add_argument('data_files', nargs='+', help='trainer_data.json files and/or SQLite stores')
+    query = similar.add_mutually_exclusive_group(required=True)
+    query.add_argument('--team', help='Comma-separated Pokemon names or ids, e.g. ガブリアス,0887-00')
+    query.add_argument('--rank', type=int, help='Team of the trainer with this rank')
+    query.add_argument('--article', help='Team of the trainer with this article URL')
+    similar.add_argument('--season', type=int, help='Season of --rank / --article in a multi-season store')
+    similar.add_argument('--k', type=int, default=10)
+    similar.add_argument('--min-shared', type=int, default=1)
+    similar.add_argument('--approximate', action='store_true', help='Use MinHash/LSH buckets')
+    args = parser.parse_args()
+
+    index = index_from_files(args.data_files)
+    if args.team:
+        queries = [([member.strip() for member in args.team.split(',')], None)]
+    else:
+        teams = index.find(rank=args.rank, article_url=args.article, season=args.season)
+        if not teams:
+            parser.error("no team matches the query")
+        queries = [(index.trainers[team], team) for team in teams]
+
+    for team_query, team in queries:
+        if team is not None:
+            print(f"Similar to {_describe(index, team)}")
+        for jaccard, shared, match in index.similar(team_query, args.k, args.min_shared,
+                                                    approximate=args.approximate or None, exclude=team):
+            print(f"  {jaccard:.2f} ({shared} shared) {_describe(index, match)}")
@@ -0,0 +1,128 @@
+import time
+from email.utils import formatdate
+
+from adaptive_throttle import AdaptiveThrottle, parse_retry_after
+from run_metrics import RunMetrics
+
+HOST = 'sv.pokedb.tokyo'
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def make_throttle(**kwargs):
+    options = dict(min_delay=0.0, initial_delay=0.0, delay_step=0.05, metrics=RunMetrics())
+    options.update(kwargs)
+    return AdaptiveThrottle(**options)
+
+
+def request(throttle, response, elapsed=0.01):
+    throttle.acquire(HOST)
+    throttle.release(HOST, elapsed, response)
+
+
+def test_successes_raise_limit_up_to_ceiling():
+    throttle = make_throttle(max_concurrency=3)
+    assert throttle.limits(HOST) == (1, 0.0)
+    for _ in range(20):
+        request(throttle, FakeResponse())
+    assert throttle.limits(HOST) == (3, 0.0)
+
+
+def test_successes_shorten_delay_to_floor():
+    throttle = make_throttle(min_delay=0.0, initial_delay=0.1, delay_step=0.05)
+    request(throttle, FakeResponse())
+    assert throttle.limits(HOST)[1] == 0.05
+    request(throttle, FakeResponse())
+    request(throttle, FakeResponse())
+    assert throttle.limits(HOST)[1] == 0.0
+
+
+def test_failure_halves_limit_and_doubles_delay():
+    throttle = make_throttle(initial_concurrency=4, max_concurrency=4, initial_delay=0.0)
+    request(throttle, FakeResponse(503))
+    assert throttle.limits(HOST) == (2, 0.05)
+    assert throttle.metrics.counter('throttle_backoffs_total', host=HOST, reason='error') == 1
+
+
+def test_connection_error_counts_as_failure():
+    throttle = make_throttle(initial_concurrency=4, max_concurrency=4)
+    request(throttle, None)
+    assert throttle.limits(HOST)[0] == 2
+
+
+def test_backs_off_once_per_round_trip():
+    throttle = make_throttle(initial_concurrency=4, max_concurrency=4, initial_delay=0.0)
+    for _ in range(3):
+        throttle.acquire(HOST)
+    # Three requests already in flight fail together: only one decrease
+    for _ in range(3):
+        throttle.release(HOST, 0.01, FakeResponse(429))
+    assert throttle.limits(HOST) == (2, 0.05)
+    assert throttle.metrics.counter('throttle_backoffs_total') == 1
+
+    # A failure after the round trip has passed backs off again
+    time.sleep(0.06)
+    request(throttle, FakeResponse(429))
+    assert throttle.limits(HOST) == (1, 0.1)
+
+
+def test_limit_stays_above_floor():
+    throttle = make_throttle(min_concurrency=1, initial_concurrency=1)
+    request(throttle, FakeResponse(500))
+    assert throttle.limits(HOST)[0] == 1
+
+
+def test_recovers_after_backoff():
+    throttle = make_throttle(initial_concurrency=4, max_concurrency=4, initial_delay=0.0)
+    request(throttle, FakeResponse(503))
+    assert throttle.limits(HOST)[0] == 2
+    # Additive increase: about +1 per limit's worth of successes
+    for _ in range(6):
+        request(throttle, FakeResponse())
+    assert throttle.limits(HOST) == (4, 0.0)
+
+
+def test_retry_after_blocks_host():
+    throttle = make_throttle()
+    request(throttle, FakeResponse(429, {'Retry-After': '1'}))
+    start = time.monotonic()
+    throttle.acquire(HOST)
+    assert time.monotonic() - start >= 0.9
+    throttle.release(HOST, 0.01, FakeResponse())
+
+
+def test_error_rate_backs_off_on_success():
+    throttle = make_throttle(initial_concurrency=4, max_concurrency=4, max_error_rate=0.1)
+    state = throttle._state(HOST)
+    state.failures.extend([True] * 2 + [False] * 8)
+    request(throttle, FakeResponse())
+    assert throttle.limits(HOST)[0] == 2
+    assert throttle.metrics.counter('throttle_backoffs_total', host=HOST, reason='error_rate') == 1
+
+
+def test_high_latency_backs_off():
+    throttle = make_throttle(initial_concurrency=4, max_concurrency=4, max_latency=1.0)
+    for _ in range(10):
+        request(throttle, FakeResponse(), elapsed=2.0)
+    assert throttle.limits(HOST)[0] == 2
+    assert throttle.metrics.counter('throttle_backoffs_total', host=HOST, reason='latency') == 1
+
+
+def test_limits_accepts_url():
+    throttle = make_throttle()
+    request(throttle, FakeResponse(503))
+    assert throttle.limits(f'https://{HOST}/trainer/list') == throttle.limits(HOST)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(' 3 ') == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('') is None
+    assert parse_retry_after('soon') is None
+    assert 50 <= parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
@@ -0,0 +1,101 @@
+import pytest
+
+pytest.importorskip('zstandard')
+
+from page_archive import PageArchive
+
+LIST_URL = 'https://sv.pokedb.tokyo/trainer/list?season=27&page=1'
+ARTICLE_URL = 'https://example.hatenablog.com/entry/2025/01/01'
+
+
+def test_put_and_get(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        assert archive.get(LIST_URL) is None
+        assert archive.put(LIST_URL, b'<html>page 1</html>', fetched_at=100.0) is True
+        assert archive.get(LIST_URL) == b'<html>page 1</html>'
+        # str bodies are stored as UTF-8
+        archive.put(ARTICLE_URL, '構築記事', fetched_at=100.0)
+        assert archive.get(ARTICLE_URL) == '構築記事'.encode('utf-8')
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        assert archive.put(LIST_URL, b'same', fetched_at=100.0) is True
+        assert archive.put(LIST_URL, b'same', fetched_at=200.0) is False
+        assert archive.put(ARTICLE_URL, b'same', fetched_at=200.0) is False
+        stats = archive.stats()
+        assert stats['bodies'] == 1
+        assert stats['urls'] == 2
+        # An unchanged body adds no history entry
+        assert stats['versions'] == 2
+        assert archive.history(LIST_URL) == [(100.0, archive.history(ARTICLE_URL)[0][1])]
+
+
+def test_history_and_get_at(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        archive.put(LIST_URL, b'v1', fetched_at=100.0)
+        archive.put(LIST_URL, b'v2', fetched_at=200.0)
+        archive.put(LIST_URL, b'v1', fetched_at=300.0)
+        assert [fetched_at for fetched_at, _ in archive.history(LIST_URL)] == [100.0, 200.0, 300.0]
+        assert archive.stats()['bodies'] == 2
+        assert archive.get(LIST_URL) == b'v1'
+        assert archive.get(LIST_URL, at=250.0) == b'v2'
+        assert archive.get(LIST_URL, at=150.0) == b'v1'
+        assert archive.get(LIST_URL, at=50.0) is None
+
+
+def test_scan_filters_by_prefix_and_time(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        archive.put(LIST_URL, b'list', fetched_at=100.0)
+        archive.put(ARTICLE_URL, b'article', fetched_at=100.0)
+        archive.put(ARTICLE_URL, b'article v2', fetched_at=200.0)
+        assert [body for _, _, body in archive.scan()] == [b'list', b'article', b'article v2']
+        assert [body for _, _, body in archive.scan('https://example.')] == [b'article', b'article v2']
+        assert list(archive.scan(since=150.0)) == [(ARTICLE_URL, 200.0, b'article v2')]
+
+
+def test_segments_roll_over(tmp_path):
+    bodies = [bytes([n]) * 64 + str(n).encode() for n in range(10)]
+    with PageArchive(str(tmp_path), max_segment_bytes=64) as archive:
+        for n, body in enumerate(bodies):
+            archive.put(f'{ARTICLE_URL}/{n}', body, fetched_at=100.0)
+        assert len(archive.segments()) > 1
+        assert [archive.get(f'{ARTICLE_URL}/{n}') for n in range(10)] == bodies
+    assert all(path.suffix == '.zst' for path in tmp_path.glob('segment-*'))
+
+
+def test_reopen_keeps_pages(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        archive.put(LIST_URL, b'v1', fetched_at=100.0)
+    with PageArchive(str(tmp_path)) as archive:
+        assert archive.get(LIST_URL) == b'v1'
+        assert archive.put(LIST_URL, b'v1', fetched_at=200.0) is False
+        assert archive.put(LIST_URL, b'v2', fetched_at=300.0) is True
+        assert archive.stats()['segments'] == 1
+
+
+def test_scraper_counts_written_and_deduplicated_bodies(tmp_path):
+    requests = pytest.importorskip('requests')
+    pytest.importorskip('bs4')
+    from adaptive_throttle import AdaptiveThrottle
+    from pokemon_scraper import PokemonSVScraper
+
+    class Session:
+        def get(self, url, timeout=None, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b'<html>same page</html>'
+            response.url = url
+            return response
+
+    scraper = PokemonSVScraper(log=lambda message: None)
+    scraper.throttle = AdaptiveThrottle(min_delay=0.0, initial_delay=0.0)
+    scraper.session = Session()
+    with PageArchive(str(tmp_path)) as archive:
+        scraper.archive = archive
+        scraper._get(LIST_URL, 'list_page_fetch')
+        scraper._get(LIST_URL, 'list_page_fetch')
+        scraper._get(ARTICLE_URL, 'article_fetch')
+        assert scraper.metrics.counter('archive_bodies_written_total') == 1
+        assert scraper.metrics.counter('archive_bodies_deduplicated_total') == 2
+        assert archive.get(ARTICLE_URL) == b'<html>same page</html>'
@@ -0,0 +1,53 @@
+import re
+
+from parse_cache import ParseCache, body_hash, rules_version
+from trainer_records import PokemonSet
+
+GARCHOMP = PokemonSet('ガブリアス', 'こだわりスカーフ', 'さめはだ', 'ようき', 'じめん',
+                      ('じしん', 'げきりん', 'ステルスロック', 'がんせきふうじ'),
+                      (4, 252, 0, 0, 0, 252), pokemon_id='0445-00')
+
+
+def test_round_trip(tmp_path):
+    digest = body_hash('<html>article</html>')
+    with ParseCache(str(tmp_path / 'cache.db'), 'v1') as cache:
+        assert cache.get(digest, '0445-00') is None
+        cache.put(digest, '0445-00', GARCHOMP)
+        assert cache.get(digest, '0445-00') == GARCHOMP
+        assert cache.get(digest, '0887-00') is None
+        assert len(cache) == 1
+
+
+def test_entries_survive_reopen_with_same_version(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    digest = body_hash(b'body')
+    with ParseCache(path, 'v1') as cache:
+        cache.put(digest, '0445-00', GARCHOMP)
+    with ParseCache(path, 'v1') as cache:
+        assert cache.get(digest, '0445-00') == GARCHOMP
+
+
+def test_new_rules_version_drops_old_entries(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    digest = body_hash(b'body')
+    old_version = rules_version([re.compile(r'持ち物[:：]\s*(\S+)')], {'ガブ': 'ガブリアス'}, 1)
+    new_version = rules_version([re.compile(r'持ち物[:：]\s*(\S+)')], {'ガブ': 'ガブリアス'}, 2)
+    assert old_version != new_version
+
+    with ParseCache(path, old_version) as cache:
+        cache.put(digest, '0445-00', GARCHOMP)
+    with ParseCache(path, new_version) as cache:
+        assert len(cache) == 0
+        assert cache.get(digest, '0445-00') is None
+
+
+def test_rules_version_tracks_rule_content():
+    rules = [re.compile(r'特性[:：]\s*(\S+)')]
+    assert rules_version(rules, {'a': 1, 'b': 2}) == rules_version(rules, {'b': 2, 'a': 1})
+    assert rules_version(rules) != rules_version([re.compile(r'特性:\s*(\S+)')])
+    assert rules_version(rules, 1) != rules_version(rules, 2)
+
+
+def test_body_hash_treats_str_as_utf8():
+    assert body_hash('構築記事') == body_hash('構築記事'.encode('utf-8'))
+    assert body_hash('a') != body_hash('b')
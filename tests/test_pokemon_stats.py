@@ -0,0 +1,93 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from pokemon_stats import DISTRIBUTION_FIELDS, UsageStats, stats_from_trainers
+from trainer_records import UNKNOWN, PokemonSet, Trainer
+
+
+def mon(name, item='', tera_type='', moves=()):
+    return PokemonSet(name, item, tera_type=tera_type, moves=moves)
+
+
+def team(rank, *pokemon):
+    return Trainer(rank, 2000 - rank, f'trainer{rank}', pokemon=pokemon)
+
+
+SEASON_A = [
+    team(1, mon('ガブリアス', 'こだわりスカーフ', 'じめん', ('じしん', 'げきりん')),
+         mon('カイリュー', 'こだわりハチマキ', 'ノーマル', ('しんそく',)), mon('新ポケモンX', 'たべのこし')),
+    team(2, mon('ガブリアス', 'きあいのタスキ', 'じめん', ('じしん', 'ステルスロック')),
+         mon('バンギラス', UNKNOWN, UNKNOWN, (UNKNOWN,) * 4)),
+]
+SEASON_B = [
+    team(1, mon('新ポケモンY', 'たべのこし'), mon('ガブリアス', 'こだわりスカーフ', 'ほのお', ('じしん',)),
+         mon('新ポケモンX', 'オボンのみ')),
+    team(2),
+]
+
+
+def summary(stats):
+    """name -> (usage, teammate counts, field value counts), independent of row and column order"""
+    result = {}
+    for index in stats.top_pokemon(k=stats.capacity):
+        name = stats.name_of(index)
+        teammates = {stats.name_of(i): count for i, count, _ in stats.top_teammates(index, k=100)}
+        fields = {field: {value: count for value, count, _ in stats.distribution(index, field, k=100)}
+                  for field in DISTRIBUTION_FIELDS}
+        result[name] = (int(stats.usage[index]), teammates, fields)
+    return result
+
+
+def test_counts_usage_teammates_and_fields():
+    stats = stats_from_trainers(SEASON_A)
+    assert stats.teams == 2
+    rates = stats.usage_rates()
+    assert rates[445] == 1.0
+    assert rates[248] == 0.5
+    assert stats.name_of(stats.top_pokemon(1)[0]) == 'ガブリアス'
+    assert stats.top_teammates(445) == [(149, 1, 0.5), (248, 1, 0.5), (1100, 1, 0.5)]
+    assert stats.distribution(445, 'move') == [('じしん', 2, 1.0), ('げきりん', 1, 0.5),
+                                               ('ステルスロック', 1, 0.5)]
+    # 不明 values are not counted
+    assert stats.distribution(248, 'item') == []
+
+
+def test_empty_teams_and_repeated_species():
+    stats = UsageStats()
+    stats.add_trainers([team(1), team(2, mon('ガブリアス'), mon('ガブリアス'))])
+    assert stats.teams == 1
+    assert stats.usage[445] == 1
+    assert stats.cooccurrence[445, 445] == 1
+
+
+def test_merge_matches_stats_over_all_teams():
+    merged = stats_from_trainers(SEASON_A).merge(stats_from_trainers(SEASON_B))
+    combined = stats_from_trainers(SEASON_A + SEASON_B)
+    assert merged.teams == combined.teams == 3
+    assert summary(merged) == summary(combined)
+    # Pokemon without a Pokedex number keep their own slots across the merge
+    assert summary(merged)['新ポケモンX'][0] == 2
+    assert summary(merged)['新ポケモンY'][0] == 1
+
+
+def test_merge_grows_capacity():
+    small = UsageStats(capacity=16)
+    small.merge(stats_from_trainers(SEASON_A))
+    assert small.capacity >= 1101
+    assert summary(small) == summary(stats_from_trainers(SEASON_A))
+
+
+def test_to_rows():
+    rows = stats_from_trainers(SEASON_A).to_rows(top=2)
+    assert rows[0] == ["rank", "pokemon", "teams", "usage_rate", "items", "abilities",
+                       "natures", "tera_types", "moves", "teammates"]
+    assert len(rows) == 3
+    rank, name, teams, rate, items, abilities, natures, tera_types, moves, teammates = rows[1]
+    assert (rank, name, teams, rate) == (1, 'ガブリアス', 2, '100.0%')
+    assert items == 'こだわりスカーフ 50%, きあいのタスキ 50%'
+    assert abilities == ''
+    assert tera_types == 'じめん 100%'
+    assert moves == 'じしん 100%, げきりん 50%, ステルスロック 50%'
+    assert teammates == 'カイリュー 50%, バンギラス 50%, 新ポケモンX 50%'
+    assert rows[2][1] == 'カイリュー'
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from preview_index import RecordIndex, TrainerIndex
+from trainer_records import PokemonSet, Trainer, dump_trainers
+
+TRAINERS = [
+    Trainer(1, 2100, 'ゆう"{[', 'https://a.example/1', [
+        PokemonSet('ガブリアス', 'こだわりスカーフ', 'さめはだ', 'ようき', 'じめん', ('じしん',) * 4,
+                   (4, 252, 0, 0, 0, 252)),
+        PokemonSet('カイリュー', 'たべのこし', 'マルチスケイル', 'いじっぱり', 'ノーマル', ('しんそく',) * 4),
+    ]),
+    Trainer(2, 2050, 'back\\slash ]}', 'https://a.example/2', [
+        PokemonSet('サーフゴー', 'こだわりメガネ', 'おうごんのからだ', 'ひかえめ', 'はがね', ('ゴールドラッシュ',) * 4),
+    ]),
+    Trainer(3, 2000, 'three', '', []),
+]
+
+
+def write(path, text):
+    path.write_bytes(text.encode('utf-8'))
+    return str(path)
+
+
+def dicts():
+    return [trainer.to_dict() for trainer in TRAINERS]
+
+
+def check(index):
+    assert len(index) == len(TRAINERS)
+    assert [index.get(i) for i in range(len(index))] == TRAINERS
+    index.close()
+
+
+def test_indent2_file(tmp_path):
+    path = str(tmp_path / 'trainer_data.json')
+    dump_trainers(TRAINERS, path)
+    index = TrainerIndex(path)
+    # The fast path found the elements without tokenizing
+    assert index.spans == index._indent2_spans()
+    check(index)
+
+
+def test_indent2_file_with_crlf(tmp_path):
+    text = json.dumps(dicts(), ensure_ascii=False, indent=2).replace('\n', '\r\n')
+    check(TrainerIndex(write(tmp_path / 'trainer_data.json', text)))
+
+
+@pytest.mark.parametrize('options', [{}, {'separators': (',', ':')}, {'indent': 4}, {'indent': '\t'}])
+def test_other_layouts_are_tokenized(tmp_path, options):
+    text = json.dumps(dicts(), ensure_ascii=False, **options)
+    check(TrainerIndex(write(tmp_path / 'trainer_data.json', text)))
+
+
+def test_json_lines(tmp_path):
+    text = '\n'.join(json.dumps(data, ensure_ascii=False) for data in dicts()) + '\n\n'
+    check(TrainerIndex(write(tmp_path / 'trainer_data.jsonl', text)))
+
+
+@pytest.mark.parametrize('text', ['', '[]', '[\n]\n'])
+def test_empty_files(tmp_path, text):
+    index = TrainerIndex(write(tmp_path / 'trainer_data.json', text))
+    assert len(index) == 0
+    assert len(index.summary()) == 0
+    index.close()
+
+
+def test_summary_and_select(tmp_path):
+    path = str(tmp_path / 'trainer_data.json')
+    dump_trainers(TRAINERS, path)
+    index = TrainerIndex(path)
+    progress = []
+    summary = index.summary(progress=lambda done, total: progress.append((done, total)), chunk=2)
+    index.close()
+    assert progress == [(2, 3), (3, 3)]
+    assert summary.rank == [1, 2, 3]
+    assert summary.pokemon[0] == 'ガブリアス\0カイリュー'
+    assert summary.select(pokemon='カイ') == [0]
+    assert summary.select(item='こだわり') == [0, 1]
+    assert summary.select(item='こだわり', pokemon='サーフ') == [1]
+    assert summary.select(sort_column='rating') == [2, 1, 0]
+    assert summary.select(sort_column='rank', descending=True) == [2, 1, 0]
+    # NUL separators keep a filter from matching across two names
+    assert summary.select(pokemon='スカイ') == []
+
+    records = RecordIndex(TRAINERS).summary()
+    for column in summary.COLUMNS:
+        assert getattr(records, column) == getattr(summary, column)
+
+
+def test_summary_tolerates_missing_fields(tmp_path):
+    text = json.dumps([{'rank': None, 'trainer_name': 5, 'pokemon': [{'name': 'ガブリアス'}, 'junk']}])
+    index = TrainerIndex(write(tmp_path / 'trainer_data.json', text))
+    summary = index.summary()
+    index.close()
+    assert (summary.rank, summary.rating, summary.trainer_name, summary.pokemon, summary.items) == \
+        ([-1], [-1], [''], ['ガブリアス'], [''])
@@ -0,0 +1,84 @@
+import pytest
+
+requests = pytest.importorskip('requests')
+pytest.importorskip('bs4')
+
+from adaptive_throttle import AdaptiveThrottle
+from pokemon_scraper import PokemonSVScraper
+
+URL = 'https://sv.pokedb.tokyo/trainer/list'
+HOST = 'sv.pokedb.tokyo'
+
+
+def make_response(status_code=200, body=b'ok', headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.url = URL
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSession:
+    """Plays back a list of responses and exceptions, one per get()"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, timeout=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_scraper(outcomes, max_retries=3):
+    scraper = PokemonSVScraper(log=lambda message: None, max_retries=max_retries)
+    scraper.throttle = AdaptiveThrottle(min_delay=0.0, initial_delay=0.0, initial_concurrency=4,
+                                        metrics=scraper.metrics)
+    scraper.session = FakeSession(outcomes)
+    return scraper
+
+
+def test_retries_connection_errors_and_timeouts():
+    scraper = make_scraper([requests.ConnectionError(), requests.Timeout(), make_response()])
+    response = scraper._get(URL, 'list_page_fetch')
+    assert response.content == b'ok'
+    assert scraper.session.calls == 3
+    assert scraper.metrics.counter('http_retries_total', host=HOST) == 2
+    # Both failures reached the throttle
+    assert scraper.throttle.limits(HOST)[0] < 4
+
+
+def test_reraises_when_retries_run_out():
+    scraper = make_scraper([requests.ConnectionError()] * 3, max_retries=2)
+    with pytest.raises(requests.ConnectionError):
+        scraper._get(URL, 'list_page_fetch')
+    assert scraper.session.calls == 3
+    assert scraper.metrics.counter('http_retries_total') == 2
+    # Every slot was returned even though the request raised
+    assert scraper.throttle._state(HOST).in_flight == 0
+
+
+def test_retries_backoff_statuses():
+    scraper = make_scraper([make_response(503), make_response(429), make_response()])
+    assert scraper._get(URL, 'list_page_fetch').status_code == 200
+    assert scraper.metrics.counter('http_retries_total', host=HOST) == 2
+    assert scraper.metrics.counter('http_requests_total', host=HOST, status=503) == 1
+
+
+def test_last_backoff_status_is_raised():
+    scraper = make_scraper([make_response(503)] * 2, max_retries=1)
+    with pytest.raises(requests.HTTPError):
+        scraper._get(URL, 'list_page_fetch')
+    assert scraper.session.calls == 2
+
+
+def test_client_errors_are_not_retried():
+    scraper = make_scraper([make_response(404)])
+    with pytest.raises(requests.HTTPError):
+        scraper._get(URL, 'list_page_fetch')
+    assert scraper.session.calls == 1
+    assert scraper.metrics.counter('http_retries_total') == 0
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from team_index import TeamIndex
+from trainer_records import PokemonSet, Trainer
+
+
+def team(rank, *members, season=None, url=''):
+    pokemon = [PokemonSet(member) if isinstance(member, str) else PokemonSet('', pokemon_id=f'{member:04d}-00')
+               for member in members]
+    return Trainer(rank, 2000 - rank, f'trainer{rank}', article_url=url, pokemon=pokemon, season=season)
+
+
+def small_index():
+    index = TeamIndex()
+    index.add_trainers([
+        team(1, 445, 149, 248, 977, 987, 1007, url='https://a.example/1'),
+        team(2, 445, 149, 248, 977, 987, 1000),
+        team(3, 445, 149, 1, 4, 7, 25),
+        team(4, 1, 4, 7, 25, 133, 143),
+    ], season=27)
+    return index
+
+
+def test_members_accepts_names_ids_and_numbers():
+    index = small_index()
+    index.add_trainer(team(5, '新ポケモンX'))
+    assert index.members(['ガブリアス', '0149-00', 248, '新ポケモンX', 'どこにもいない']) == {445, 149, 248, 1100}
+    assert index.members(index.trainers[0]) == {445, 149, 248, 977, 987, 1007}
+
+
+def test_exact_similar_ranks_by_jaccard():
+    index = small_index()
+    results = index.similar([445, 149, 248, 977, 987, 1007])
+    assert [team for _, _, team in results] == [0, 1, 2]
+    assert results[0] == (1.0, 6, 0)
+    assert results[1] == (5 / 7, 5, 1)
+    assert results[2] == (2 / 10, 2, 2)
+    # Team 3 shares nothing and is never a candidate
+    assert index.similar([445], k=10, min_shared=1) == [(1 / 6, 1, 0), (1 / 6, 1, 1), (1 / 6, 1, 2)]
+
+
+def test_min_shared_and_k():
+    index = small_index()
+    assert [team for _, _, team in index.similar([445, 149, 248, 977, 987, 1007], min_shared=3)] == [0, 1]
+    assert len(index.similar([445, 149], k=2)) == 2
+    assert index.similar([]) == []
+
+
+def test_similar_to_team_leaves_team_out():
+    index = small_index()
+    assert [team for _, _, team in index.similar_to_team(0)] == [1, 2]
+    assert [team for _, _, team in index.similar_to_team(3)] == [2]
+
+
+def test_find():
+    index = small_index()
+    index.add_trainer(team(1, 445, season=28))
+    assert index.find(rank=1) == [0, 4]
+    assert index.find(rank=1, season=28) == [4]
+    assert index.find(article_url='https://a.example/1') == [0]
+    assert index.find(rank=99) == []
+
+
+def test_lsh_finds_identical_and_near_teams():
+    rng = random.Random(7)
+    index = TeamIndex(lsh_threshold=100)
+    teams = [rng.sample(range(1, 1000), 6) for _ in range(300)]
+    for rank, members in enumerate(teams, 1):
+        index.add_trainer(team(rank, *members))
+    assert len(index) == 300
+
+    query = teams[42]
+    approximate = index.similar(query, k=1)
+    assert approximate == [(1.0, 6, 42)]
+    # LSH only narrows the candidates; scores match the exact search
+    exact = {team: (jaccard, shared) for jaccard, shared, team in index.similar(query, k=300, approximate=False)}
+    for jaccard, shared, team_number in index.similar(query, k=5, approximate=True):
+        assert exact[team_number] == (jaccard, shared)
+
+
+def test_lsh_falls_back_to_exact_search_for_partial_teams():
+    index = small_index()
+    partial = [445, 149]
+    assert index.similar(partial, k=3, approximate=True) == index.similar(partial, k=3, approximate=False)
+
+
+def test_num_perm_must_split_into_bands():
+    with pytest.raises(ValueError):
+        TeamIndex(num_perm=30, bands=8)
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+import json_codec
+from trainer_records import (EV_MAX, UNKNOWN, PokemonSet, Trainer, TrainerDataError, decode_trainers,
+                             encode_trainers, load_trainers, dump_trainers)
+
+TRAINERS = [
+    Trainer(1, 2100, 'ゆう', 'https://a.example/1', [
+        PokemonSet('ガブリアス', 'こだわりスカーフ', 'さめはだ', 'ようき', 'じめん',
+                   ('じしん', 'げきりん', 'ステルスロック', 'がんせきふうじ'), (4, 252, 0, 0, 0, 252),
+                   pokemon_id='0445-00'),
+        PokemonSet('カイリュー', UNKNOWN, 'マルチスケイル', 'いじっぱり', 'ノーマル', ('しんそく',),
+                   inferred=('item',)),
+        PokemonSet.unknown('サーフゴー', '1000-00'),
+    ], season=27),
+    Trainer(2, 2050, 'back\\slash "quoted"', '', []),
+]
+
+# Decode with msgspec's typed decoder when installed, and always with the parse-then-validate path
+DECODERS = [False] + ([True] if json_codec.TYPED_DECODING else [])
+
+
+@pytest.fixture(params=DECODERS, ids=lambda typed: 'typed' if typed else 'validated')
+def decode(request, monkeypatch):
+    monkeypatch.setattr(json_codec, 'TYPED_DECODING', request.param)
+    return lambda data: decode_trainers(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+
+@pytest.mark.parametrize('backend', json_codec.AVAILABLE_BACKENDS)
+def test_backends_write_identical_bytes(backend):
+    data = [trainer.to_dict() for trainer in TRAINERS]
+    assert json_codec.dumps(data, backend=backend) == json_codec.dumps(data, backend='json')
+    assert json_codec.loads(json_codec.dumps(data, backend=backend), backend=backend) == data
+
+
+def test_round_trip(decode):
+    assert decode([trainer.to_dict() for trainer in TRAINERS]) == TRAINERS
+    assert decode_trainers(encode_trainers(TRAINERS)) == TRAINERS
+
+
+def test_file_round_trip(tmp_path):
+    path = str(tmp_path / 'trainer_data.json')
+    dump_trainers(TRAINERS, path)
+    assert load_trainers(path) == TRAINERS
+    assert not (tmp_path / 'trainer_data.json.tmp').exists()
+
+
+def test_to_dict_leaves_out_unset_fields():
+    data = TRAINERS[1].to_dict()
+    assert 'season' not in data
+    pokemon = PokemonSet('ガブリアス').to_dict()
+    assert 'pokemon_id' not in pokemon and 'inferred' not in pokemon
+    assert pokemon['evs'] == {'H': 0, 'A': 0, 'B': 0, 'C': 0, 'D': 0, 'S': 0}
+
+
+def test_values_are_converted(decode):
+    trainer, = decode([{
+        'rank': '3', 'rating': '1999', 'trainer_name': 42, 'article_url': None, 'season': '27',
+        'extra': 'ignored',
+        'pokemon': [{
+            'name': 'ガブリアス', 'item': None, 'ability': 7, 'moves': ['じしん', None, 3],
+            'evs': {'H': '252', 'A': -4, 'B': 70000, 'C': True, 'D': 'x', 'S': 4.0, 'X': 252},
+            'inferred': None,
+        }],
+    }])
+    assert (trainer.rank, trainer.rating, trainer.trainer_name, trainer.article_url, trainer.season) == \
+        (3, 1999, '42', '', 27)
+    pokemon, = trainer.pokemon
+    assert (pokemon.item, pokemon.ability, pokemon.moves) == ('', '7', ('じしん', '', '3'))
+    assert list(pokemon.evs) == [252, 0, EV_MAX, 0, 0, 4]
+    assert pokemon.inferred == ()
+
+
+def test_missing_and_null_fields(decode):
+    trainer, = decode([{'rank': 'unranked', 'pokemon': None}])
+    assert trainer == Trainer('unranked', None, '', '', [])
+    trainer, = decode([{'pokemon': [{}]}])
+    assert trainer.pokemon == (PokemonSet(''),)
+
+
+@pytest.mark.parametrize('data', [
+    {'trainers': []},
+    ['not a trainer'],
+    [{'pokemon': {'name': 'ガブリアス'}}],
+    [{'pokemon': ['ガブリアス']}],
+    [{'pokemon': [{'moves': 'じしん'}]}],
+    [{'pokemon': [{'evs': [252, 252]}]}],
+    [{'pokemon': [{'inferred': 'item'}]}],
+])
+def test_wrong_structure_is_rejected(decode, data):
+    with pytest.raises(TrainerDataError):
+        decode(data)
+
+
+def test_error_names_the_field():
+    with pytest.raises(TrainerDataError, match=r'\$\[1\]\.pokemon\[0\]\.evs'):
+        Trainer.from_dict({'pokemon': [{'evs': 'none'}]}, '$[1]')
@@ -0,0 +1,199 @@
+import argparse
+import csv
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, CSV is used instead
+    pa = None
+    pq = None
+
+from trainer_records import EV_KEYS, load_trainers
+
+# Column layout of the three normalized tables. Every table carries the
+# (season, rule, party, rank) key so rows from several seasons can be
+# concatenated and joined back together.
+KEY_COLUMNS = ['season', 'rule', 'party', 'rank']
+TABLE_COLUMNS = {
+    'trainers': KEY_COLUMNS + ['rating', 'trainer_name', 'article_url'],
+    'team_members': KEY_COLUMNS + ['slot', 'pokemon_id', 'name', 'item', 'ability',
+                                   'nature', 'tera_type'] + [f'ev_{k}' for k in EV_KEYS] + ['inferred'],
+    'moves': KEY_COLUMNS + ['slot', 'move_slot', 'move'],
+}
+
+# Repeated strings are stored dictionary-encoded
+DICTIONARY_COLUMNS = {'trainer_name', 'article_url', 'pokemon_id', 'name', 'item',
+                      'ability', 'nature', 'tera_type', 'move', 'inferred'}
+
+
+def _arrow_schema(table):
+    """Build the Arrow schema for one of the export tables"""
+    fields = []
+    for column in TABLE_COLUMNS[table]:
+        if column in DICTIONARY_COLUMNS:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        elif column.startswith('ev_'):
+            fields.append(pa.field(column, pa.uint16()))
+        else:
+            fields.append(pa.field(column, pa.int32()))
+    return pa.schema(fields)
+
+
+def flatten_trainer(trainer, season, rule, party):
+    """
+    Flatten one Trainer record into rows for the trainers, team_members and moves tables
+
+    Returns:
+        dict: Table name -> list of row tuples in TABLE_COLUMNS order
+    """
+    key = (season, rule, party, trainer.rank)
+    tables = {
+        'trainers': [key + (trainer.rating, trainer.trainer_name, trainer.article_url)],
+        'team_members': [],
+        'moves': [],
+    }
+
+    for slot, pokemon in enumerate(trainer.pokemon, 1):
+        tables['team_members'].append(key + (
+            slot,
+            pokemon.pokemon_id,
+            pokemon.name,
+            pokemon.item,
+            pokemon.ability,
+            pokemon.nature,
+            pokemon.tera_type,
+        ) + tuple(pokemon.evs) + (",".join(pokemon.inferred),))
+
+        for move_slot, move in enumerate(pokemon.moves, 1):
+            tables['moves'].append(key + (slot, move_slot, move))
+
+    return tables
+
+
+class TrainerExporter:
+    """
+    Incrementally write trainers into normalized columnar tables
+
+    Each table is written to <output_dir>/<table>/s<season>_r<rule>_p<party>.<ext>
+    so a directory per table can be read as one dataset spanning every season.
+    Parquet is used when pyarrow is installed, CSV otherwise. Rows are buffered
+    and flushed every `batch_size` trainers (one Parquet row group per flush).
+    """
+
+    def __init__(self, output_dir, season, rule, party, fmt=None, batch_size=50):
+        if fmt is None:
+            fmt = 'parquet' if pa is not None else 'csv'
+        if fmt == 'parquet' and pa is None:
+            raise RuntimeError("pyarrow is required for Parquet export (pip install pyarrow)")
+        if fmt not in ('parquet', 'csv'):
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        self.output_dir = output_dir
+        self.season = season
+        self.rule = rule
+        self.party = party
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self._buffers = {table: [] for table in TABLE_COLUMNS}
+        self._pending = 0
+        self._writers = {}
+        self._files = {}
+        self.trainers_written = 0
+
+    def path_for(self, table):
+        """Output path of a table for this exporter's season/rule/party"""
+        filename = f"s{self.season}_r{self.rule}_p{self.party}.{self.fmt}"
+        return os.path.join(self.output_dir, table, filename)
+
+    def add_trainer(self, trainer):
+        """Queue one finished Trainer record, flushing when the batch is full"""
+        rows = flatten_trainer(trainer, self.season, self.rule, self.party)
+        for table, table_rows in rows.items():
+            self._buffers[table].extend(table_rows)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows to disk"""
+        for table, rows in self._buffers.items():
+            if not rows:
+                continue
+            if self.fmt == 'parquet':
+                self._write_parquet(table, rows)
+            else:
+                self._write_csv(table, rows)
+            rows.clear()
+        self.trainers_written += self._pending
+        self._pending = 0
+
+    def _open_path(self, table):
+        path = self.path_for(table)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _write_parquet(self, table, rows):
+        writer = self._writers.get(table)
+        if writer is None:
+            writer = pq.ParquetWriter(self._open_path(table), _arrow_schema(table),
+                                      compression='zstd')
+            self._writers[table] = writer
+
+        schema = writer.schema
+        columns = list(zip(*rows))
+        arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    def _write_csv(self, table, rows):
+        f = self._files.get(table)
+        if f is None:
+            f = open(self._open_path(table), 'w', encoding='utf-8', newline='')
+            csv.writer(f).writerow(TABLE_COLUMNS[table])
+            self._files[table] = f
+        csv.writer(f).writerows(rows)
+        f.flush()
+
+    def close(self):
+        """Flush remaining rows and close all table files"""
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        for f in self._files.values():
+            f.close()
+        self._writers.clear()
+        self._files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_json_file(json_file_path, output_dir, season, rule=0, party=1, fmt=None):
+    """
+    Export an existing trainer_data.json into columnar tables
+
+    Returns:
+        int: Number of trainers exported
+    """
+    with TrainerExporter(output_dir, season, rule, party, fmt=fmt) as exporter:
+        for trainer in load_trainers(json_file_path):
+            exporter.add_trainer(trainer)
+    return exporter.trainers_written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export trainer_data.json to Parquet/CSV tables")
+    parser.add_argument('json_file', nargs='?', default='trainer_data.json')
+    parser.add_argument('--output-dir', default='export')
+    parser.add_argument('--season', type=int, default=27)
+    parser.add_argument('--rule', type=int, default=0)
+    parser.add_argument('--party', type=int, default=1)
+    parser.add_argument('--format', choices=['parquet', 'csv'], default=None)
+    args = parser.parse_args()
+
+    count = export_json_file(args.json_file, args.output_dir, args.season,
+                             args.rule, args.party, fmt=args.format)
+    print(f"Exported {count} trainers to {args.output_dir}")
@@ -0,0 +1,293 @@
+import sys
+from array import array
+from typing import Any, Dict, List, Optional
+
+import json_codec
+
+EV_KEYS = ('H', 'A', 'B', 'C', 'D', 'S')
+# Largest EV value a set can hold (EVs are stored as unsigned shorts)
+EV_MAX = 0xFFFF
+UNKNOWN = sys.intern('不明')
+
+
+class TrainerDataError(ValueError):
+    """Raised when trainer data does not match the trainer_data.json schema"""
+
+
+def _intern(value):
+    """Intern repeated strings (names, items, moves...) so every team shares one copy
+
+    None becomes '' and anything else (e.g. a number in a hand-edited file) is
+    converted with str(), as the uploader has always shown it.
+    """
+    if value is None:
+        return ''
+    return sys.intern(value if isinstance(value, str) else str(value))
+
+
+def _number(value):
+    """rank/rating/season from a trainer dict: numeric strings become ints, anything else is kept"""
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _ev_value(value):
+    """EV from a trainer dict: numbers and numeric strings clamped to 0..EV_MAX, anything else 0"""
+    if isinstance(value, bool):
+        return 0
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return 0
+    return min(max(number, 0), EV_MAX)
+
+
+def _ev_values(evs):
+    """EV array values of an evs dict in EV_KEYS order (other keys are ignored)"""
+    return [_ev_value(evs.get(key)) for key in EV_KEYS]
+
+
+class PokemonSet:
+    """
+    One Pokemon of a team
+
+    Strings are interned, moves are a tuple and EVs a 6-element unsigned short
+    array in H/A/B/C/D/S order, which keeps a set far smaller than the dict
+    form used in trainer_data.json. `inferred` names the fields that were not
+    in the article and were filled from season usage data instead.
+    """
+    __slots__ = ('pokemon_id', 'name', 'item', 'ability', 'nature', 'tera_type', 'moves', 'evs',
+                 'inferred')
+
+    def __init__(self, name, item='', ability='', nature='', tera_type='', moves=(), evs=None,
+                 pokemon_id='', inferred=()):
+        self.pokemon_id = _intern(pokemon_id)
+        self.name = _intern(name)
+        self.item = _intern(item)
+        self.ability = _intern(ability)
+        self.nature = _intern(nature)
+        self.tera_type = _intern(tera_type)
+        self.moves = tuple(_intern(move) for move in moves)
+        self.evs = array('H', evs if evs is not None else (0,) * len(EV_KEYS))
+        self.inferred = tuple(_intern(field) for field in inferred)
+
+    @classmethod
+    def unknown(cls, name, pokemon_id=''):
+        """Placeholder set for a Pokemon whose details could not be found"""
+        return cls(name, UNKNOWN, UNKNOWN, UNKNOWN, UNKNOWN, (UNKNOWN,) * 4, pokemon_id=pokemon_id)
+
+    @classmethod
+    def from_dict(cls, data, path='pokemon'):
+        """
+        Build a set from its trainer_data.json dict
+
+        Field values are converted (see _intern and _ev_value) rather than
+        type-checked; path locates the set in TrainerDataError messages.
+        """
+        evs = data.get('evs') or {}
+        if not isinstance(evs, dict):
+            raise TrainerDataError(f"{path}.evs: expected an object, got {type(evs).__name__}")
+        return cls(
+            data.get('name'),
+            data.get('item'),
+            data.get('ability'),
+            data.get('nature'),
+            data.get('tera_type'),
+            data.get('moves') or (),
+            _ev_values(evs),
+            data.get('pokemon_id'),
+            data.get('inferred') or (),
+        )
+
+    def to_dict(self):
+        """Dict in trainer_data.json format (pokemon_id and inferred only when set)"""
+        data = {'pokemon_id': self.pokemon_id} if self.pokemon_id else {}
+        data.update({
+            'name': self.name,
+            'item': self.item,
+            'ability': self.ability,
+            'nature': self.nature,
+            'tera_type': self.tera_type,
+            'moves': list(self.moves),
+            'evs': self.ev_dict()
+        })
+        if self.inferred:
+            data['inferred'] = list(self.inferred)
+        return data
+
+    def ev_dict(self):
+        return dict(zip(EV_KEYS, self.evs))
+
+    def __eq__(self, other):
+        if not isinstance(other, PokemonSet):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"PokemonSet({self.name!r}, item={self.item!r}, moves={self.moves!r})"
+
+
+class Trainer:
+    """A ranked trainer with their construction article and team"""
+    __slots__ = ('rank', 'rating', 'trainer_name', 'article_url', 'pokemon', 'season')
+
+    def __init__(self, rank, rating, trainer_name, article_url='', pokemon=(), season=None):
+        self.rank = rank
+        self.rating = rating
+        self.trainer_name = trainer_name
+        self.article_url = article_url or ''
+        self.pokemon = tuple(pokemon)
+        self.season = season
+
+    @classmethod
+    def from_dict(cls, data, path='$'):
+        """Build a trainer from its trainer_data.json dict; path locates it in TrainerDataError messages"""
+        return cls(
+            _number(data.get('rank')),
+            _number(data.get('rating')),
+            _intern(data.get('trainer_name')),
+            _intern(data.get('article_url')),
+            [PokemonSet.from_dict(pokemon, f"{path}.pokemon[{i}]")
+             for i, pokemon in enumerate(data.get('pokemon') or [])],
+            _number(data.get('season')),
+        )
+
+    def to_dict(self):
+        data = {
+            'rank': self.rank,
+            'rating': self.rating,
+            'trainer_name': self.trainer_name,
+            'article_url': self.article_url,
+            'pokemon': [pokemon.to_dict() for pokemon in self.pokemon]
+        }
+        if self.season is not None:
+            data['season'] = self.season
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, Trainer):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"Trainer(rank={self.rank!r}, trainer_name={self.trainer_name!r})"
+
+
+# trainer_data.json structure: field -> container type (null counts as empty).
+# Field values are converted by from_dict, not type-checked, so every file the
+# uploader could read before still loads
+TRAINER_SCHEMA = {
+    'pokemon': list,
+}
+POKEMON_SCHEMA = {
+    'moves': list,
+    'evs': dict,
+    'inferred': list,
+}
+
+
+def _check_fields(data, schema, path):
+    if not isinstance(data, dict):
+        raise TrainerDataError(f"{path}: expected an object, got {type(data).__name__}")
+    for field, container in schema.items():
+        value = data.get(field)
+        if value is not None and not isinstance(value, container):
+            raise TrainerDataError(f"{path}.{field}: expected {container.__name__}, got {type(value).__name__}")
+
+
+def validate_trainer_data(data):
+    """Check the structure of parsed trainer_data.json, raising TrainerDataError"""
+    if not isinstance(data, list):
+        raise TrainerDataError(f"$: expected a list of trainers, got {type(data).__name__}")
+    for i, trainer in enumerate(data):
+        path = f"$[{i}]"
+        _check_fields(trainer, TRAINER_SCHEMA, path)
+        for j, pokemon in enumerate(trainer.get('pokemon') or []):
+            _check_fields(pokemon, POKEMON_SCHEMA, f"{path}.pokemon[{j}]")
+
+
+if json_codec.TYPED_DECODING:
+    msgspec = json_codec.msgspec
+    # Same structure as validate_trainer_data; values are converted like from_dict
+
+    class _PokemonSchema(msgspec.Struct):
+        name: Any = None
+        item: Any = None
+        ability: Any = None
+        nature: Any = None
+        tera_type: Any = None
+        moves: Optional[List[Any]] = None
+        evs: Optional[Dict[str, Any]] = None
+        pokemon_id: Any = None
+        inferred: Optional[List[Any]] = None
+
+    class _TrainerSchema(msgspec.Struct):
+        rank: Any = None
+        trainer_name: Any = None
+        rating: Any = None
+        article_url: Any = None
+        pokemon: Optional[List[_PokemonSchema]] = None
+        season: Any = None
+
+    _trainer_decoder = msgspec.json.Decoder(List[_TrainerSchema])
+
+
+def _from_schema(trainer):
+    """Convert a decoded msgspec struct into a Trainer record, converting values like from_dict"""
+    return Trainer(
+        _number(trainer.rank),
+        _number(trainer.rating),
+        _intern(trainer.trainer_name),
+        _intern(trainer.article_url),
+        [PokemonSet(p.name, p.item, p.ability, p.nature, p.tera_type, p.moves or (),
+                    _ev_values(p.evs or {}), p.pokemon_id, p.inferred or ())
+         for p in trainer.pokemon or []],
+        _number(trainer.season),
+    )
+
+
+def decode_trainers(data):
+    """
+    Decode trainer_data.json bytes into validated Trainer records
+
+    Uses msgspec's schema-typed decoder when available, otherwise parses with
+    the fastest JSON backend and checks the result against the same structure.
+    """
+    if json_codec.TYPED_DECODING:
+        try:
+            return [_from_schema(trainer) for trainer in _trainer_decoder.decode(data)]
+        except msgspec.ValidationError as e:
+            raise TrainerDataError(str(e)) from e
+
+    parsed = json_codec.loads(data)
+    validate_trainer_data(parsed)
+    return trainers_from_json(parsed)
+
+
+def encode_trainers(trainers):
+    """Encode Trainer records into trainer_data.json bytes"""
+    return json_codec.dumps(trainers_to_json(trainers))
+
+
+def trainers_from_json(data):
+    """Decode the parsed trainer_data.json list into Trainer records"""
+    return [Trainer.from_dict(trainer, f"$[{i}]") for i, trainer in enumerate(data)]
+
+
+def trainers_to_json(trainers):
+    """Encode Trainer records into the trainer_data.json list structure"""
+    return [trainer.to_dict() for trainer in trainers]
+
+
+def load_trainers(json_file_path):
+    """Load a trainer_data.json file into Trainer records"""
+    return decode_trainers(json_codec.read_file(json_file_path))
+
+
+def dump_trainers(trainers, json_file_path):
+    """Write Trainer records to a trainer_data.json file"""
+    json_codec.write_file(json_file_path, encode_trainers(trainers))
@@ -0,0 +1,337 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from trainer_records import EV_KEYS, PokemonSet, Trainer, load_trainers
+
+STORE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (
+    id INTEGER PRIMARY KEY,
+    season INTEGER NOT NULL,
+    rule INTEGER NOT NULL,
+    party INTEGER NOT NULL,
+    scraped_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_seasons_key ON seasons (season, rule, party);
+
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    article_url TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_url ON articles (article_url);
+
+CREATE TABLE IF NOT EXISTS trainers (
+    id INTEGER PRIMARY KEY,
+    season INTEGER NOT NULL,
+    rule INTEGER NOT NULL,
+    party INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    rating INTEGER,
+    trainer_name TEXT NOT NULL,
+    article_id INTEGER REFERENCES articles (id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_trainers_key ON trainers (season, rule, party, rank);
+CREATE INDEX IF NOT EXISTS idx_trainers_article ON trainers (article_id);
+
+CREATE TABLE IF NOT EXISTS team_members (
+    trainer_id INTEGER NOT NULL REFERENCES trainers (id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    pokemon_id TEXT,
+    name TEXT,
+    item TEXT,
+    ability TEXT,
+    nature TEXT,
+    tera_type TEXT,
+    moves TEXT,
+    evs TEXT,
+    inferred TEXT,
+    PRIMARY KEY (trainer_id, slot)
+);
+CREATE INDEX IF NOT EXISTS idx_team_members_pokemon ON team_members (pokemon_id, trainer_id);
+"""
+
+
+def is_store_path(path):
+    """Return True if the path points to a SQLite trainer store"""
+    return path.lower().endswith(STORE_EXTENSIONS)
+
+
+class TrainerStore:
+    """
+    Local SQLite database of scraped trainers across seasons
+
+    Trainers are keyed by (season, rule, party, rank), so re-scraping a season
+    updates rows in place instead of overwriting the whole history. Ranks a
+    complete re-scrape no longer has are deleted when its writer closes.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def writer(self, season, rule, party, batch_size=20):
+        """Create a batching writer for one (season, rule, party) scrape"""
+        return TrainerStoreWriter(self, season, rule, party, batch_size)
+
+    def upsert_trainers(self, trainers, season, rule, party):
+        """
+        Insert or update a batch of trainers in a single transaction
+
+        Args:
+            trainers (list): Trainer records
+        """
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO seasons (season, rule, party, scraped_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (season, rule, party) DO UPDATE SET scraped_at = excluded.scraped_at",
+                (season, rule, party, time.time())
+            )
+
+            for trainer in trainers:
+                article_id = None
+                article_url = trainer.article_url
+                if article_url:
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO articles (article_url) VALUES (?)", (article_url,)
+                    )
+                    article_id = self.conn.execute(
+                        "SELECT id FROM articles WHERE article_url = ?", (article_url,)
+                    ).fetchone()[0]
+
+                self.conn.execute(
+                    "INSERT INTO trainers (season, rule, party, rank, rating, trainer_name, article_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (season, rule, party, rank) DO UPDATE SET "
+                    "rating = excluded.rating, trainer_name = excluded.trainer_name, "
+                    "article_id = excluded.article_id",
+                    (season, rule, party, trainer.rank, trainer.rating,
+                     trainer.trainer_name, article_id)
+                )
+                trainer_id = self.conn.execute(
+                    "SELECT id FROM trainers WHERE season = ? AND rule = ? AND party = ? AND rank = ?",
+                    (season, rule, party, trainer.rank)
+                ).fetchone()[0]
+
+                self.conn.execute("DELETE FROM team_members WHERE trainer_id = ?", (trainer_id,))
+                self.conn.executemany(
+                    "INSERT INTO team_members (trainer_id, slot, pokemon_id, name, item, ability, "
+                    "nature, tera_type, moves, evs, inferred) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (trainer_id, slot, pokemon.pokemon_id or None, pokemon.name,
+                         pokemon.item, pokemon.ability, pokemon.nature, pokemon.tera_type,
+                         json.dumps(pokemon.moves, ensure_ascii=False),
+                         json.dumps(pokemon.ev_dict()),
+                         json.dumps(pokemon.inferred) if pokemon.inferred else None)
+                        for slot, pokemon in enumerate(trainer.pokemon, 1)
+                    ]
+                )
+
+    def prune_trainers(self, season, rule, party, ranks):
+        """
+        Delete the trainers of a (season, rule, party) whose rank is not in `ranks`
+
+        Returns:
+            int: Number of trainers deleted (their team members go with them)
+        """
+        with self.conn:
+            stale = [(row['id'],) for row in self.conn.execute(
+                "SELECT id, rank FROM trainers WHERE season = ? AND rule = ? AND party = ?",
+                (season, rule, party)
+            ) if row['rank'] not in ranks]
+            self.conn.executemany("DELETE FROM trainers WHERE id = ?", stale)
+        return len(stale)
+
+    def season_keys(self):
+        """List stored (season, rule, party) keys, most recently scraped first"""
+        rows = self.conn.execute(
+            "SELECT season, rule, party FROM seasons ORDER BY scraped_at DESC"
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def load_trainers(self, season=None, rule=None, party=None):
+        """
+        Load Trainer records, ordered by rank
+
+        If no key is given, the most recently scraped (season, rule, party) is
+        used. Otherwise only the given values are matched (e.g. season alone
+        returns every rule and party of that season, with their season set).
+        """
+        if season is None and rule is None and party is None:
+            keys = self.season_keys()
+            if not keys:
+                return []
+            season, rule, party = keys[0]
+
+        filters, params = [], []
+        for column, value in (('season', season), ('rule', rule), ('party', party)):
+            if value is not None:
+                filters.append(f"t.{column} = ?")
+                params.append(value)
+        # Several keys in one result: keep them apart and say which season each trainer is from
+        partial = len(filters) < 3
+        rows = self.conn.execute(
+            f"SELECT t.id, {'t.season, ' if partial else ''}t.rank, t.rating, t.trainer_name, a.article_url "
+            "FROM trainers t LEFT JOIN articles a ON a.id = t.article_id "
+            f"WHERE {' AND '.join(filters)} "
+            f"ORDER BY {'t.season, t.rule, t.party, ' if partial else ''}t.rank",
+            params
+        ).fetchall()
+        return self._with_team_members(rows)
+
+    def teams_with_pokemon(self, pokemon_id, max_rank=100, last_seasons=5, rule=None, party=None):
+        """
+        Find teams containing a Pokemon among the top ranks of recent seasons
+
+        Args:
+            pokemon_id (str): Full id such as "0445-00", or a bare Pokedex
+                number such as "0445" to match every form
+            max_rank (int): Only include trainers ranked at or above this
+            last_seasons (int): Number of most recent seasons to search
+
+        Returns:
+            list: Trainer records with their season set
+        """
+        if len(pokemon_id) == 4:
+            # Range scan over every form of the species, still served by the index
+            id_clause, id_params = "m.pokemon_id >= ? AND m.pokemon_id < ?", (pokemon_id + '-', pokemon_id + '.')
+        else:
+            id_clause, id_params = "m.pokemon_id = ?", (pokemon_id,)
+
+        filters, params = [], []
+        for column, value in (('rule', rule), ('party', party)):
+            if value is not None:
+                filters.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+        seasons = [row[0] for row in self.conn.execute(
+            f"SELECT DISTINCT season FROM seasons {where} ORDER BY season DESC LIMIT ?",
+            params + [last_seasons]
+        )]
+        if not seasons:
+            return []
+
+        key_filters = "".join(f" AND t.{f}" for f in filters)
+        placeholders = ", ".join("?" * len(seasons))
+        rows = self.conn.execute(
+            "SELECT DISTINCT t.id, t.season, t.rank, t.rating, t.trainer_name, a.article_url "
+            "FROM team_members m JOIN trainers t ON t.id = m.trainer_id "
+            "LEFT JOIN articles a ON a.id = t.article_id "
+            f"WHERE {id_clause} AND t.season IN ({placeholders}) AND t.rank <= ?{key_filters} "
+            "ORDER BY t.season DESC, t.rank",
+            id_params + tuple(seasons) + (max_rank,) + tuple(params)
+        ).fetchall()
+        return self._with_team_members(rows)
+
+    def _with_team_members(self, rows):
+        """Build Trainer records from trainer rows and their team members"""
+        teams = {row['id']: [] for row in rows}
+        ids = list(teams)
+        # Stay below SQLite's host parameter limit on large result sets
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for member in self.conn.execute(
+                f"SELECT * FROM team_members WHERE trainer_id IN ({placeholders}) "
+                "ORDER BY trainer_id, slot", chunk
+            ):
+                evs = json.loads(member['evs'])
+                teams[member['trainer_id']].append(PokemonSet(
+                    member['name'],
+                    member['item'],
+                    member['ability'],
+                    member['nature'],
+                    member['tera_type'],
+                    json.loads(member['moves']),
+                    [evs.get(key, 0) for key in EV_KEYS],
+                    member['pokemon_id'] or '',
+                    json.loads(member['inferred']) if member['inferred'] else ()
+                ))
+
+        has_season = rows and 'season' in rows[0].keys()
+        return [
+            Trainer(row['rank'], row['rating'], row['trainer_name'], row['article_url'],
+                    teams[row['id']], row['season'] if has_season else None)
+            for row in rows
+        ]
+
+
+class TrainerStoreWriter:
+    """Buffers trainers from a scrape and upserts them in batched transactions"""
+
+    def __init__(self, store, season, rule, party, batch_size=20):
+        self.store = store
+        self.season = season
+        self.rule = rule
+        self.party = party
+        self.batch_size = batch_size
+        self._pending = []
+        self._ranks = set()
+
+    def add_trainer(self, trainer):
+        self._pending.append(trainer)
+        self._ranks.add(trainer.rank)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.store.upsert_trainers(self._pending, self.season, self.rule, self.party)
+            self._pending = []
+
+    def close(self):
+        """The scrape is complete: write the last batch and delete ranks it no longer has"""
+        self.flush()
+        # Nothing scraped (e.g. the trainer list could not be fetched): keep the stored ranking
+        if self._ranks:
+            self.store.prune_trainers(self.season, self.rule, self.party, self._ranks)
+
+    def abort(self):
+        """The scrape failed: write the last batch but keep ranks it did not reach"""
+        self.flush()
+
+
+def load_trainer_data(path):
+    """
+    Load Trainer records from a trainer_data.json file or a SQLite trainer store
+
+    For a store, the most recently scraped (season, rule, party) is returned.
+    """
+    if is_store_path(path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        with TrainerStore(path) as store:
+            return store.load_trainers()
+
+    return load_trainers(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the SQLite trainer store")
+    parser.add_argument('db_path')
+    parser.add_argument('pokemon_id', help='Pokemon id (e.g. 0445-00) or Pokedex number (e.g. 0445)')
+    parser.add_argument('--max-rank', type=int, default=100)
+    parser.add_argument('--last-seasons', type=int, default=5)
+    args = parser.parse_args()
+
+    with TrainerStore(args.db_path) as store:
+        for trainer in store.teams_with_pokemon(args.pokemon_id, args.max_rank, args.last_seasons):
+            names = ", ".join(pokemon.name for pokemon in trainer.pokemon)
+            print(f"S{trainer.season} #{trainer.rank} {trainer.trainer_name}: {names}")